@@ -0,0 +1 @@
+from api.client import ApiClient, ApiError, get_client, load_session, read_session, reset_client
@@ -0,0 +1,212 @@
+"""
+JSON client for the web app's "utas" API, used for catalog reads instead of scraping the DOM.
+
+The client reuses the session the web app already holds: the X-UT-SID token is read from the logged-in page
+(or from config.API_SESSION_FILE, where it is saved after each read) and sent with every request. All requests go
+through a small pool of keep-alive connections so that consecutive reads don't pay for a new TLS handshake.
+"""
+import gzip
+import http.client
+import json
+import logging
+import queue
+import time
+from urllib.parse import urlsplit
+
+import config
+
+# Mirrors what the web app sends; the API rejects requests without a browser-like origin
+DEFAULT_HEADERS = {
+    'Accept': '*/*',
+    'Accept-Encoding': 'gzip',
+    'Connection': 'keep-alive',
+    'Content-Type': 'application/json',
+    'Origin': 'https://www.ea.com',
+    'Referer': 'https://www.ea.com/',
+}
+
+READ_SESSION_SCRIPT = """
+    try {
+        var session = services.Authentication.sessionUtas;
+        return {sid: session.id, url: session.url};
+    } catch (e) {
+        return null;
+    }
+"""
+
+# The most players the club search returns per request
+CLUB_PAGE_SIZE = 91
+
+class ApiError(Exception):
+    def __init__(self, status, path, body=""):
+        super().__init__(f"API request to {path} failed with status {status}: {body[:200]}")
+        self.status = status
+        self.path = path
+
+def read_session(driver, session_file=None):
+    """Reads the web app's UT session from the logged-in page and saves it to session_file."""
+    session = driver.execute_script(READ_SESSION_SCRIPT)
+    if not session or not session.get("sid"):
+        raise ApiError(401, "session", "The web app has no UT session. Is the driver logged in?")
+    session["saved_at"] = time.time()
+    with open(session_file or config.API_SESSION_FILE, 'w') as file:
+        json.dump(session, file)
+    return session
+
+def load_session(session_file=None):
+    with open(session_file or config.API_SESSION_FILE, 'r') as file:
+        return json.load(file)
+
+class ApiClient:
+    """
+    A keep-alive, pooled client for the SBC and store reads the bot needs.
+
+    Args:
+        base_url (str): e.g. "https://utas.mob.v4.prd.futc-ext.gcp.ea.com" or "http://127.0.0.1:8899".
+        sid (str): The X-UT-SID session token.
+        game (str): The game segment of the API path, e.g. "fc25".
+        pool_size (int): The maximum number of idle connections kept open.
+    """
+    def __init__(self, base_url, sid, game=config.API_GAME, pool_size=config.API_POOL_SIZE, timeout=config.DEFAULT_WAIT_DURATION):
+        if "://" not in base_url:
+            base_url = f"https://{base_url}"
+        url = urlsplit(base_url)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.sid = sid
+        self.game = game
+        self.timeout = timeout
+        self.request_count = 0
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    @classmethod
+    def from_session(cls, session, **kwargs):
+        return cls(config.API_URL or session["url"], session["sid"], **kwargs)
+
+    def _connection(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def get(self, path):
+        """Issues a GET for path (relative to /ut/game/<game>/) and returns the decoded JSON body."""
+        return self.request("GET", path)
+
+    def post(self, path, body):
+        """Issues a POST of body, as JSON, for path (relative to /ut/game/<game>/) and returns the decoded JSON body."""
+        return self.request("POST", path, body)
+
+    def request(self, method, path, body=None):
+        full_path = f"/ut/game/{self.game}/{path.lstrip('/')}"
+        headers = dict(DEFAULT_HEADERS, **{"X-UT-SID": self.sid})
+        payload = json.dumps(body).encode() if body is not None else None
+        # A pooled connection may have been closed by the server while idle, so retry once on a fresh one
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, full_path, body=payload, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                connection.close()
+                if attempt == 1:
+                    raise
+                continue
+            self._release(connection)
+            break
+
+        self.request_count += 1
+        if response.getheader("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        text = body.decode("utf-8")
+        if response.status != 200:
+            raise ApiError(response.status, full_path, text)
+        return json.loads(text) if text else {}
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    # Reads
+
+    def sbc_sets(self):
+        """
+        Returns every SBC set in one request, keyed by name.
+
+        Each entry has "set_id", "category", "complete" and "repeat_count" (-1 if infinitely repeatable),
+        matching what SbcCatalog reads from the tiles.
+        """
+        data = self.get("sbs/sets")
+        sets = {}
+        for category in data.get("categories", []):
+            for sbc_set in category.get("sets", []):
+                mode = sbc_set.get("repeatabilityMode", "NON_REPEATABLE")
+                times_completed = sbc_set.get("timesCompleted", 0)
+                if mode == "UNLIMITED":
+                    repeat_count = -1
+                else:
+                    limit = sbc_set.get("repeats", 1) if mode == "REPEATABLE" else 1
+                    repeat_count = max(limit - times_completed, 0)
+                sets[sbc_set["name"]] = {
+                    "set_id": sbc_set["setId"],
+                    "category": category.get("name"),
+                    "complete": repeat_count == 0,
+                    "repeat_count": repeat_count,
+                }
+        return sets
+
+    def challenges(self, set_id):
+        """Returns the challenges of an SBC set with their status, e.g. "NOT_STARTED", "IN_PROGRESS" or "COMPLETED"."""
+        data = self.get(f"sbs/setId/{set_id}/challenges")
+        return [{"challenge_id": challenge["challengeId"], "name": challenge.get("name"), "status": challenge.get("status")}
+                for challenge in data.get("challenges", [])]
+
+    def pack_inventory(self):
+        """Returns how many of each pack the account owns, keyed by pack name."""
+        data = self.get("store/purchaseGroup/all?ppInfo=true&categoryInfo=true")
+        inventory = {}
+        for pack in data.get("purchase", []):
+            # Owned ("My Packs") entries cost nothing to open
+            if pack.get("coins", 0) == 0 and pack.get("points", 0) == 0:
+                name = pack.get("name") or str(pack.get("id"))
+                inventory[name] = inventory.get(name, 0) + pack.get("count", 1)
+        return inventory
+
+    def club_players(self, start=0, count=CLUB_PAGE_SIZE):
+        """Returns one page of the players in the club, as the API's item dicts."""
+        data = self.post("club", {"type": "player", "start": start, "count": count, "sort": "asc", "sortBy": "ovr"})
+        return data.get("itemData", [])
+
+    def sbc_storage(self):
+        """Returns the items in SBC storage, as the API's item dicts."""
+        return [item for item in self.get("storagepile?skuMode=FUT").get("itemData", []) if item.get("itemType", "player") == "player"]
+
+    def unassigned_items(self):
+        """Returns the items in Unassigned, e.g. those of a pack just opened. Duplicates carry the duplicateId of the club copy."""
+        return self.get("purchased/items").get("itemData", [])
+
+# The client shared by the flows for the run, created from the logged-in driver on first use
+_client = None
+
+def get_client(driver):
+    global _client
+    if _client is None:
+        _client = ApiClient.from_session(read_session(driver))
+        logging.info(f"API client connected to {_client.scheme}://{_client.host}.")
+    return _client
+
+def reset_client():
+    """Drops the shared client, e.g. after logging in again, so the next get_client reads the new session."""
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
@@ -0,0 +1,80 @@
+"""
+A local stand-in for the utas API that replays recorded JSON, for testing the client offline.
+
+A request for /ut/game/<game>/<path> is answered with recordings/<path with "/" replaced by "_">.json, so
+/ut/game/fc25/sbs/setId/1001/challenges is served from recordings/sbs_setId_1001_challenges.json. The query
+string (and a POST's body) is ignored. Requests without an X-UT-SID header get a 401, like the real API.
+
+Usage:
+    python -m api.stub_server [--port 8899] [--latency 0.05]
+"""
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), "recordings")
+
+def recording_path(request_path, recordings_dir=RECORDINGS_DIR):
+    parts = urlsplit(request_path).path.strip("/").split("/")
+    # Drop the "ut/game/<game>" prefix
+    if parts[:2] == ["ut", "game"]:
+        parts = parts[3:]
+    return os.path.join(recordings_dir, "_".join(parts) + ".json")
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that the client's keep-alive connections are reused
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY each keep-alive response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        # Requests are answered by path alone, so the body (e.g. a club search's page) is read and ignored
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if not self.headers.get("X-UT-SID"):
+            self._send(401, b"")
+            return
+        path = recording_path(self.path, self.server.recordings_dir)
+        if not os.path.isfile(path):
+            self._send(404, b"")
+            return
+        with open(path, 'rb') as file:
+            self._send(200, file.read())
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, latency=0.0, recordings_dir=RECORDINGS_DIR):
+    """Starts the stub server on a background thread and returns it. Use server.server_address for the port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.recordings_dir = recordings_dir
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay each response.")
+    args = parser.parse_args()
+    server = start_stub_server(args.port, args.latency)
+    print(f"Replaying {RECORDINGS_DIR} on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
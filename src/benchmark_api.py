@@ -0,0 +1,41 @@
+"""
+Measures API client throughput offline against the stub server (api/stub_server.py).
+
+Compares reusing pooled keep-alive connections with opening a new connection per request, sequentially and
+from several threads.
+
+Usage:
+    python benchmark_api.py [requests] [latency]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api import ApiClient
+from api.stub_server import start_stub_server
+
+def measure(client, requests, threads, keep_alive):
+    def read(_):
+        client.sbc_sets()
+        if not keep_alive:
+            client.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(read, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+def main(requests=500, latency=0.0):
+    server = start_stub_server(latency=latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{'Connections':<12} {'Threads':>7} {'Requests/s':>11}")
+    for keep_alive in (True, False):
+        for threads in (1, 4):
+            client = ApiClient(base_url, "benchmark", pool_size=threads)
+            rate = measure(client, requests, threads, keep_alive)
+            client.close()
+            print(f"{'keep-alive' if keep_alive else 'new':<12} {threads:>7} {rate:>11.0f}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
@@ -0,0 +1,169 @@
+"""
+End-to-end benchmark of the SBC and pack flows against the local fixture web app (fixtures/).
+
+Each flow runs in headless Chrome against a freshly loaded fixture, so every run starts from the same SBCs and
+packs. Per flow the wall time, the number of WebDriver commands, the SBCs completed, the packs opened and the
+errors are recorded, and the results are saved to BENCHMARK_RESULTS_DIR/<git commit>.json so that a change can
+be compared with the commit before it.
+
+Usage:
+    python benchmark_e2e.py [--runs 3] [--latency 150] [--animate 200] [--profile performance] [--compare <commit or file>]
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import statistics
+import subprocess
+import time
+
+FLOWS = ["daily_challenges", "gold_upgrade", "special_upgrade", "open_cheap_packs", "open_gold_packs"]
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+def create_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    import config
+    import tracing
+    from browser_profile import is_performance_profile, add_performance_options, apply_performance_profile
+    from provisioning import resolve_driver_path
+
+    options = webdriver.ChromeOptions()
+    if is_performance_profile():
+        add_performance_options(options)
+    else:
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={config.BROWSER_WINDOW_SIZE}")
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+    if is_performance_profile():
+        apply_performance_profile(driver)
+    tracing.instrument_driver(driver)
+    return driver
+
+def run_flow(driver, name):
+    import config
+    import sbc
+    import store
+
+    flows = {
+        "daily_challenges": lambda: sbc.daily_challenges(driver),
+        "gold_upgrade": lambda: sbc.gold_upgrade(driver, config.GOLD_UPGRADE_COUNT, config.GOLD_UPGRADE_USE_SBC_STORAGE),
+        "special_upgrade": lambda: sbc.special_upgrade(driver, config.SPECIAL_UPGRADE_NAME, config.SPECIAL_UPGRADE_COUNT,
+                                                       config.SPECIAL_UPGRADE_USE_SBC_STORAGE, config.SPECIAL_UPGRADE_RARE_COUNT),
+        "open_cheap_packs": lambda: store.open_cheap_packs(driver),
+        "open_gold_packs": lambda: store.open_gold_packs(driver),
+    }
+    flows[name]()
+
+def measure_flow(driver, server, url, state, name):
+    """Loads a fresh copy of the fixture scenario and runs one flow against it."""
+    import locators
+    import tracing
+    from sbc_helpers import sbc_catalog
+    from utilities import run_stats, wait_for_element
+
+    server.state = copy.deepcopy(state)
+    driver.get(url)
+    wait_for_element(driver, *locators.NAV_BAR)
+    # The page load reset the SBCs, so the catalog from the previous flow no longer applies
+    sbc_catalog.__init__()
+
+    before = run_stats.copy()
+    start = time.perf_counter()
+    with tracing.span(f"benchmark.{name}") as flow_span:
+        run_flow(driver, name)
+    seconds = time.perf_counter() - start
+    fixture = driver.execute_script("return window.fixtureState();")
+    return {
+        "seconds": seconds,
+        "commands": flow_span.commands if flow_span else None,
+        "sbcs_completed": run_stats["sbcs_completed"] - before["sbcs_completed"],
+        "packs_opened": run_stats["packs_opened"] - before["packs_opened"],
+        "errors": run_stats["errors"] - before["errors"],
+        # What the fixture itself saw, to catch flows that report success without completing anything
+        "fixture_sbcs_completed": fixture["completed"],
+        "fixture_packs_opened": fixture["opened"],
+    }
+
+def summarise(runs):
+    """Medians of each metric over the runs of one flow."""
+    return {key: statistics.median(run[key] for run in runs) if runs[0][key] is not None else None for key in runs[0]}
+
+def load_results(reference, results_dir):
+    path = reference if os.path.isfile(reference) else os.path.join(results_dir, f"{reference}.json")
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def print_table(results, baseline=None):
+    print(f"{'Flow':<18} {'Seconds':>8} {'Cmds':>6} {'SBCs':>5} {'Packs':>6} {'Errors':>7}" + (f" {'vs base':>8}" if baseline else ""))
+    for name, flow in results["flows"].items():
+        line = (f"{name:<18} {flow['seconds']:>8.2f} {flow['commands'] if flow['commands'] is not None else '-':>6} "
+                f"{flow['sbcs_completed']:>5} {flow['packs_opened']:>6} {flow['errors']:>7}")
+        if baseline and name in baseline["flows"]:
+            previous = baseline["flows"][name]["seconds"]
+            line += f" {(flow['seconds'] - previous) / previous * 100 if previous else 0:>+7.1f}%"
+        print(line)
+
+def main(runs=3, latency=150, animate=200, compare=None):
+    import config
+    from fixtures.server import default_state, start_fixture_server
+
+    # Every flow starts from a fresh fixture, so the journal of earlier flows and runs must not be resumed from
+    config.JOURNAL = False
+
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        filename=os.path.join(config.LOG_DIR, f"benchmark_e2e_{time.strftime('%Y%m%d-%H%M%S')}.log"), filemode='w')
+
+    state = default_state(latency, animate)
+    server = start_fixture_server(state=state)
+    url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    driver = create_driver()
+    measurements = {name: [] for name in FLOWS}
+    try:
+        for _ in range(runs):
+            for name in FLOWS:
+                measurements[name].append(measure_flow(driver, server, url, state, name))
+    finally:
+        driver.quit()
+        server.shutdown()
+
+    results = {
+        "commit": git_commit(),
+        "profile": config.BROWSER_PROFILE,
+        "runs": runs,
+        "latency": latency,
+        "animate": animate,
+        "flows": {name: summarise(flow_runs) for name, flow_runs in measurements.items()},
+    }
+    os.makedirs(config.BENCHMARK_RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(config.BENCHMARK_RESULTS_DIR, f"{results['commit']}.json")
+    with open(results_path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    baseline = load_results(compare, config.BENCHMARK_RESULTS_DIR) if compare else None
+    if baseline:
+        print(f"Compared with {baseline['commit']}:")
+    print_table(results, baseline)
+    print(f"Saved results to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per flow; the median is reported.")
+    parser.add_argument("--latency", type=int, default=150, help="Milliseconds of click shield per navigation in the fixture.")
+    parser.add_argument("--animate", type=int, default=200, help="Milliseconds per view transition in the fixture.")
+    parser.add_argument("--profile", choices=["default", "performance"], help="Browser profile. Defaults to BROWSER_PROFILE.")
+    parser.add_argument("--compare", help="Commit (from BENCHMARK_RESULTS_DIR) or results file to compare with.")
+    args = parser.parse_args()
+    if args.profile:
+        # Set before config.py is first imported
+        os.environ["BROWSER_PROFILE"] = args.profile
+    main(args.runs, args.latency, args.animate, args.compare)
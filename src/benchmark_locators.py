@@ -0,0 +1,260 @@
+"""
+Measures what each locator in locators.py costs to evaluate, against saved DOM snapshots of the screens it is used on.
+
+A snapshot is the HTML of one screen, saved as LOCATOR_SNAPSHOT_DIR/<screen>.html. `--capture` drives the fixture
+web app (fixtures/) through every screen the flows visit and saves them. Snapshots of the real web app can be saved
+there too, under the same screen names (see the screens listed for each locator), and are measured the same way.
+
+Each snapshot is loaded in headless Chrome without its scripts, and every locator listed for that screen is
+evaluated in the page many times in a row, the way find_elements would. The table shows the microseconds per
+evaluation and the number of elements matched, and flags locators that match nothing, that match several
+elements where one is expected, or that fail to evaluate. The results are saved to
+BENCHMARK_RESULTS_DIR/locators_<git commit>.json.
+
+Usage:
+    python benchmark_locators.py [--capture] [--iterations 200] [--batches 5]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+from benchmark_e2e import create_driver, git_commit
+
+# The page as HTML, without the scripts that would otherwise re-render it when the snapshot is loaded
+SNAPSHOT_SCRIPT = """
+    var root = document.documentElement.cloneNode(true);
+    root.querySelectorAll('script').forEach(function (script) { script.remove(); });
+    return '<!DOCTYPE html>\\n' + root.outerHTML;
+"""
+
+# Evaluates each locator (from its context element, if any) once to count the matches, then iterations more
+# times to time it. Every match is collected, as find_elements does.
+MEASURE_SCRIPT = """
+    var locators = arguments[0];
+    var iterations = arguments[1];
+
+    function evaluate(locator, root) {
+        if (locator.by === 'css selector') {
+            return Array.from(root.querySelectorAll(locator.value));
+        }
+        var result = document.evaluate(locator.value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var nodes = [];
+        for (var i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+        return nodes;
+    }
+
+    return locators.map(function (locator) {
+        try {
+            var root = document;
+            for (var i = 0; i < locator.contexts.length; i++) {
+                root = evaluate(locator.contexts[i], root)[0];
+                if (!root) { return {matches: 0, micros: null, error: 'context not found'}; }
+            }
+            var matches = evaluate(locator, root).length;
+            var start = performance.now();
+            for (var j = 0; j < iterations; j++) { evaluate(locator, root); }
+            return {matches: matches, micros: (performance.now() - start) * 1000 / iterations, error: null};
+        } catch (e) {
+            return {matches: 0, micros: null, error: String(e.message || e)};
+        }
+    });
+"""
+
+def save_snapshot(driver, snapshot_dir, screen):
+    """Saves the current page as snapshot_dir/<screen>.html once the web app is idle."""
+    from utilities import ui_idle, wait_until
+
+    wait_until(driver, ui_idle())
+    path = os.path.join(snapshot_dir, f"{screen}.html")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(driver.execute_script(SNAPSHOT_SCRIPT))
+    print(f"Saved {path}")
+
+def capture_snapshots(driver, snapshot_dir):
+    """Drives the fixture web app through the screens the flows visit and saves a snapshot of each."""
+    import locators
+    from fixtures.server import default_state, start_fixture_server
+    from sbc_helpers import (SquadSnapshot, build_squad, click_add_player_button, click_first_add_player, click_search_button,
+                             hide_sbc_requirements_popover, navigate_to_sbc, open_daily_upgrade, select_position,
+                             select_upgrades_menu, submit_squad, use_squad_builder)
+    from store import (click_ellipsis_button, click_ellipsis_button_on_duplicates_screen, click_on_packs, click_store_all_in_club,
+                       confirm_swap_items, find_pack_element, navigate_to_store, quick_sell_duplicates,
+                       select_swap_in_all_tradeable_button)
+    from utilities import (add_player_button_ready, search_filters_ready, search_results_populated, squad_ready, ui_idle,
+                           wait_for_element, wait_until)
+
+    state = default_state(latency=50, animate=0)
+    # A pack with both kinds of duplicates, so that every duplicates screen is shown
+    state["packs"].insert(0, {"name": "Snapshot Pack", "tradeableDuplicates": True, "untradeableDuplicates": True})
+    server = start_fixture_server(state=state)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    try:
+        driver.get(f"http://127.0.0.1:{server.server_address[1]}/index.html")
+        wait_for_element(driver, *locators.NAV_BAR)
+        save_snapshot(driver, snapshot_dir, "home")
+
+        navigate_to_sbc(driver)
+        wait_for_element(driver, *locators.SBC_MENU)
+        save_snapshot(driver, snapshot_dir, "sbc_hub")
+        select_upgrades_menu(driver)
+        wait_for_element(driver, *locators.SBC_TILE)
+        save_snapshot(driver, snapshot_dir, "upgrades")
+
+        open_daily_upgrade(driver, "Gold Upgrade")
+        wait_until(driver, squad_ready())
+        save_snapshot(driver, snapshot_dir, "squad")
+        hide_sbc_requirements_popover(driver, SquadSnapshot.read(driver))
+        select_position(driver, index=1)
+        wait_until(driver, add_player_button_ready())
+        save_snapshot(driver, snapshot_dir, "slot_selected")
+        click_add_player_button(driver)
+        wait_until(driver, search_filters_ready())
+        save_snapshot(driver, snapshot_dir, "search_filters")
+        click_search_button(driver)
+        wait_until(driver, search_results_populated())
+        save_snapshot(driver, snapshot_dir, "search_results")
+        click_first_add_player(driver)
+        wait_until(driver, squad_ready())
+        use_squad_builder(driver)
+        wait_until(driver, search_filters_ready())
+        save_snapshot(driver, snapshot_dir, "squad_builder")
+        build_squad(driver)
+        wait_until(driver, squad_ready())
+        submit_squad(driver)
+        wait_for_element(driver, *locators.CLAIM_REWARDS_BUTTON)
+        save_snapshot(driver, snapshot_dir, "rewards")
+
+        navigate_to_store(driver)
+        wait_for_element(driver, *locators.PACKS_TILE)
+        save_snapshot(driver, snapshot_dir, "store_home")
+        click_on_packs(driver)
+        wait_for_element(driver, *locators.PACK_TITLE)
+        save_snapshot(driver, snapshot_dir, "packs")
+        find_pack_element(driver, "Snapshot Pack").find_element(*locators.CLAIM_PACK_BUTTON).click()
+        wait_for_element(driver, *locators.UNASSIGNED_ELLIPSIS_BUTTON)
+        save_snapshot(driver, snapshot_dir, "unassigned")
+        click_ellipsis_button(driver)
+        wait_for_element(driver, *locators.STORE_ALL_BUTTON)
+        save_snapshot(driver, snapshot_dir, "unassigned_actions")
+        click_store_all_in_club(driver)
+        wait_for_element(driver, *locators.DUPLICATES_HEADER)
+        save_snapshot(driver, snapshot_dir, "duplicates")
+        click_ellipsis_button_on_duplicates_screen(driver)
+        wait_for_element(driver, *locators.SWAP_TRADEABLE_BUTTON)
+        save_snapshot(driver, snapshot_dir, "duplicate_actions")
+        select_swap_in_all_tradeable_button(driver)
+        wait_for_element(driver, *locators.CONFIRM_SWAP_BUTTON)
+        save_snapshot(driver, snapshot_dir, "swap_confirmation")
+        confirm_swap_items(driver)
+        wait_until(driver, ui_idle())
+        # Only the untradeable duplicates (with the swapped out club copies) are left
+        click_ellipsis_button_on_duplicates_screen(driver)
+        wait_for_element(driver, *locators.SBC_STORAGE_BUTTON)
+        save_snapshot(driver, snapshot_dir, "untradeable_duplicate_actions")
+        quick_sell_duplicates(driver)
+        wait_for_element(driver, *locators.CONFIRM_QUICK_SELL_BUTTON)
+        save_snapshot(driver, snapshot_dir, "quick_sell_confirmation")
+    finally:
+        server.shutdown()
+
+def locators_by_screen():
+    """The locators to measure on each screen, filled in with their sample values, by screen and then locator name."""
+    import locators
+
+    screens = {}
+    for name, locator in locators.registry().items():
+        for screen in locator.screens:
+            screens.setdefault(screen, {})[name] = locator.sample()
+    return screens
+
+def contexts(locator):
+    """The chain of elements locator is evaluated in, outermost first, as dicts for MEASURE_SCRIPT."""
+    chain = []
+    context = locator.context
+    while context is not None:
+        chain.insert(0, {"by": context.by, "value": context.sample().value})
+        context = context.context
+    return chain
+
+def measure_screen(driver, path, screen_locators, iterations, batches):
+    """Loads the snapshot at path and measures each locator. The time per evaluation is the median over the batches."""
+    driver.get("file://" + os.path.abspath(path))
+    names = list(screen_locators)
+    payload = [{"by": locator.by, "value": locator.value, "contexts": contexts(locator)} for locator in screen_locators.values()]
+    runs = [driver.execute_script(MEASURE_SCRIPT, payload, iterations) for _ in range(batches)]
+    results = {}
+    for index, name in enumerate(names):
+        locator = screen_locators[name]
+        first = runs[0][index]
+        times = [run[index]["micros"] for run in runs if run[index]["micros"] is not None]
+        if first["error"]:
+            flag = f"error: {first['error']}"
+        elif first["matches"] == 0:
+            flag = "missing"
+        elif locator.unique and first["matches"] > 1:
+            flag = "ambiguous"
+        else:
+            flag = ""
+        results[name] = {
+            "by": locator.by,
+            "value": locator.value,
+            "matches": first["matches"],
+            "micros": statistics.median(times) if times else None,
+            "flag": flag,
+        }
+    return results
+
+def print_table(results):
+    print(f"{'Screen':<24} {'Locator':<28} {'By':<5} {'Matches':>7} {'us/eval':>8}  Flag")
+    for screen, screen_results in results["screens"].items():
+        ordered = sorted(screen_results.items(), key=lambda item: -(item[1]["micros"] or 0))
+        for name, result in ordered:
+            by = "css" if result["by"] == "css selector" else "xpath"
+            micros = f"{result['micros']:.1f}" if result["micros"] is not None else "-"
+            print(f"{screen:<24} {name:<28} {by:<5} {result['matches']:>7} {micros:>8}  {result['flag']}")
+
+def main(capture=False, iterations=200, batches=5):
+    import config
+
+    # Capturing submits an SBC and opens a pack in the fixture, which must not end up in the run journal
+    config.JOURNAL = False
+
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        filename=os.path.join(config.LOG_DIR, f"benchmark_locators_{time.strftime('%Y%m%d-%H%M%S')}.log"), filemode='w')
+
+    driver = create_driver()
+    measured = {}
+    try:
+        if capture:
+            capture_snapshots(driver, config.LOCATOR_SNAPSHOT_DIR)
+        for screen, screen_locators in locators_by_screen().items():
+            path = os.path.join(config.LOCATOR_SNAPSHOT_DIR, f"{screen}.html")
+            if not os.path.isfile(path):
+                print(f"No snapshot of '{screen}', skipping {len(screen_locators)} locators. Run with --capture to save one.")
+                continue
+            measured[screen] = measure_screen(driver, path, screen_locators, iterations, batches)
+    finally:
+        driver.quit()
+
+    results = {"commit": git_commit(), "iterations": iterations, "batches": batches, "screens": measured}
+    os.makedirs(config.BENCHMARK_RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(config.BENCHMARK_RESULTS_DIR, f"locators_{results['commit']}.json")
+    with open(results_path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    print_table(results)
+    flagged = sum(1 for screen_results in measured.values() for result in screen_results.values() if result["flag"])
+    print(f"{flagged} locators flagged. Saved results to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capture", action="store_true", help="Save snapshots of the fixture web app's screens first.")
+    parser.add_argument("--iterations", type=int, default=200, help="Evaluations of each locator per batch.")
+    parser.add_argument("--batches", type=int, default=5, help="Batches per locator; the median is reported.")
+    args = parser.parse_args()
+    main(args.capture, args.iterations, args.batches)
@@ -0,0 +1,43 @@
+"""
+Compares the time per SBC and per pack of the "default" and "performance" browser profiles.
+
+Each profile runs the flows enabled in .env once, in a fresh process so that config.py picks up its
+BROWSER_PROFILE. Note that this runs against the live web app: every run completes real SBCs and opens real
+packs, so enable only flows that still have repeats or packs left for both runs.
+
+Usage:
+    python benchmark_profiles.py [profile ...]
+"""
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+PROFILES = ["default", "performance"]
+
+def run_profile(profile):
+    os.environ["BROWSER_PROFILE"] = profile
+    import main
+    return main.main()
+
+def per_unit(seconds, count):
+    return f"{seconds / count:.1f}" if count else "-"
+
+def main(profiles):
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for profile in profiles:
+        # One process per profile, one after the other, so the runs don't compete for the machine
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[profile] = executor.submit(run_profile, profile).result()
+
+    print(f"{'Profile':<12} {'Startup (s)':>11} {'SBCs':>5} {'s/SBC':>7} {'Packs':>6} {'s/pack':>7}")
+    for profile, stats in results.items():
+        sbcs = stats.get("sbcs_completed", 0)
+        packs = stats.get("packs_opened", 0)
+        print(f"{profile:<12} {stats.get('startup_seconds', 0):>11.1f} {sbcs:>5} "
+              f"{per_unit(stats.get('sbc_seconds', 0), sbcs):>7} {packs:>6} {per_unit(stats.get('pack_seconds', 0), packs):>7}")
+    return results
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or PROFILES)
@@ -0,0 +1,98 @@
+"""
+Benchmarks the squad solver (solver.py) on synthetic clubs, without a browser.
+
+Each club is a random mix of bronze, silver and gold players, common and rare, in the club and in SBC storage,
+solved against a random SBC-like requirement set (player count, quality, rare count and squad rating floor).
+For each mode the table shows the clubs solved per second, how many had no valid squad, and for the greedy
+mode how much more its squads cost than the exact ones. The results are saved to
+BENCHMARK_RESULTS_DIR/solver_<git commit>.json.
+
+Usage:
+    python benchmark_solver.py [--clubs 2000] [--club-size 300] [--seed 1]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import time
+
+import solver
+from benchmark_e2e import git_commit
+from ratings import quality_for_rating
+
+def synthetic_club(rng, size):
+    """size random club index rows."""
+    players = []
+    for player_id in range(size):
+        rating = min(int(rng.triangular(45, 90, 62)), 99)
+        players.append({
+            "id": player_id,
+            "rating": rating,
+            "quality": quality_for_rating(rating),
+            "rarity": rng.choices(("Common", "Rare", "Special"), (70, 27, 3))[0],
+            "location": rng.choices(("club", "sbc_storage"), (80, 20))[0],
+            "untradeable": rng.random() < 0.7,
+        })
+    return players
+
+def synthetic_requirements(rng):
+    """Requirements like those of the upgrade SBCs: a few to 11 players of one quality, with a rare count and a rating floor."""
+    players = rng.choice((1, 3, 5, 11))
+    quality = rng.choice(("Bronze", "Silver", "Gold"))
+    floor = {"Bronze": 55, "Silver": 68, "Gold": 78}[quality] if rng.random() < 0.5 else None
+    fixed = tuple(rng.randint(50, 80) for _ in range(11 - players))
+    return solver.Requirements(players, quality, quality, rng.randint(0, min(players, 3)), None, floor, fixed)
+
+def run(mode, cases):
+    solutions = []
+    start = time.perf_counter()
+    for requirements, club in cases:
+        solutions.append(solver.solve(requirements, club, mode))
+    return solutions, time.perf_counter() - start
+
+def main(clubs=2000, club_size=300, seed=1):
+    import config
+
+    # A squad stopped by the node limit is counted in the table rather than logged
+    logging.disable(logging.WARNING)
+    rng = random.Random(seed)
+    cases = [(synthetic_requirements(rng), synthetic_club(rng, club_size)) for _ in range(clubs)]
+    results = {"commit": git_commit(), "clubs": clubs, "club_size": club_size, "seed": seed, "modes": {}}
+    solved = {}
+    for mode in ("greedy", "exact"):
+        solutions, seconds = run(mode, cases)
+        solved[mode] = solutions
+        results["modes"][mode] = {
+            "seconds": seconds,
+            "clubs_per_second": clubs / seconds if seconds else None,
+            "unsolved": sum(1 for solution in solutions if solution is None),
+            "node_limit_hit": sum(1 for solution in solutions if solution is not None and not solution.exact) if mode == "exact" else 0,
+        }
+
+    # How much more the greedy squads cost, over the clubs both modes solved
+    pairs = [(greedy.cost, exact.cost) for greedy, exact in zip(solved["greedy"], solved["exact"]) if greedy and exact]
+    results["modes"]["greedy"]["cost_over_exact"] = sum(greedy - exact for greedy, exact in pairs) / len(pairs) if pairs else None
+    results["modes"]["greedy"]["optimal_share"] = sum(1 for greedy, exact in pairs if greedy <= exact) / len(pairs) if pairs else None
+
+    print(f"{clubs} synthetic clubs of {club_size} players")
+    print(f"{'Mode':<7} {'Clubs/s':>9} {'Unsolved':>9} {'Limit hit':>10} {'Cost over exact':>16} {'Optimal':>8}")
+    for mode, result in results["modes"].items():
+        over = f"{result['cost_over_exact']:.2f}" if result.get("cost_over_exact") is not None else "-"
+        optimal = f"{result['optimal_share']:.0%}" if result.get("optimal_share") is not None else "-"
+        print(f"{mode:<7} {result['clubs_per_second']:>9.0f} {result['unsolved']:>9} {result['node_limit_hit']:>10} {over:>16} {optimal:>8}")
+
+    os.makedirs(config.BENCHMARK_RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(config.BENCHMARK_RESULTS_DIR, f"solver_{results['commit']}.json")
+    with open(results_path, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Saved results to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clubs", type=int, default=2000, help="Synthetic clubs to solve in each mode.")
+    parser.add_argument("--club-size", type=int, default=300, help="Players per club.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.clubs, args.club_size, args.seed)
@@ -0,0 +1,152 @@
+"""
+Captures what led up to a failure, without slowing down the steps that don't fail.
+
+Every step (see utilities.retry_step) records a lightweight state capture in a ring of the last CAPTURE_RING_SIZE:
+the URL, a compact summary of the screen (its title, any dialog, the click shield and popover, the element count)
+and when it was taken. One script call collects it.
+
+When a flow catches an error (utilities.take_screenshot), the automation thread only asks the browser for the
+screenshot. Decoding it and writing the bundle happen on a background thread: one zip in SCREENSHOTS_DIR holding
+the screenshot, the ring and the error. The oldest bundles are deleted once the folder grows past
+CAPTURE_MAX_MB. If the writer falls behind, a bundle is dropped rather than making the flow wait.
+"""
+import base64
+import collections
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import zipfile
+
+import config
+
+STATE_SCRIPT = """
+    var title = document.querySelector('.ut-navigation-bar-view h1, h1.title');
+    var dialog = document.querySelector('section.ea-dialog-view');
+    var tab = document.querySelector('nav.ut-tab-bar .selected');
+    return {
+        url: location.href,
+        screen: title ? title.textContent.trim() : '',
+        dialog: dialog ? dialog.textContent.trim().replace(/\\s+/g, ' ').slice(0, 160) : null,
+        tab: tab ? tab.className : null,
+        shield: !!document.querySelector('.ut-click-shield.showing'),
+        popover: !!document.querySelector('div.ut-popover.show'),
+        elements: document.getElementsByTagName('*').length
+    };
+"""
+
+# Bundles waiting for the writer. Past this many, new ones are dropped.
+QUEUE_SIZE = 8
+
+class FailureCapture:
+    """
+    The ring of recent state captures, and the background writer of failure bundles.
+
+    Attributes:
+        stats (Counter): "states", "bundles", "dropped" and "pruned" counts, and the "bytes" written.
+    """
+    def __init__(self):
+        self.ring = collections.deque(maxlen=config.CAPTURE_RING_SIZE)
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.writer = None
+        self.stats = collections.Counter()
+        self.lock = threading.Lock()
+
+    def record(self, driver, step):
+        """Adds the page's current state to the ring. A browser that can't answer is noted rather than raised."""
+        if not config.CAPTURE_STATES:
+            return
+        entry = {"time": time.time(), "step": step, "thread": threading.current_thread().name}
+        try:
+            entry.update(driver.execute_script(STATE_SCRIPT) or {})
+        except Exception as e:
+            entry["unavailable"] = type(e).__name__
+        self.ring.append(entry)
+        self.stats["states"] += 1
+
+    def failure(self, driver, name="error"):
+        """
+        Queues a bundle of the screenshot, the ring and the error being handled, and returns at once. Called from
+        an except block, the error is the exception being handled.
+        """
+        self.record(driver, f"failure:{name}")
+        error = traceback.format_exc() if sys.exc_info()[0] is not None else None
+        try:
+            screenshot = driver.get_screenshot_as_base64()
+        except Exception as e:
+            logging.warning(f"Couldn't take the failure screenshot: {type(e).__name__}")
+            screenshot = None
+        bundle = {"name": name, "time": time.time(), "states": list(self.ring), "error": error, "screenshot": screenshot}
+        self._start_writer()
+        try:
+            self.queue.put_nowait(bundle)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logging.warning(f"The failure capture writer is behind, dropped the '{name}' bundle.")
+
+    def _start_writer(self):
+        with self.lock:
+            if self.writer is None or not self.writer.is_alive():
+                self.writer = threading.Thread(target=self._write_loop, name="failure-capture", daemon=True)
+                self.writer.start()
+
+    def _write_loop(self):
+        while True:
+            bundle = self.queue.get()
+            try:
+                self._write(bundle)
+            except Exception:
+                logging.exception("Writing a failure bundle failed.")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, bundle):
+        os.makedirs(config.SCREENSHOTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(bundle["time"])) + f"-{int(bundle['time'] * 1000) % 1000:03d}"
+        path = os.path.join(config.SCREENSHOTS_DIR, f"failure_{stamp}_{bundle['name']}.zip")
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            if bundle["screenshot"]:
+                # PNG is compressed already
+                archive.writestr("screenshot.png", base64.b64decode(bundle["screenshot"]), compress_type=zipfile.ZIP_STORED)
+            archive.writestr("states.json", json.dumps(bundle["states"], indent=1))
+            if bundle["error"]:
+                archive.writestr("error.txt", bundle["error"])
+        self.stats["bundles"] += 1
+        self.stats["bytes"] += os.path.getsize(path)
+        logging.info(f"Saved failure bundle {path} ({len(bundle['states'])} states).")
+        self._prune()
+
+    def _prune(self):
+        """Deletes the oldest bundles (and screenshots of older runs) until SCREENSHOTS_DIR fits in CAPTURE_MAX_MB."""
+        files = []
+        for name in os.listdir(config.SCREENSHOTS_DIR):
+            if name.startswith(("failure_", "error_")):
+                path = os.path.join(config.SCREENSHOTS_DIR, name)
+                files.append((os.path.getmtime(path), os.path.getsize(path), path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        # Always keep the newest bundle, whatever its size
+        while len(files) > 1 and total > config.CAPTURE_MAX_MB * 1024 * 1024:
+            _, size, path = files.pop(0)
+            os.remove(path)
+            total -= size
+            self.stats["pruned"] += 1
+
+    def flush(self, timeout=None):
+        """Waits (up to timeout seconds) for the queued bundles to be written."""
+        deadline = time.monotonic() + (timeout if timeout is not None else config.DEFAULT_WAIT_DURATION)
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def report(self):
+        """Writes out the queued bundles, then logs what was captured."""
+        self.flush()
+        logging.info(f"Failure capture: {self.stats['states']} states recorded, {self.stats['bundles']} bundles written "
+                     f"({self.stats['bytes'] / 1024:.0f}KB), {self.stats['dropped']} dropped, {self.stats['pruned']} old files pruned.")
+
+# Shared by every flow (and every tab) for the duration of the run
+failure_capture = FailureCapture()
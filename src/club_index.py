@@ -0,0 +1,281 @@
+"""
+A local index of the players in the club and in SBC storage, kept in SQLite so that the flows can check what is
+available without running an in-game search.
+
+The index is built by a full crawl of the club and SBC storage through the API (config.USE_API), repeated only
+once the last crawl is older than CLUB_INDEX_MAX_AGE_HOURS. In between, the flows keep it up to date:
+    - The items of each pack opened are added once they are stored, and duplicates are moved where they were routed.
+    - The players added to a squad are reserved by slot, and removed when the squad is submitted.
+
+Squad fills query it (see can_fill) to skip a search that can't find a player, or to search the other location.
+
+Usage:
+    python club_index.py [--crawl]    Prints what the index holds and how long a query takes.
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+import time
+
+import config
+from ratings import quality_for_rating
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS players (
+        id INTEGER PRIMARY KEY,
+        asset_id INTEGER,
+        name TEXT,
+        rating INTEGER,
+        quality TEXT,
+        rarity TEXT,
+        position TEXT,
+        untradeable INTEGER,
+        location TEXT
+    );
+    CREATE INDEX IF NOT EXISTS players_lookup ON players (location, quality, rarity, rating);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+COLUMNS = ("id", "asset_id", "name", "rating", "quality", "rarity", "position", "untradeable", "location")
+
+# Where an indexed player is, and the search filter value that finds it there
+LOCATIONS = {"club": "My Club", "sbc_storage": "SBC Storage"}
+
+def rarity_for_flag(rareflag):
+    # Special cards (rareflag above 1) don't match the search's "Rare" rarity filter
+    return {0: "Common", 1: "Rare"}.get(rareflag, "Special")
+
+def player_row(item, location):
+    """The index row for one of the API's item dicts, or None if the item isn't a player."""
+    if item.get("itemType", "player") != "player" or not item.get("rating"):
+        return None
+    return {
+        "id": item["id"],
+        "asset_id": item.get("assetId"),
+        "name": item.get("name") or item.get("lastName") or str(item.get("assetId")),
+        "rating": item["rating"],
+        "quality": quality_for_rating(item["rating"]),
+        "rarity": rarity_for_flag(item.get("rareflag", 0)),
+        "position": item.get("preferredPosition"),
+        "untradeable": int(bool(item.get("untradeable"))),
+        "location": location,
+    }
+
+class ClubIndex:
+    """
+    The club and SBC storage, by player, in the SQLite database at path.
+
+    Attributes:
+        reserved (dict): The player id added to each slot of the open squad, by slot index.
+        picked (dict): The player (as a dict) the solver picked for each slot of the open squad, by slot index.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.connection = None
+        # The orchestrator's SBC and pack flows update the index from different threads
+        self.lock = threading.RLock()
+        self.reserved = {}
+        self.picked = {}
+
+    def _connect(self):
+        if self.connection is None:
+            self.path = self.path or config.CLUB_INDEX_FILE
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def _meta(self, key):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def crawled_at(self):
+        with self.lock:
+            value = self._meta("crawled_at")
+        return float(value) if value else None
+
+    @property
+    def ready(self):
+        """True if the index is enabled and was crawled recently enough to be trusted."""
+        crawled_at = self.crawled_at if config.CLUB_INDEX else None
+        return crawled_at is not None and time.time() - crawled_at < config.CLUB_INDEX_MAX_AGE_HOURS * 3600
+
+    def refresh(self, driver):
+        """Crawls the club and SBC storage if the index isn't ready. The crawl needs the API (config.USE_API)."""
+        if not config.CLUB_INDEX or self.ready:
+            return
+        if not config.USE_API:
+            logging.warning("The club index can only be crawled with USE_API=True, so it won't be used this run.")
+            return
+        from api import get_client
+
+        self.crawl(get_client(driver))
+
+    def crawl(self, client):
+        """Replaces the index with a full read of the club and SBC storage."""
+        start = time.monotonic()
+        rows = []
+        seen = set()
+        page_start = 0
+        while True:
+            page = client.club_players(page_start, config.CLUB_INDEX_PAGE_SIZE)
+            # A page with nothing new means the search has run out (or is serving the same page again)
+            new = [item for item in page if item.get("id") not in seen]
+            seen.update(item.get("id") for item in new)
+            rows += [row for row in (player_row(item, "club") for item in new) if row]
+            if len(page) < config.CLUB_INDEX_PAGE_SIZE or not new:
+                break
+            page_start += len(page)
+        rows += [row for row in (player_row(item, "sbc_storage") for item in client.sbc_storage()) if row]
+
+        with self.lock, self._connect() as connection:
+            connection.execute("DELETE FROM players")
+            self._upsert(connection, rows)
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('crawled_at', ?)", (str(time.time()),))
+        self.reserved.clear()
+        self.picked.clear()
+        logging.info(f"Crawled {len(rows)} players into the club index in {time.monotonic() - start:.1f}s.")
+
+    def _upsert(self, connection, rows):
+        connection.executemany(f"INSERT OR REPLACE INTO players ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                               [tuple(row[column] for column in COLUMNS) for row in rows])
+
+    def add(self, items, location):
+        """Adds (or moves) the players among the API's item dicts to location."""
+        rows = [row for row in (player_row(item, location) for item in items) if row]
+        with self.lock, self._connect() as connection:
+            self._upsert(connection, rows)
+        return len(rows)
+
+    def remove(self, ids):
+        ids = list(ids)
+        with self.lock, self._connect() as connection:
+            connection.executemany("DELETE FROM players WHERE id = ?", [(player_id,) for player_id in ids])
+        return len(ids)
+
+    def find(self, quality=None, rarity=None, location=None, rating=None, exclude=(), limit=None):
+        """
+        Returns the matching players as dicts, lowest rating first. A filter left as None matches anything.
+
+        Args:
+            quality (str): e.g. "Gold".
+            rarity (str): "Common", "Rare" or "Special".
+            location (str): "club" or "sbc_storage".
+            rating (int): An exact rating.
+            exclude (iterable): Player ids to leave out, e.g. those reserved for the open squad.
+            limit (int): The most players to return.
+        """
+        conditions, values = [], []
+        for column, value in (("quality", quality), ("rarity", rarity), ("location", location), ("rating", rating)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        exclude = list(exclude)
+        if exclude:
+            conditions.append(f"id NOT IN ({', '.join('?' * len(exclude))})")
+            values += exclude
+        query = f"SELECT {', '.join(COLUMNS)} FROM players"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY rating, id"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        with self.lock:
+            return [dict(zip(COLUMNS, row)) for row in self._connect().execute(query, values)]
+
+    def count(self, quality=None, rarity=None, location=None, exclude=()):
+        return len(self.find(quality, rarity, location, exclude=exclude))
+
+    def can_fill(self, plan, location):
+        """
+        Checks the index for enough unreserved players to fill plan, a list of (index, quality, rarity) tuples.
+
+        Returns:
+            str: The location to search ("club" or "sbc_storage"): location if it has every player the plan
+                needs, else the other one if it does. None if neither does.
+        """
+        needed = {}
+        for _, quality, rarity in plan:
+            needed[(quality, rarity)] = needed.get((quality, rarity), 0) + 1
+        reserved = self.reserved.values()
+        for candidate in (location, *(other for other in LOCATIONS if other != location)):
+            if all(self.count(quality, rarity, candidate, reserved) >= count for (quality, rarity), count in needed.items()):
+                return candidate
+        return None
+
+    def reserve_squad(self, snapshot, plan, location):
+        """
+        Reserves an indexed player for each planned slot that was filled, matched on the slot's rating (preferring
+        location), so they can be removed once the squad is submitted.
+        """
+        for index, quality, rarity in plan:
+            slot = snapshot.slots.get(index)
+            if slot is None or not slot.filled or not str(slot.rating).isdigit():
+                continue
+            self.reserved.pop(index, None)
+            for candidate in (location, *(other for other in LOCATIONS if other != location)):
+                matches = self.find(quality, rarity, candidate, int(slot.rating), exclude=self.reserved.values(), limit=1)
+                if matches:
+                    self.reserved[index] = matches[0]["id"]
+                    break
+        logging.info(f"Reserved players {self.reserved} for the squad.")
+
+    def squad_submitted(self):
+        """Removes the players reserved for the submitted squad: an SBC consumes them."""
+        if self.reserved:
+            self.remove(self.reserved.values())
+            logging.info(f"Removed {len(self.reserved)} submitted players from the club index.")
+        self.reserved.clear()
+
+    def pack_stored(self, items, routed, client):
+        """
+        Updates the index once a pack's items (read from Unassigned before storing them) were stored and its
+        duplicates routed (see store.route_duplicates).
+        """
+        duplicates = [item for item in items if item.get("duplicateId")]
+        added = self.add([item for item in items if not item.get("duplicateId")], "club")
+        if routed.get("club"):
+            # Swapping a tradeable duplicate in sends the untradeable club copy to Unassigned, to be routed in turn
+            club = {row["id"]: row for row in self.find(location="club")}
+            swapped = [item for item in duplicates if not item.get("untradeable") and club.get(item["duplicateId"], {}).get("untradeable")]
+            self.remove(item["duplicateId"] for item in swapped)
+            added += self.add(swapped, "club")
+        if routed.get("sbc_storage"):
+            storage = client.sbc_storage()
+            with self.lock, self._connect() as connection:
+                connection.execute("DELETE FROM players WHERE location = 'sbc_storage'")
+                self._upsert(connection, [row for row in (player_row(item, "sbc_storage") for item in storage) if row])
+        logging.info(f"Added {added} players from the pack to the club index.")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+# Shared by every flow for the duration of the run
+club_index = ClubIndex()
+
+def main(crawl=False):
+    if crawl:
+        from api import ApiClient, load_session
+
+        club_index.crawl(ApiClient.from_session(load_session()))
+    crawled_at = club_index.crawled_at
+    print(f"Club index {config.CLUB_INDEX_FILE}, crawled {time.ctime(crawled_at) if crawled_at else 'never'}.")
+    for location in LOCATIONS:
+        for quality in ("Bronze", "Silver", "Gold"):
+            counts = {rarity: club_index.count(quality, rarity, location) for rarity in ("Common", "Rare", "Special")}
+            print(f"{location:<12} {quality:<7} " + " ".join(f"{rarity} {count:>4}" for rarity, count in counts.items()))
+    iterations = 1000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        club_index.find("Gold", "Common", "sbc_storage", limit=1)
+    print(f"Lowest rated Gold Common player in SBC storage: {(time.perf_counter() - start) / iterations * 1e6:.0f}us per query.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crawl", action="store_true", help="Crawl the club and SBC storage first, with the saved API session.")
+    args = parser.parse_args()
+    main(args.crawl)
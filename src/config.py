@@ -11,6 +11,33 @@ PASSWORD = os.getenv("PASSWORD")
 DEFAULT_WAIT_DURATION = int(os.getenv("DEFAULT_WAIT_DURATION", 10))
 LONGER_WAIT_DURATION = int(os.getenv("LONGER_WAIT_DURATION", DEFAULT_WAIT_DURATION + 15))
 COOKIES_FILE = os.getenv("COOKIES_FILE", "cookies.json")
+# A persistent Chrome profile keeps the web app's cache, storage and cookies between runs. Set it empty for a fresh profile each run.
+CHROME_USER_DATA_DIR = os.getenv("CHROME_USER_DATA_DIR", "chrome-profile")
+DRIVER_CACHE_FILE = os.getenv("DRIVER_CACHE_FILE", "chromedriver_cache.json")
+# "default" runs a normal Chrome window, "performance" runs headless without images, fonts, media or animations
+BROWSER_PROFILE = os.getenv("BROWSER_PROFILE", "default").lower()
+BROWSER_WINDOW_SIZE = os.getenv("BROWSER_WINDOW_SIZE", "1600,1000")
+# In the performance profile, how long to wait for an element to become clickable before clicking it with a script
+IMAGE_FALLBACK_WAIT = float(os.getenv("IMAGE_FALLBACK_WAIT", 2))
+LOG_DIR = os.getenv("LOG_DIR", ".")
+# Structured logging (run_log.py): JSONL records in LOG_DIR/LOG_FILE, rotated past LOG_MAX_MB into LOG_BACKUPS files.
+# LOG_LEVELS sets levels per module on top of LOG_LEVEL, e.g. "sbc_helpers=WARNING,store=DEBUG".
+LOG_FILE = os.getenv("LOG_FILE", "run_log.jsonl")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_MAX_MB = float(os.getenv("LOG_MAX_MB", 20))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", 5))
+# Also write the plain text log (main_<timestamp>.log)
+LOG_TEXT = os.getenv("LOG_TEXT", "true").lower() in ("true", "1", "t")
+# Set by runner.py for each account, and added to its log records
+ACCOUNT_NAME = os.getenv("ACCOUNT_NAME")
+SCREENSHOTS_DIR = os.getenv("SCREENSHOTS_DIR", "screenshots")
+# Failure capture (capture.py): the last CAPTURE_RING_SIZE page states are kept in memory and saved with the screenshot
+# when a flow catches an error. Bundles are deleted oldest first once SCREENSHOTS_DIR grows past CAPTURE_MAX_MB.
+CAPTURE_STATES = os.getenv("CAPTURE_STATES", "true").lower() in ("true", "1", "t")
+CAPTURE_RING_SIZE = int(os.getenv("CAPTURE_RING_SIZE", 50))
+CAPTURE_MAX_MB = float(os.getenv("CAPTURE_MAX_MB", 200))
+TRACING = os.getenv("TRACING", "true").lower() in ("true", "1", "t")
 DAILY_SIMPLE_BRONZE_SBC_NAMES = os.getenv("DAILY_SIMPLE_BRONZE_SBC_NAMES", "Daily Bronze Upgrade").split(',')
 DAILY_SIMPLE_SILVER_SBC_NAMES = os.getenv("DAILY_SIMPLE_SILVER_SBC_NAMES", "Daily Silver Upgrade").split(',')
 PACK_NAMES = os.getenv("PACK_NAMES", "BRONZE PLAYERS PREMIUM,SMALL BRONZE PLAYERS,SILVER PLAYERS PREMIUM,Small Silver Players Pack,Super Bronze Pack").split(',')
@@ -27,4 +54,90 @@ SPECIAL_UPGRADE_COUNT = int(os.getenv("SPECIAL_UPGRADE_COUNT", 1))
 SPECIAL_UPGRADE_RARE_COUNT = int(os.getenv("SPECIAL_UPGRADE_RARE_COUNT", 1))
 SPECIAL_UPGRADE_USE_SBC_STORAGE = os.getenv("SPECIAL_UPGRADE_USE_SBC_STORAGE", "false").lower() in ("true", "1", "t")
 SPECIAL_CRAFTING_UPGRADE = os.getenv("SPECIAL_CRAFTING_UPGRADE", "false").lower() in ("true", "1", "t")
-SPECIAL_CRAFTING_UPGRADE_USE_SBC_STORAGE = os.getenv("SPECIAL_CRAFTING_UPGRADE_USE_SBC_STORAGE", "false").lower() in ("true", "1", "t")
\ No newline at end of file
+SPECIAL_CRAFTING_UPGRADE_USE_SBC_STORAGE = os.getenv("SPECIAL_CRAFTING_UPGRADE_USE_SBC_STORAGE", "false").lower() in ("true", "1", "t")
+
+# How squads are filled (see sbc.fill_squad): "builder" (in-game Squad Builder, then refill what it got wrong),
+# "refill" (fill empty or wrong slots one at a time) or "per_slot" (fill empty slots one at a time)
+SQUAD_FILL_STRATEGY = os.getenv("SQUAD_FILL_STRATEGY", "per_slot").lower()
+GOLD_UPGRADE_FILL_STRATEGY = os.getenv("GOLD_UPGRADE_FILL_STRATEGY", SQUAD_FILL_STRATEGY).lower()
+SPECIAL_UPGRADE_FILL_STRATEGY = os.getenv("SPECIAL_UPGRADE_FILL_STRATEGY", SQUAD_FILL_STRATEGY).lower()
+SPECIAL_CRAFTING_UPGRADE_FILL_STRATEGY = os.getenv("SPECIAL_CRAFTING_UPGRADE_FILL_STRATEGY", SQUAD_FILL_STRATEGY).lower()
+DAILY_GOLD_UPGRADE_FILL_STRATEGY = os.getenv("DAILY_GOLD_UPGRADE_FILL_STRATEGY", SQUAD_FILL_STRATEGY).lower()
+
+# Readiness wait polling (seconds). Polls start fast and back off towards the max interval.
+WAIT_POLL_INITIAL = float(os.getenv("WAIT_POLL_INITIAL", 0.05))
+WAIT_POLL_MAX = float(os.getenv("WAIT_POLL_MAX", 0.5))
+WAIT_POLL_BACKOFF = float(os.getenv("WAIT_POLL_BACKOFF", 1.5))
+
+# Step retries (utilities.retry_step). Intercepted clicks and stale elements are retried RETRY_ATTEMPTS times, timeouts
+# (which already waited DEFAULT_WAIT_DURATION) RETRY_TIMEOUT_ATTEMPTS times. Backoff in seconds, doubling per retry.
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", 3))
+RETRY_TIMEOUT_ATTEMPTS = int(os.getenv("RETRY_TIMEOUT_ATTEMPTS", 1))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.25))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 4))
+
+# Multi-account runner (runner.py)
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "accounts.json")
+MAX_PARALLEL_ACCOUNTS = int(os.getenv("MAX_PARALLEL_ACCOUNTS", 2))
+
+# Direct JSON API for catalog reads (api package). The browser is still used for every action.
+USE_API = os.getenv("USE_API", "false").lower() in ("true", "1", "t")
+API_URL = os.getenv("API_URL")  # Overrides the host read from the web app, e.g. http://127.0.0.1:8899 for api/stub_server.py
+API_GAME = os.getenv("API_GAME", "fc25")
+API_SESSION_FILE = os.getenv("API_SESSION_FILE", "api_session.json")
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", 4))
+
+# End-to-end benchmark against the fixture web app (benchmark_e2e.py)
+BENCHMARK_RESULTS_DIR = os.getenv("BENCHMARK_RESULTS_DIR", "benchmark_results")
+
+# Run journal (journal.py): confirmed steps are appended here so an interrupted run resumes where it stopped
+JOURNAL = os.getenv("JOURNAL", "true").lower() in ("true", "1", "t")
+JOURNAL_FILE = os.getenv("JOURNAL_FILE", "journal.jsonl")
+# The hour (UTC) at which daily SBCs reset and a new journal day starts
+DAILY_RESET_HOUR_UTC = int(os.getenv("DAILY_RESET_HOUR_UTC", 18))
+
+# Orchestrator (orchestrator.py): run the SBC and pack flows concurrently on tabs of one browser session
+ORCHESTRATE = os.getenv("ORCHESTRATE", "false").lower() in ("true", "1", "t")
+ORCHESTRATOR_TABS = int(os.getenv("ORCHESTRATOR_TABS", 2))
+# Flows of a kind share state in the web app (the open SBC, the Unassigned pile), so only raise these with care
+ORCHESTRATOR_SBC_LIMIT = int(os.getenv("ORCHESTRATOR_SBC_LIMIT", 1))
+ORCHESTRATOR_PACK_LIMIT = int(os.getenv("ORCHESTRATOR_PACK_LIMIT", 1))
+
+# Locator benchmark (benchmark_locators.py): DOM snapshots of each screen, saved as <screen>.html
+LOCATOR_SNAPSHOT_DIR = os.getenv("LOCATOR_SNAPSHOT_DIR", "dom_snapshots")
+
+# Duplicate routing (store.route_duplicates). Each duplicates section goes to the first of these destinations its bulk
+# actions offer: "club" (swap tradeable duplicates in), "sbc_storage", "transfer_list" or "quick_sell"
+DUPLICATE_ROUTES = os.getenv("DUPLICATE_ROUTES", "club,sbc_storage,transfer_list,quick_sell").split(',')
+CHEAP_DUPLICATE_ROUTES = os.getenv("CHEAP_DUPLICATE_ROUTES", "club,quick_sell").split(',')
+
+# Club index (club_index.py): a SQLite index of the club and SBC storage, crawled through the API (USE_API) and kept up
+# to date by the flows. Squad fills check it to skip searches that can't find a player.
+CLUB_INDEX = os.getenv("CLUB_INDEX", "false").lower() in ("true", "1", "t")
+CLUB_INDEX_FILE = os.getenv("CLUB_INDEX_FILE", "club_index.sqlite3")
+# The index is crawled again once the last crawl is older than this
+CLUB_INDEX_MAX_AGE_HOURS = float(os.getenv("CLUB_INDEX_MAX_AGE_HOURS", 24))
+CLUB_INDEX_PAGE_SIZE = int(os.getenv("CLUB_INDEX_PAGE_SIZE", 91))
+
+# Squad solver (solver.py): with the club index, picks the cheapest players meeting an SBC's requirements before placing any.
+# "exact" (branch and bound, up to SOLVER_NODE_LIMIT nodes) or "greedy"
+SOLVER_MODE = os.getenv("SOLVER_MODE", "exact").lower()
+SOLVER_NODE_LIMIT = int(os.getenv("SOLVER_NODE_LIMIT", 20000))
+
+# Session restore (session.py). A saved or profile session is only tried while its auth cookies haven't expired and,
+# if SESSION_MAX_AGE_HOURS is above 0, it was saved less than that long ago
+SESSION_AUTH_COOKIES = os.getenv("SESSION_AUTH_COOKIES", "remid,sid").split(',')
+SESSION_MAX_AGE_HOURS = float(os.getenv("SESSION_MAX_AGE_HOURS", 0))
+# How long to wait for the navigation bar (or the login button) after loading the web app with a restored session
+SESSION_READY_TIMEOUT = int(os.getenv("SESSION_READY_TIMEOUT", LONGER_WAIT_DURATION))
+
+# Daemon mode (daemon.py): one warm browser running the flows on timers, controlled through a local socket
+DAEMON_CONTROL_PORT = int(os.getenv("DAEMON_CONTROL_PORT", 8765))
+# The daily SBCs run this long after each daily reset (DAILY_RESET_HOUR_UTC), once the new day's SBCs are up
+DAEMON_RESET_DELAY_MINUTES = float(os.getenv("DAEMON_RESET_DELAY_MINUTES", 5))
+DAEMON_PACK_INTERVAL_HOURS = float(os.getenv("DAEMON_PACK_INTERVAL_HOURS", 4))
+DAEMON_UPGRADE_INTERVAL_MINUTES = float(os.getenv("DAEMON_UPGRADE_INTERVAL_MINUTES", 60))
+# With the club index, the repeatable upgrades wait for SBC storage to hold at least this many players
+DAEMON_UPGRADE_MIN_STORAGE = int(os.getenv("DAEMON_UPGRADE_MIN_STORAGE", 11))
+DAEMON_HEALTH_INTERVAL_MINUTES = float(os.getenv("DAEMON_HEALTH_INTERVAL_MINUTES", 5))
+DAEMON_KEEPALIVE_MINUTES = float(os.getenv("DAEMON_KEEPALIVE_MINUTES", 10))
@@ -0,0 +1,331 @@
+"""
+Runs the flows on timers in one long-lived, logged-in browser, instead of paying for Chrome, the login and the live
+message on every run.
+
+Jobs, each run in the main thread on the shared browser:
+    daily_sbcs    The daily challenges, at start and DAEMON_RESET_DELAY_MINUTES after each daily reset
+                  (DAILY_RESET_HOUR_UTC).
+    packs         The pack flows, every DAEMON_PACK_INTERVAL_HOURS.
+    upgrades      The repeatable upgrades, every DAEMON_UPGRADE_INTERVAL_MINUTES while SBC storage allows: with the
+                  club index, only once it holds DAEMON_UPGRADE_MIN_STORAGE players.
+
+Between jobs the browser is checked every DAEMON_HEALTH_INTERVAL_MINUTES. A browser that stopped responding is
+restarted, and a session that was logged out is restored. The daemon never prompts for 2FA: if the session can't
+be restored without it, the check fails and no job runs until a later check succeeds (e.g. after logging in with
+main.py). After DAEMON_KEEPALIVE_MINUTES without a job, the SBC tab is clicked so the web app's session doesn't
+time out.
+
+A control socket on 127.0.0.1:DAEMON_CONTROL_PORT takes one command per connection and answers in JSON:
+    status                 The jobs, when they next run and how their last run went.
+    trigger <job>          Runs the job as soon as the current one finishes.
+    pause|resume [<job>]   Pauses or resumes a job, or every job.
+    stop                   Shuts down once the current job finishes, as SIGINT and SIGTERM do.
+Each job is reported as main.py reports a run, and a new trace file is started for the next one. On shutdown,
+what happened since the last job is reported too and the browser is closed with driver.quit().
+
+Usage:
+    python daemon.py                  Runs the daemon.
+    python daemon.py <command> ...    Sends a command to the running daemon, e.g. "python daemon.py trigger packs".
+"""
+import argparse
+import datetime
+import json
+import logging
+import signal
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+
+import selenium.common.exceptions as selenium_exceptions
+
+import config
+import locators
+import main
+import run_log
+from api import reset_client
+from club_index import club_index
+from sbc_helpers import sbc_catalog
+from session import restore_session
+from utilities import click_when_clickable, session_state
+
+@dataclass
+class Job:
+    """
+    A flow run on a timer.
+
+    Attributes:
+        schedule (callable): Takes the time a run ended (epoch seconds) and returns when the next one is due.
+        ready (callable): Optional. Returns False when the job is due but there is nothing for it to do yet.
+    """
+    name: str
+    run: callable
+    schedule: callable
+    ready: callable = None
+    next_run: float = 0.0
+    paused: bool = False
+    runs: int = 0
+    failures: int = 0
+    last_seconds: float = None
+    last_error: str = None
+
+    def status(self):
+        return {"next_run": time.ctime(self.next_run) if self.next_run else "now", "paused": self.paused, "runs": self.runs,
+                "failures": self.failures, "last_seconds": self.last_seconds, "last_error": self.last_error}
+
+def next_daily_reset(now):
+    """DAEMON_RESET_DELAY_MINUTES after the first daily reset (DAILY_RESET_HOUR_UTC) following now."""
+    moment = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+    reset = moment.replace(hour=config.DAILY_RESET_HOUR_UTC, minute=0, second=0, microsecond=0)
+    reset += datetime.timedelta(minutes=config.DAEMON_RESET_DELAY_MINUTES)
+    if reset <= moment:
+        reset += datetime.timedelta(days=1)
+    return reset.timestamp()
+
+def every(seconds):
+    return lambda now: now + seconds
+
+def storage_allows():
+    """Without the club index, the upgrades flows find out for themselves."""
+    return not club_index.ready or club_index.count(location="sbc_storage") >= config.DAEMON_UPGRADE_MIN_STORAGE
+
+def configured_jobs():
+    """The jobs for the flows enabled in config."""
+    jobs = []
+    if config.SOLVE_DAILY_CHALLENGES:
+        jobs.append(Job("daily_sbcs", main.daily_sbcs, next_daily_reset))
+    if config.OPEN_GOLD_PACKS or config.OPEN_CHEAP_PACKS:
+        jobs.append(Job("packs", main.open_packs, every(config.DAEMON_PACK_INTERVAL_HOURS * 3600)))
+    if config.GOLD_UPGRADE or config.SPECIAL_UPGRADE or config.SPECIAL_CRAFTING_UPGRADE:
+        jobs.append(Job("upgrades", main.upgrade_sbcs, every(config.DAEMON_UPGRADE_INTERVAL_MINUTES * 60), storage_allows))
+    return jobs
+
+class Daemon:
+    def __init__(self, jobs):
+        self.jobs = {job.name: job for job in jobs}
+        self.driver = None
+        # Guards the jobs' flags, which the control socket's threads change while a job runs
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.next_health_check = 0.0
+        self.healthy = False
+        self.last_activity = time.time()
+        self.browser_starts = 0
+
+    # Browser
+
+    def start_browser(self):
+        start = time.monotonic()
+        self.driver = main.create_driver()
+        self.browser_starts += 1
+        self.restore()
+        logging.info(f"Browser ready in {time.monotonic() - start:.1f}s (start {self.browser_starts}).")
+
+    def restore(self):
+        # Nobody is at the console to enter a 2FA code, and waiting for one would block the loop and the control socket
+        restore_session(self.driver, interactive=False)
+        # The API session (if any) belongs to the previous login
+        reset_client()
+        main.check_and_click_continue(self.driver)
+        club_index.refresh(self.driver)
+
+    def stop_browser(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except selenium_exceptions.WebDriverException as e:
+                logging.warning(f"Closing the browser failed: {e}")
+            self.driver = None
+
+    def health_check(self):
+        """
+        Restarts a browser that stopped responding, or restores a session that was logged out. Jobs only run while
+        the last check passed.
+        """
+        self.next_health_check = time.time() + config.DAEMON_HEALTH_INTERVAL_MINUTES * 60
+        try:
+            try:
+                state = session_state()(self.driver) if self.driver is not None else None
+            except selenium_exceptions.WebDriverException as e:
+                logging.error(f"The browser stopped responding ({e.__class__.__name__}), restarting it.")
+                state = None
+                self.stop_browser()
+            if self.driver is None:
+                self.start_browser()
+            elif state != "logged_in":
+                logging.warning(f"The web app isn't logged in ({state or 'no navigation bar'}), restoring the session.")
+                self.restore()
+        except Exception as e:
+            self.healthy = False
+            logging.error(f"Health check failed, no jobs will run until the next one at {time.ctime(self.next_health_check)}: {e}")
+            return
+        self.healthy = True
+
+    def keep_alive(self):
+        """Clicks the SBC tab, so the web app makes a request and its session doesn't time out while idle."""
+        self.last_activity = time.time()
+        try:
+            click_when_clickable(self.driver, *locators.SBC_TAB)
+            logging.info("Kept the session alive.")
+        except selenium_exceptions.WebDriverException as e:
+            logging.warning(f"Keep-alive failed ({e.__class__.__name__}), checking the browser.")
+            self.next_health_check = 0.0
+
+    # Jobs
+
+    def due_job(self, now):
+        with self.lock:
+            return next((job for job in self.jobs.values() if not job.paused and job.next_run <= now), None)
+
+    def run_job(self, job):
+        now = time.time()
+        if job.ready is not None and not job.ready():
+            with self.lock:
+                job.next_run = job.schedule(now)
+            logging.info(f"Job '{job.name}' has nothing to do yet, next run {time.ctime(job.next_run)}.")
+            return
+        logging.info(f"Starting job '{job.name}'.")
+        # The catalog was scanned by an earlier job, maybe before the daily reset or a submission from elsewhere
+        sbc_catalog.invalidate()
+        start = time.monotonic()
+        error = None
+        try:
+            job.run(self.driver)
+        except Exception as e:
+            # The flows handle their own errors; anything escaping them must not stop the daemon
+            logging.exception(f"Job '{job.name}' failed.")
+            error = str(e)
+            self.next_health_check = 0.0
+        seconds = time.monotonic() - start
+        self.last_activity = time.time()
+        with self.lock:
+            job.runs += 1
+            job.failures += error is not None
+            job.last_seconds, job.last_error = seconds, error
+            job.next_run = job.schedule(time.time())
+        logging.info(f"Job '{job.name}' {'failed' if error else 'finished'} in {seconds:.1f}s, next run {time.ctime(job.next_run)}.")
+        # Report the job as main.py reports a run, then start afresh for the next one
+        main.report_run()
+        main.reset_run()
+
+    def seconds_to_next_event(self, now):
+        # While the last health check failed, nothing else runs before the next one
+        events = [self.next_health_check]
+        if self.healthy:
+            with self.lock:
+                events += [job.next_run for job in self.jobs.values() if not job.paused]
+            events.append(self.last_activity + config.DAEMON_KEEPALIVE_MINUTES * 60)
+        return max(0.0, min(events) - now)
+
+    def serve(self):
+        """Runs the jobs as they fall due until stopped, then shuts down cleanly."""
+        try:
+            while not self.stopping.is_set():
+                now = time.time()
+                if now >= self.next_health_check:
+                    # The first check starts the browser
+                    self.health_check()
+                job = self.due_job(now) if self.healthy else None
+                if job is not None:
+                    self.run_job(job)
+                    continue
+                if self.healthy and now - self.last_activity >= config.DAEMON_KEEPALIVE_MINUTES * 60:
+                    self.keep_alive()
+                    continue
+                # Sleep until the next job, check or keep-alive, unless a control command wakes us first
+                self.wake.wait(self.seconds_to_next_event(now))
+                self.wake.clear()
+        finally:
+            logging.info("Shutting down the daemon.")
+            main.report_run()
+            reset_client()
+            club_index.close()
+            self.stop_browser()
+
+    # Control
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+
+    def command(self, words):
+        """Applies a control command (a list of words) and returns its JSON-able reply."""
+        action, names = (words[0].lower(), words[1:]) if words else ("status", [])
+        with self.lock:
+            unknown = [name for name in names if name not in self.jobs]
+            if unknown:
+                return {"error": f"Unknown jobs {unknown}, expected some of {list(self.jobs)}."}
+            jobs = [self.jobs[name] for name in names] or list(self.jobs.values())
+            if action == "status":
+                return {"jobs": {job.name: job.status() for job in jobs}, "healthy": self.healthy,
+                        "browser_starts": self.browser_starts, "stopping": self.stopping.is_set()}
+            if action == "trigger" and names:
+                for job in jobs:
+                    job.next_run, job.paused = 0.0, False
+            elif action in ("pause", "resume"):
+                for job in jobs:
+                    job.paused = action == "pause"
+            elif action != "stop":
+                return {"error": f"Unknown command '{' '.join(words)}', expected status, trigger <job>, pause, resume or stop."}
+        if action == "stop":
+            self.stop()
+        else:
+            self.wake.set()
+        logging.info(f"Control command: {' '.join(words)}")
+        return {"ok": action, "jobs": [job.name for job in jobs]}
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        words = self.rfile.readline().decode("utf-8").split()
+        self.wfile.write((json.dumps(self.server.owner.command(words)) + "\n").encode("utf-8"))
+
+def start_control_server(daemon):
+    """Serves the control socket on 127.0.0.1 from a background thread. Only local clients can reach it."""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", config.DAEMON_CONTROL_PORT), ControlHandler)
+    server.daemon_threads = True
+    server.owner = daemon
+    threading.Thread(target=server.serve_forever, name="daemon-control", daemon=True).start()
+    logging.info(f"Control socket listening on 127.0.0.1:{server.server_address[1]}.")
+    return server
+
+def send_command(words, port=None):
+    """Sends a control command to the running daemon and returns its reply."""
+    with socket.create_connection(("127.0.0.1", port or config.DAEMON_CONTROL_PORT), timeout=config.DEFAULT_WAIT_DURATION) as connection:
+        connection.sendall((" ".join(words) + "\n").encode("utf-8"))
+        return json.loads(connection.makefile("r", encoding="utf-8").readline())
+
+def run():
+    run_log.setup("daemon")
+
+    jobs = configured_jobs()
+    if not jobs:
+        print("No flows are enabled in config, so the daemon has nothing to schedule.")
+        return
+    daemon = Daemon(jobs)
+    server = start_control_server(daemon)
+    def shut_down(signal_number, frame):
+        # Let the current job finish before shutting down, rather than interrupting it mid-step. A second signal doesn't wait.
+        if daemon.stopping.is_set():
+            raise KeyboardInterrupt
+        logging.info(f"Received signal {signal_number}, stopping after the current job.")
+        daemon.stop()
+
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, shut_down)
+    try:
+        daemon.serve()
+    finally:
+        server.shutdown()
+        server.server_close()
+        run_log.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="*", help="A control command for the running daemon. Runs the daemon when omitted.")
+    args = parser.parse_args()
+    if args.command:
+        print(json.dumps(send_command(args.command), indent=2))
+    else:
+        run()
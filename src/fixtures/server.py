@@ -0,0 +1,106 @@
+"""
+Serves the fixture web app (webapp/) that reproduces the parts of the UT web app the automation drives.
+
+The scenario the app renders - SBCs, packs, server latency and animation length - is served as /state.json
+from server.state, so it can be changed between page loads.
+
+Usage:
+    python -m fixtures.server [--port 8898] [--latency 150] [--animate 200]
+"""
+import argparse
+import copy
+import json
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+WEBAPP_DIR = os.path.join(os.path.dirname(__file__), "webapp")
+
+def default_state(latency=150, animate=200):
+    """
+    A scenario with the default SBC and pack names from config.py.
+
+    Args:
+        latency (int): Milliseconds the click shield shows for on every navigation.
+        animate (int): Milliseconds each view takes to slide in. 0 disables the transitions.
+
+    Returns:
+        dict: The scenario served as /state.json.
+    """
+    import config
+
+    # Layouts: "simple" only has the GK slot open, "daily_gold" has every slot but the GK open, "full" has all 11 open
+    sbcs = [{"name": name, "repeats": 3, "layout": "simple", "quality": "Bronze", "rare": 0} for name in config.DAILY_SIMPLE_BRONZE_SBC_NAMES]
+    sbcs += [{"name": name, "repeats": 3, "layout": "simple", "quality": "Silver", "rare": 0} for name in config.DAILY_SIMPLE_SILVER_SBC_NAMES]
+    sbcs += [
+        {"name": "Daily Gold Upgrade", "repeats": 1, "layout": "daily_gold", "quality": None, "rare": 0},
+        {"name": "Gold Upgrade", "repeats": -1, "layout": "full", "quality": "Gold", "rare": 0},
+        {"name": config.SPECIAL_UPGRADE_NAME, "repeats": -1, "layout": "full", "quality": "Gold", "rare": config.SPECIAL_UPGRADE_RARE_COUNT},
+    ]
+    # Filler tiles so that the Upgrades list has to be scrolled
+    sbcs += [{"name": f"Filler Upgrade {i}", "repeats": 0, "layout": "full", "quality": None, "rare": 0} for i in range(12)]
+
+    packs = []
+    for i, name in enumerate(config.PACK_NAMES):
+        # Tradeable duplicates are swapped into the club; the untradeable ones in every other cheap pack are quick sold
+        packs.append({"name": name, "tradeableDuplicates": True, "untradeableDuplicates": i % 2 == 1})
+    for name in config.GOLD_PACK_NAMES:
+        # Gold packs only hold tradeable duplicates, which are swapped into the club, sending the club copies to SBC Storage
+        packs += [{"name": name, "tradeableDuplicates": True, "untradeableDuplicates": False} for _ in range(2)]
+    packs += [{"name": f"Filler Pack {i}", "tradeableDuplicates": False, "untradeableDuplicates": False} for i in range(8)]
+
+    # As in the web app, packs can't be claimed while anything is left in Unassigned (see app.js)
+    return {"latency": latency, "animate": animate, "stickyFilters": True, "sbcs": sbcs, "packs": packs}
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/state.json":
+            body = json.dumps(self.server.state).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def end_headers(self):
+        # The app is reloaded between benchmark flows, so never serve it from the browser cache
+        if self.path.split("?")[0] != "/state.json":
+            self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fixture_server(port=0, state=None):
+    """
+    Starts the fixture server on a background thread and returns it.
+
+    Args:
+        port (int): Port to listen on. 0 picks a free port; use server.server_address for it.
+        state (dict, optional): The scenario to serve. Defaults to default_state().
+
+    Returns:
+        ThreadingHTTPServer: The server. Assign server.state to change the scenario for the next page load.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(FixtureHandler, directory=WEBAPP_DIR))
+    server.daemon_threads = True
+    server.state = copy.deepcopy(state) if state is not None else default_state()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8898)
+    parser.add_argument("--latency", type=int, default=150, help="Milliseconds of click shield per navigation.")
+    parser.add_argument("--animate", type=int, default=200, help="Milliseconds per view transition.")
+    args = parser.parse_args()
+    server = start_fixture_server(args.port, default_state(args.latency, args.animate))
+    print(f"Serving the fixture web app on http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
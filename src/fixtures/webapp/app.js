@@ -0,0 +1,437 @@
+// A stand-in for the UT web app that reproduces the DOM contracts the automation depends on.
+// The scenario (SBCs, packs, latency, animation length) is read from state.json, served by fixtures/server.py.
+(function () {
+    'use strict';
+
+    var POSITIONS = ['GK', 'LB', 'CB', 'CB', 'RB', 'CM', 'CM', 'CM', 'LW', 'ST', 'RW'];
+    var SORTS = ['Lowest Quick Sell', 'Highest Rating', 'Lowest Rating', 'Most Recent'];
+    var QUALITIES = ['Bronze', 'Silver', 'Gold', 'Special'];
+    var RATINGS = {Bronze: 60, Silver: 68, Gold: 76, Special: 85};
+
+    var state = null;
+    var view = document.getElementById('view');
+    var overlay = document.getElementById('overlay');
+    var shield = document.querySelector('.ut-click-shield');
+    var nextPlayerId = 1;
+
+    // Rendering
+
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+
+    function render(html) {
+        var root = document.createElement('div');
+        root.className = 'view';
+        root.innerHTML = html;
+        if (state.animate > 0) {
+            root.classList.add('animated', 'entering');
+            root.style.setProperty('--animate', state.animate + 'ms');
+        }
+        view.innerHTML = '';
+        view.appendChild(root);
+        if (state.animate > 0) {
+            requestAnimationFrame(function () { requestAnimationFrame(function () { root.classList.remove('entering'); }); });
+        }
+    }
+
+    function showOverlay(html) { overlay.innerHTML = html; }
+    function hideOverlay() { overlay.innerHTML = ''; }
+
+    // Every server round trip shows the click shield for the configured latency before the next screen renders
+    function transition(callback) {
+        shield.classList.add('showing');
+        setTimeout(function () {
+            shield.classList.remove('showing');
+            callback();
+        }, state.latency);
+    }
+
+    // SBC hub
+
+    function repeatLabel(sbc) {
+        return sbc.repeats < 0 ? 'Repeatable' : 'Repeatable ' + sbc.repeats;
+    }
+
+    function renderHome() {
+        render('<h1>Home</h1>');
+    }
+
+    function renderSbcHub() {
+        render('<div class="menu-container"><button data-action="menu">Favourites</button>' +
+               '<button data-action="menu" data-menu="upgrades">Upgrades</button></div>');
+    }
+
+    function renderUpgrades() {
+        var tiles = state.sbcs.map(function (sbc, index) {
+            var complete = sbc.repeats === 0;
+            return '<div class="col-1-2-md col-1-1 ut-sbc-set-tile-view' + (complete ? ' complete' : '') + '">' +
+                '<h1 class="tileTitle" data-action="open-sbc" data-index="' + index + '">' + escapeHtml(sbc.name) + '</h1>' +
+                '<div class="ut-squad-building-set-status-label-view repeat"><span class="text">' + repeatLabel(sbc) + '</span></div>' +
+                '</div>';
+        }).join('');
+        render('<div class="ut-navigation-container-view--content"><div class="container">' + tiles + '</div></div>');
+    }
+
+    // Squad
+
+    function newSquad(sbc) {
+        var slots = POSITIONS.map(function (position, index) {
+            var locked = sbc.layout === 'simple' ? index !== 0 : (sbc.layout === 'daily_gold' && index === 0);
+            return {index: index, position: position, locked: locked, player: null};
+        });
+        return {sbc: sbc, slots: slots, selected: null, popover: true, filters: null, builderMode: false};
+    }
+
+    function requirements(squad) {
+        var filled = squad.slots.filter(function (slot) { return slot.player; });
+        var needed = squad.slots.filter(function (slot) { return !slot.locked; }).length;
+        var rares = filled.filter(function (slot) { return slot.player.rarity === 'Rare'; }).length;
+        var items = [{text: 'Number of Players in the Squad: Exactly ' + needed, complete: filled.length === needed}];
+        if (squad.sbc.rare) {
+            items.push({text: 'Rare: Min. ' + squad.sbc.rare + ' Players', complete: rares >= squad.sbc.rare});
+        }
+        if (squad.sbc.quality) {
+            var ok = filled.every(function (slot) { return slot.player.quality === squad.sbc.quality; });
+            items.push({text: 'Player Quality: Exactly ' + squad.sbc.quality, complete: filled.length === needed && ok});
+        }
+        return items;
+    }
+
+    function renderSquad() {
+        var squad = state.squad;
+        var reqs = requirements(squad);
+        var complete = reqs.every(function (item) { return item.complete; });
+        var checklist = '<ul class="sbc-requirements-checklist">' + reqs.map(function (item) {
+            return '<li class="' + (item.complete ? 'complete' : '') + '">' + escapeHtml(item.text) + '</li>';
+        }).join('') + '</ul>';
+        var slots = squad.slots.map(function (slot) {
+            var classes = 'ut-squad-slot-view' + (slot.locked ? ' locked' : '') + (squad.selected === slot.index ? ' selected' : '');
+            return '<div class="' + classes + '" index="' + slot.index + '" data-action="slot">' +
+                '<span class="label">' + slot.position + '</span>' +
+                '<div class="playerOverview"><div class="rating">' + (slot.player ? slot.player.rating : '') + '</div></div>' +
+                '</div>';
+        }).join('');
+        var detail = squad.selected === null ? '' :
+            '<button class="btn-standard" data-action="add-player"><span class="btn-text">' +
+            (squad.slots[squad.selected].player ? 'Swap Player' : 'Add Player') + '</span></button>';
+        render('<div class="sbc-layout">' +
+            '<div class="ut-squad-pitch-view sbc">' + slots + '</div>' +
+            '<section class="SquadPanel SBCSquadPanel">' +
+            '<div class="ut-squad-summary-info" data-action="summary">' + escapeHtml(squad.sbc.name) + '</div>' +
+            '<button class="btn-standard" data-action="squad-builder">Use Squad Builder</button>' +
+            checklist + detail +
+            '<button class="ut-squad-tab-button-control call-to-action" data-action="submit"' + (complete ? '' : ' disabled') + '>Submit</button>' +
+            '</section>' +
+            '<div class="ut-popover' + (squad.popover ? ' show' : '') + '">' + checklist + '</div>' +
+            '</div>');
+    }
+
+    // Search filters and results
+
+    function defaultFilters(position) {
+        return {sort: SORTS[1], quality: null, rarity: null, storage: 'My Club', position: position, ignorePosition: false};
+    }
+
+    function filterRow(title, value, options, listClass) {
+        var items = options.map(function (option) {
+            return '<li class="' + (listClass === 'with-icon-list' ? 'with-icon' : '') + '" data-action="filter-option" data-filter="' +
+                title + '" data-value="' + escapeHtml(option) + '">' + escapeHtml(option) + '</li>';
+        }).join('');
+        var list = listClass === 'inline-list' ?
+            '<div class="inline-list-select"><ul class="inline-list">' + items + '</ul></div>' :
+            '<ul class="with-icon-list">' + items + '</ul>';
+        return '<div class="ut-search-filter-control">' +
+            '<div class="ut-search-filter-control--row" data-action="filter-row" data-filter="' + title + '">' +
+            '<span class="title">' + title + '</span><span class="label">' + escapeHtml(value || title) + '</span></div>' +
+            list + '</div>';
+    }
+
+    function renderFilters() {
+        var filters = state.squad.filters;
+        var position = filters.position && !filters.ignorePosition ?
+            '<div class="ut-search-filter-control has-selection"><span class="label">' + filters.position + '</span>' +
+            '<button class="flat ut-search-filter-control--row-button" data-action="clear-position">x</button></div>' : '';
+        var builder = state.squad.builderMode ?
+            '<div class="ut-toggle-row"><span>Ignore Position</span><div class="ut-toggle-control">' +
+            '<div class="ut-toggle-control--track" data-action="ignore-position"></div></div></div>' : '';
+        render('<div class="ut-search-filters">' +
+            '<div class="inline-list-select ut-drop-down-control" data-action="filter-row" data-filter="Sort">' +
+            '<span class="label">' + filters.sort + '</span><ul class="inline-list">' + SORTS.map(function (sort) {
+                return '<li data-action="filter-option" data-filter="Sort" data-value="' + sort + '">' + sort + '</li>';
+            }).join('') + '</ul></div>' +
+            builder +
+            filterRow('My Club', filters.storage, ['My Club', 'SBC Storage'], 'with-icon-list') +
+            filterRow('Quality', filters.quality, QUALITIES, 'inline-list') +
+            filterRow('Rarity', filters.rarity, ['Common', 'Rare'], 'with-icon-list') +
+            position +
+            (state.squad.builderMode ?
+                '<button class="btn-standard call-to-action" data-action="build">Build</button>' :
+                '<button class="btn-standard call-to-action" data-action="search">Search</button>') +
+            '</div>');
+    }
+
+    function makePlayer(filters, offset) {
+        var quality = filters.quality || 'Gold';
+        var rarity = filters.rarity || (offset % 3 === 0 ? 'Rare' : 'Common');
+        return {id: nextPlayerId++, quality: quality, rarity: rarity, rating: RATINGS[quality] + offset % 5};
+    }
+
+    function renderResults() {
+        var filters = state.squad.filters;
+        state.squad.results = [];
+        for (var i = 0; i < 12; i++) {
+            state.squad.results.push(makePlayer(filters, i));
+        }
+        render('<ul class="paginated">' + state.squad.results.map(function (player, index) {
+            return '<li><span class="player"><div class="rating">' + player.rating + '</div> ' + player.quality + ' ' + player.rarity + '</span>' +
+                '<button class="btn-standard add" data-action="add" data-index="' + index + '">Add</button></li>';
+        }).join('') + '</ul>');
+    }
+
+    // Store
+
+    function renderStoreHome() {
+        render('<div class="tile ut-tile-view--with-gfx col-1-2 packs-tile storehub-tile" data-action="packs">Packs</div>');
+    }
+
+    function renderPacks() {
+        var entries = state.packs.map(function (pack, index) {
+            return '<div class="ut-store-pack-details-view">' +
+                '<h1 class="ut-store-pack-details-view--title"><span>' + escapeHtml(pack.name) + '</span></h1>' +
+                '<button class="btn-standard" data-action="claim" data-index="' + index + '"><span class="subtext">Claim your Pack</span></button>' +
+                '</div>';
+        }).join('');
+        render('<div class="ut-store-hub-view"><div class="ut-store-hub-view--content">' + entries + '</div></div>');
+    }
+
+    function renderUnassigned() {
+        // Duplicates left in Unassigned by earlier packs are shown with the new items
+        var items = state.opened.items.concat(state.pile.map(function (item) { return item.name; }));
+        render('<header class="ut-section-header-view unassigned"><h2 class="title">Unassigned</h2>' +
+            '<button class="ut-image-button-control ellipsis-btn" data-action="unassigned-menu">...</button></header>' +
+            '<ul class="items">' + items.map(function (item) { return '<li>' + item + '</li>'; }).join('') + '</ul>');
+    }
+
+    function pileSection(tradeable) {
+        return state.pile.filter(function (item) { return item.tradeable === tradeable; });
+    }
+
+    function renderDuplicates() {
+        var sections = [['tradeable', 'Tradeable Duplicates', pileSection(true)], ['untradeable', 'Untradeable Duplicates', pileSection(false)]];
+        render(sections.filter(function (section) { return section[2].length; }).map(function (section) {
+            return '<section class="sectioned-item-list"><header class="ut-section-header-view"><h2 class="title">' + section[1] + '</h2>' +
+                '<button class="ut-image-button-control ellipsis-btn" data-action="duplicates-menu" data-section="' + section[0] + '">...</button></header>' +
+                '<ul class="itemList">' + section[2].map(function (item) {
+                    return '<li class="listFUTItem"><span class="name">' + item.name + '</span></li>';
+                }).join('') + '</ul></section>';
+        }).join(''));
+    }
+
+    function renderDuplicatesOr(message) {
+        if (state.pile.length) { renderDuplicates(); } else { render('<h1>' + message + '</h1>'); }
+    }
+
+    // Takes the items of one duplicates section out of the pile and returns them
+    function takeSection(tradeable, filter) {
+        var taken = state.pile.filter(function (item) { return item.tradeable === tradeable && (!filter || filter(item)); });
+        state.pile = state.pile.filter(function (item) { return taken.indexOf(item) === -1; });
+        return taken;
+    }
+
+    function bulkPopup(buttons) {
+        showOverlay('<div class="ut-bulk-action-popup-view">' + buttons.map(function (button) {
+            return '<button class="btn-standard" data-action="' + button[0] + '"><span>' + button[1] + '</span></button>';
+        }).join('') + '</div>');
+    }
+
+    // Actions
+
+    var actions = {
+        'tab': function (target) {
+            hideOverlay();
+            transition({home: renderHome, sbc: renderSbcHub, store: renderStoreHome}[target.dataset.tab]);
+        },
+        'menu': function (target) {
+            if (target.dataset.menu === 'upgrades') { transition(renderUpgrades); }
+        },
+        'open-sbc': function (target) {
+            var sbc = state.sbcs[parseInt(target.dataset.index, 10)];
+            if (sbc.repeats === 0) { return; }
+            state.squad = newSquad(sbc);
+            transition(renderSquad);
+        },
+        'summary': function () {
+            state.squad.popover = !state.squad.popover;
+            renderSquad();
+        },
+        'slot': function (target) {
+            var slot = state.squad.slots[parseInt(target.getAttribute('index'), 10)];
+            if (slot.locked) { return; }
+            state.squad.selected = slot.index;
+            state.squad.popover = false;
+            transition(renderSquad);
+        },
+        'add-player': function () {
+            var slot = state.squad.slots[state.squad.selected];
+            if (!state.squad.filters || !state.stickyFilters) {
+                state.squad.filters = defaultFilters(slot.position);
+            }
+            state.squad.filters.position = slot.position;
+            state.squad.builderMode = false;
+            transition(renderFilters);
+        },
+        'squad-builder': function () {
+            state.squad.filters = defaultFilters(null);
+            state.squad.builderMode = true;
+            transition(renderFilters);
+        },
+        // Filter dropdowns open and close in place, as the helpers keep using the row element after clicking it
+        'filter-row': function (target) {
+            var control = target.dataset.filter === 'Sort' ? target : target.parentNode;
+            control.classList.toggle('open');
+        },
+        'filter-option': function (target) {
+            var name = target.dataset.filter;
+            var key = {'Sort': 'sort', 'My Club': 'storage', 'Quality': 'quality', 'Rarity': 'rarity'}[name];
+            var control = target.closest(name === 'Sort' ? '.ut-drop-down-control' : '.ut-search-filter-control');
+            state.squad.filters[key] = target.dataset.value;
+            control.querySelector('span.label').textContent = target.dataset.value;
+            control.classList.remove('open');
+        },
+        'clear-position': function () {
+            state.squad.filters.position = null;
+            renderFilters();
+        },
+        'ignore-position': function () {
+            state.squad.filters.ignorePosition = !state.squad.filters.ignorePosition;
+            renderFilters();
+        },
+        'search': function () { transition(renderResults); },
+        'add': function (target) {
+            var player = state.squad.results[parseInt(target.dataset.index, 10)];
+            state.squad.slots[state.squad.selected].player = player;
+            state.squad.selected = null;
+            transition(renderSquad);
+        },
+        'build': function () {
+            state.squad.slots.forEach(function (slot, index) {
+                if (!slot.locked && !slot.player) { slot.player = makePlayer(state.squad.filters, index); }
+            });
+            state.squad.builderMode = false;
+            transition(renderSquad);
+        },
+        'submit': function () {
+            transition(function () {
+                render('<div class="rewards"><h1>Squad Submitted</h1>' +
+                    '<button class="btn-standard call-to-action" data-action="claim-rewards">Claim Rewards</button></div>');
+            });
+        },
+        'claim-rewards': function () {
+            var sbc = state.squad.sbc;
+            if (sbc.repeats > 0) { sbc.repeats -= 1; }
+            state.completed += 1;
+            state.squad = null;
+            transition(renderUpgrades);
+        },
+        'packs': function () { transition(renderPacks); },
+        'claim': function (target) {
+            if (state.pile.length) {
+                showOverlay('<section class="ea-dialog-view ea-dialog-view-type--message"><header><h1>Unassigned Items Remain</h1></header>' +
+                    '<button class="btn-standard" data-action="close-overlay"><span>Ok</span></button></section>');
+                return;
+            }
+            var pack = state.packs.splice(parseInt(target.dataset.index, 10), 1)[0];
+            state.openedCount += 1;
+            state.opened = {pack: pack, items: ['Player', 'Player', 'Consumable']};
+            // Tradeable duplicates of untradeable club items can be swapped in; untradeable duplicates can't be traded
+            if (pack.tradeableDuplicates) { state.pile.push({name: 'Duplicate ' + state.openedCount + 'a', tradeable: true, swappable: true}); }
+            if (pack.untradeableDuplicates) { state.pile.push({name: 'Duplicate ' + state.openedCount + 'b', tradeable: false}); }
+            transition(renderUnassigned);
+        },
+        'unassigned-menu': function () {
+            bulkPopup([['store-all', 'Store All in Club']]);
+        },
+        'store-all': function () {
+            hideOverlay();
+            transition(function () { renderDuplicatesOr('Unassigned items stored'); });
+        },
+        'duplicates-menu': function (target) {
+            var section = target.dataset.section;
+            var buttons;
+            if (section === 'tradeable') {
+                buttons = [['transfer-list', 'Send All to Transfer List'], ['quick-sell', 'Quick Sell tradeable items for 150']];
+                if (pileSection(true).some(function (item) { return item.swappable; })) {
+                    buttons.unshift(['swap', 'Swap in all Tradeable Duplicate items']);
+                }
+            } else {
+                buttons = [['sbc-storage', 'Send All to SBC Storage'], ['quick-sell', 'Quick Sell untradeable items for 0']];
+            }
+            state.section = section;
+            bulkPopup(buttons);
+        },
+        'swap': function () {
+            showOverlay('<div class="ut-action-confirmation-popup-view"><p>Swap Items?</p>' +
+                '<button class="btn-standard" data-action="confirm-swap">Yes</button>' +
+                '<button class="btn-standard" data-action="close-overlay">No</button></div>');
+        },
+        'confirm-swap': function () {
+            hideOverlay();
+            // The untradeable club copies of the swapped in items take their place in Unassigned
+            takeSection(true, function (item) { return item.swappable; }).forEach(function (item) {
+                state.routed.club += 1;
+                state.pile.push({name: item.name + ' (club copy)', tradeable: false});
+            });
+            transition(function () { renderDuplicatesOr('Duplicates swapped'); });
+        },
+        'transfer-list': function () {
+            hideOverlay();
+            state.routed.transferList += takeSection(true).length;
+            transition(function () { renderDuplicatesOr('Duplicates sent to the Transfer List'); });
+        },
+        'sbc-storage': function () {
+            hideOverlay();
+            state.routed.sbcStorage += takeSection(false).length;
+            transition(function () { renderDuplicatesOr('Duplicates sent to SBC Storage'); });
+        },
+        'quick-sell': function () {
+            hideOverlay();
+            transition(function () {
+                showOverlay('<section class="ea-dialog-view ea-dialog-view-type--message"><header><h1>Quick Sell</h1></header>' +
+                    '<button class="btn-standard" data-action="confirm-quick-sell"><span>Ok</span></button></section>');
+            });
+        },
+        'confirm-quick-sell': function () {
+            hideOverlay();
+            state.routed.quickSold += takeSection(state.section === 'tradeable').length;
+            transition(function () { renderDuplicatesOr('Items quick sold'); });
+        },
+        'close-overlay': hideOverlay
+    };
+
+    document.addEventListener('click', function (event) {
+        var target = event.target.closest('[data-action]');
+        if (target && actions[target.dataset.action]) {
+            actions[target.dataset.action](target);
+        }
+    });
+
+    // Exposed for the benchmark suite to check what the flows achieved
+    window.fixtureState = function () {
+        return {completed: state.completed, opened: state.openedCount, packsLeft: state.packs.length,
+                unassigned: state.pile.length, routed: state.routed,
+                sbcs: state.sbcs.map(function (sbc) { return {name: sbc.name, repeats: sbc.repeats}; })};
+    };
+
+    fetch('state.json').then(function (response) { return response.json(); }).then(function (scenario) {
+        state = scenario;
+        state.completed = 0;
+        state.openedCount = 0;
+        state.pile = [];
+        state.routed = {club: 0, transferList: 0, sbcStorage: 0, quickSold: 0};
+        state.squad = null;
+        renderHome();
+    });
+})();
@@ -0,0 +1,152 @@
+"""
+An append-only journal of the steps the flows have confirmed, so that a crashed or restarted run resumes where
+the previous one stopped instead of starting over.
+
+Each step is one JSON line, flushed and fsynced before the flow moves on:
+    flow_started, flow_finished    A flow with a fixed number of repeats (e.g. the Gold Upgrade) began or ended.
+    sbc_opened                     An SBC's squad was opened.
+    slot_filled                    A player was added to a slot of the open squad.
+    squad_submitted                The squad was submitted. This is what counts as a completed repeat.
+    rewards_claimed                The rewards were claimed.
+    sbc_exhausted                  The SBC is complete or out of repeats.
+    pack_claimed, pack_stored      A pack was opened, and its items were stored or sold.
+
+Entries are grouped by the UT day (which starts at DAILY_RESET_HOUR_UTC), so only the current day's steps are
+used to resume, and yesterday's daily SBCs don't count as exhausted today.
+"""
+import datetime
+import json
+import logging
+import os
+import time
+
+import config
+
+def journal_day(now=None):
+    """The UT day a moment falls in, as an ISO date. Days start at DAILY_RESET_HOUR_UTC rather than midnight."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return (now - datetime.timedelta(hours=config.DAILY_RESET_HOUR_UTC)).date().isoformat()
+
+class RunJournal:
+    def __init__(self, path=None):
+        self.path = path
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.day = None
+        self.entries = []
+        self.torn = False
+        # The session each flow's steps belong to. A flow resuming an interrupted run keeps that run's session.
+        self.sessions = {}
+
+    def _load(self):
+        """Reads the current day's entries, once per day. A torn last line from a crash is skipped."""
+        day = journal_day()
+        if self.day == day:
+            return
+        self.day = day
+        self.entries = []
+        self.path = self.path or config.JOURNAL_FILE
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'r') as file:
+            for line in file:
+                # Terminate a line torn by a crash so the next entry starts on a line of its own
+                self.torn = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping a damaged journal line: {line.strip()}")
+                    continue
+                if entry.get("day") == day:
+                    self.entries.append(entry)
+        logging.info(f"Loaded {len(self.entries)} journal entries for {day} from {self.path}.")
+
+    def record(self, step, **fields):
+        """Appends a step and makes sure it is on disk before returning."""
+        if not config.JOURNAL:
+            return
+        self._load()
+        entry = {"day": self.day, "time": time.time(), "run": self.run_id, "step": step, **fields}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as file:
+            file.write(("\n" if self.torn else "") + json.dumps(entry) + "\n")
+            self.torn = False
+            file.flush()
+            os.fsync(file.fileno())
+        self.entries.append(entry)
+
+    def start_flow(self, flow):
+        """
+        Records the start of a flow with a fixed number of repeats.
+
+        Returns:
+            int: The squads the flow already submitted today in a run that was interrupted before it finished,
+            i.e. how many repeats to skip. 0 if the last run of the flow finished.
+        """
+        if not config.JOURNAL:
+            return 0
+        self._load()
+        session = f"{self.run_id}:{flow}:{len(self.entries)}"
+        for entry in reversed(self.entries):
+            if entry.get("flow") != flow or entry["step"] not in ("flow_started", "flow_finished"):
+                continue
+            if entry["step"] == "flow_started":
+                session = entry["session"]
+            break
+        self.sessions[flow] = session
+        completed = sum(1 for entry in self.entries if entry.get("session") == session and entry["step"] == "squad_submitted")
+        self.record("flow_started", flow=flow, session=session)
+        if completed:
+            logging.info(f"Resuming '{flow}': {completed} squads were already submitted by an interrupted run.")
+        return completed
+
+    def finish_flow(self, flow):
+        self.record("flow_finished", flow=flow, session=self.sessions.pop(flow, None))
+
+    def close_flow(self, flow):
+        """
+        Stops tagging steps with the flow's session, without recording it as finished: a flow that failed is
+        resumed by the next run, but the steps of whatever runs after it in this run aren't its own.
+        """
+        self.sessions.pop(flow, None)
+
+    def record_sbc(self, step, sbc, **fields):
+        """Records a step of the SBC titled sbc, tagged with the session of the flow of the same name (if that flow was started)."""
+        self.record(step, sbc=sbc, session=self.sessions.get(sbc), **fields)
+
+    def sbc_exhausted(self, name):
+        """True if an earlier step today found the SBC titled name complete or out of repeats."""
+        if not config.JOURNAL:
+            return False
+        self._load()
+        return any(entry["step"] == "sbc_exhausted" and entry.get("sbc") == name for entry in self.entries)
+
+    def filled_slots(self, sbc):
+        """The slot indexes filled in sbc's squad since it was last submitted today, i.e. the squad being built."""
+        if not config.JOURNAL:
+            return set()
+        self._load()
+        filled = set()
+        for entry in self.entries:
+            if entry.get("sbc") != sbc:
+                continue
+            if entry["step"] == "slot_filled":
+                filled.add(entry["slot"])
+            elif entry["step"] == "squad_submitted":
+                filled.clear()
+        return filled
+
+    def unstored_pack(self):
+        """The name of a pack that was claimed today without its items being stored, if the run crashed in between."""
+        if not config.JOURNAL:
+            return None
+        self._load()
+        pending = None
+        for entry in self.entries:
+            if entry["step"] == "pack_claimed":
+                pending = entry["pack"]
+            elif entry["step"] == "pack_stored":
+                pending = None
+        return pending
+
+# Shared by every flow in the process
+journal = RunJournal()
@@ -0,0 +1,183 @@
+"""
+Every locator the helpers use to find elements in the web app, defined once.
+
+Locators are CSS selectors wherever CSS can express the same match, since browsers evaluate them natively and
+far faster than XPath. XPath is only used to match on text or to walk up to an ancestor. Text values are never
+pasted into a locator directly. Locator.format() quotes them for the locator's language, so names containing
+quotes (e.g. "Coins' Worth") still work.
+
+Each locator lists the screens it is used on, and the sample values its parameters take there. The locator
+benchmark (benchmark_locators.py) uses these to measure how long each locator takes to evaluate against saved
+DOM snapshots of those screens, and how many elements it matches.
+"""
+import re
+from dataclasses import dataclass, field, replace
+
+from selenium.webdriver.common.by import By
+
+def xpath_literal(text):
+    """Quotes text as an XPath string literal. XPath has no escapes, so text with both quote types is built with concat()."""
+    text = str(text)
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = text.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+def css_string(text):
+    """Quotes text as a CSS string, e.g. for an attribute selector."""
+    return '"' + re.sub(r'(["\\])', r'\\\1', str(text)).replace("\n", "\\a ") + '"'
+
+@dataclass(frozen=True)
+class Locator:
+    """
+    A (By, value) pair that can be unpacked into find_element(*locator) or passed to an expected condition.
+
+    Attributes:
+        by (str): The locator strategy, By.CSS_SELECTOR or By.XPATH.
+        value (str): The selector. May hold {name} placeholders, filled in by format().
+        screens (tuple): The screens the locator is used on, as named in the locator benchmark.
+        context (Locator): For a locator evaluated inside another element, the locator of that element.
+        unique (bool): False if the locator is expected to match several elements (e.g. one per slot).
+        samples (dict): Example values for the placeholders, used by the locator benchmark.
+    """
+    by: str
+    value: str
+    screens: tuple = ()
+    context: "Locator" = None
+    unique: bool = True
+    samples: dict = field(default_factory=dict, compare=False, hash=False)
+
+    def __iter__(self):
+        return iter((self.by, self.value))
+
+    def format(self, **values):
+        """Returns the locator with its placeholders filled in with values, each quoted for the locator's language."""
+        quote = xpath_literal if self.by == By.XPATH else css_string
+        return replace(self, value=self.value.format(**{name: quote(value) for name, value in values.items()}))
+
+    def sample(self):
+        """The locator filled in with its sample values."""
+        return self.format(**self.samples) if self.samples else self
+
+def css(value, *screens, **options):
+    return Locator(By.CSS_SELECTOR, value, screens, **options)
+
+def xpath(value, *screens, **options):
+    return Locator(By.XPATH, value, screens, **options)
+
+# Navigation
+
+NAV_BAR = css("nav.ut-tab-bar", "home")
+SBC_TAB = css("button.ut-tab-bar-item.icon-sbc", "home")
+STORE_TAB = css("button.ut-tab-bar-item.icon-store", "home")
+LIVE_MESSAGE = css(".ut-livemessage")
+LIVE_MESSAGE_CONTINUE = css(".btn-standard.call-to-action", context=LIVE_MESSAGE)
+
+# Login
+
+LOGIN_BUTTON = css("button.btn-standard.call-to-action")
+EMAIL_INPUT = css("#email")
+PASSWORD_INPUT = css("#password")
+LOG_IN_BUTTON = css("#logInBtn")
+TWO_FACTOR_FORM = css("#otcForm")
+
+# SBC hub and Upgrades list
+
+SBC_MENU = css("div.menu-container", "sbc_hub")
+UPGRADES_MENU_BUTTON = xpath("//div[contains(@class, 'menu-container')]//button[contains(text(), 'Upgrades')]", "sbc_hub")
+SBC_TILE = css("div.col-1-2-md.col-1-1.ut-sbc-set-tile-view", "upgrades", unique=False)
+SBC_TILE_LIST = css("div.ut-navigation-container-view--content .container", "upgrades")
+SBC_TILE_TITLE = css("h1.tileTitle", "upgrades", context=SBC_TILE_LIST, unique=False)
+CHALLENGE_ROW = xpath("//h1[contains(text(), {challenge})]/ancestor::div[contains(@class, 'ut-sbc-challenge-table-row-view')]",
+                      samples={"challenge": "Challenge 1"})
+START_CHALLENGE_BUTTON = xpath("//button[contains(@class, 'btn-standard') and contains(@class, 'call-to-action') and "
+                               "(contains(text(), 'Start Challenge') or contains(text(), 'Go to Challenge'))]")
+
+# Squad
+
+SQUAD_PITCH = css(".ut-squad-pitch-view.sbc", "squad")
+SQUAD_PANEL = css("section.SquadPanel.SBCSquadPanel", "squad")
+SQUAD_SUMMARY = css("div.ut-squad-summary-info", "squad")
+SQUAD_SLOT = css("div.ut-squad-slot-view[index={index}]", "squad", samples={"index": 1})
+OPEN_SQUAD_SLOTS = css("div.ut-squad-slot-view:not(.locked)", "squad", unique=False)
+SLOT_LABEL = css("span.label", "squad", context=SQUAD_SLOT)
+SLOT_RATING = css("div.playerOverview div.rating", "squad", context=SQUAD_SLOT)
+REQUIREMENTS_POPOVER = css("div.ut-popover", "squad")
+REQUIREMENTS_CHECKLIST = css("ul.sbc-requirements-checklist", "squad")
+REQUIREMENT_ITEMS = css("li", "squad", context=REQUIREMENTS_CHECKLIST, unique=False)
+USE_SQUAD_BUILDER_BUTTON = xpath("//section[contains(@class, 'SBCSquadPanel')]//button[contains(text(), 'Use Squad Builder') and "
+                                 "not(contains(@class, 'disabled'))]", "squad")
+ADD_PLAYER_BUTTON = xpath("//button[span[@class='btn-text' and text()={label}]]", "slot_selected", samples={"label": "Add Player"})
+SUBMIT_BUTTON = xpath("//button[contains(@class, 'ut-squad-tab-button-control') and contains(., 'Submit')]", "squad")
+SUBMIT_READY_BUTTON = xpath("//button[contains(@class, 'ut-squad-tab-button-control') and contains(@class, 'call-to-action') and "
+                            "contains(., 'Submit')]", "squad")
+CLAIM_REWARDS_BUTTON = xpath("//button[contains(@class, 'btn-standard') and contains(@class, 'call-to-action') and "
+                             "contains(text(), 'Claim Rewards')]", "rewards")
+
+# Player search filters and results
+
+SORT_DROPDOWN = css("div.inline-list-select.ut-drop-down-control", "search_filters", "squad_builder")
+SORT_OPTION = xpath("//div[contains(@class, 'ut-drop-down-control')]//li[contains(text(), {sort})]", "search_filters", "squad_builder",
+                    samples={"sort": "Lowest Quick Sell"})
+STORAGE_FILTER = xpath("//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='My Club'] or "
+                       ".//span[text()='SBC Storage'])]", "search_filters", "squad_builder")
+QUALITY_FILTER = xpath("//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='Quality'] or "
+                       ".//span[text()='Bronze'] or .//span[text()='Silver'] or .//span[text()='Gold'])]", "search_filters", "squad_builder")
+QUALITY_OPTION = xpath("//div[contains(@class, 'inline-list-select')]//ul[@class='inline-list']/li[contains(text(), {quality})]",
+                       "search_filters", "squad_builder", samples={"quality": "Gold"})
+QUALITY_FILTER_SHOWING = xpath("//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='Quality'] or "
+                               ".//span[text()={quality}])]", "search_filters", samples={"quality": "Gold"})
+QUALITY_FILTER_OPTION = xpath("//div[contains(@class, 'ut-search-filter-control') and .//span[text()='Quality']//ul/li[contains(text(), {quality})]]",
+                              "search_filters", samples={"quality": "Gold"})
+RARITY_FILTER = xpath("//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='Rarity'] or "
+                      ".//span[text()='Rare'] or .//span[text()='Common'])]", "search_filters", "squad_builder")
+# The options of the storage and rarity filters
+ICON_FILTER_OPTION = xpath("//li[contains(@class, 'with-icon') and text()={option}]", "search_filters", "squad_builder",
+                           samples={"option": "SBC Storage"})
+ACTIVE_FILTERS = css("div.has-selection", "search_filters", unique=False)
+ACTIVE_FILTER_LABEL = css("span.label", "search_filters", context=ACTIVE_FILTERS)
+ACTIVE_FILTER_REMOVE = css("button.flat.ut-search-filter-control--row-button", "search_filters", context=ACTIVE_FILTERS)
+IGNORE_POSITION_TOGGLE = xpath("//span[contains(text(), 'Ignore Position')]/../div[contains(@class, 'ut-toggle-control')]"
+                               "/div[contains(@class, 'ut-toggle-control--track')]", "squad_builder")
+SEARCH_BUTTON = xpath("//button[contains(@class, 'btn-standard') and contains(@class, 'call-to-action') and text()='Search']", "search_filters")
+BUILD_BUTTON = xpath("//button[contains(text(), 'Build')]", "squad_builder")
+RESULT_ADD_BUTTON = css("li button.add", "search_results", unique=False)
+RESULT_ITEM = css("ul.paginated > li", "search_results", unique=False)
+RESULT_RATING = css("div.rating", "search_results", context=RESULT_ITEM)
+RESULT_ITEM_ADD_BUTTON = css("button.add", "search_results", context=RESULT_ITEM)
+
+# Store
+
+PACKS_TILE = css("div.tile.packs-tile", "store_home")
+PACK_LIST = css("div.ut-store-hub-view--content", "packs")
+PACK_TITLE = css("h1.ut-store-pack-details-view--title span", "packs", context=PACK_LIST, unique=False)
+CLAIM_PACK_BUTTON = xpath("./ancestor::div[contains(@class, 'ut-store-pack-details-view')]//span[contains(@class, 'subtext') and "
+                          "text()='Claim your Pack']", "packs", context=PACK_TITLE)
+UNASSIGNED_ELLIPSIS_BUTTON = css("button.ut-image-button-control.ellipsis-btn", "unassigned")
+STORE_ALL_BUTTON = xpath("//button[.//span[text()='Store All in Club']]", "unassigned_actions")
+MESSAGE_DIALOG = css("section.ea-dialog-view.ea-dialog-view-type--message", "quick_sell_confirmation")
+MESSAGE_DIALOG_TITLE = css("header > h1", "quick_sell_confirmation", context=MESSAGE_DIALOG)
+DUPLICATES_HEADER = xpath("//header[@class='ut-section-header-view']//h2[@class='title' and text()='Untradeable Duplicates']", "duplicates")
+DUPLICATES_ELLIPSIS_BUTTON = css("header[class='ut-section-header-view'] button.ellipsis-btn", "duplicates")
+# Each duplicates section (e.g. "Tradeable Duplicates") has its own header, items and bulk actions
+DUPLICATE_SECTION_HEADER = css("header[class='ut-section-header-view']", "duplicates", unique=False)
+DUPLICATE_SECTION_ELLIPSIS = css("button.ellipsis-btn", "duplicates", context=DUPLICATE_SECTION_HEADER)
+DUPLICATE_ITEM = css("li.listFUTItem", "duplicates", unique=False)
+BULK_ACTION_BUTTONS = css("div.ut-bulk-action-popup-view button", "duplicate_actions", "untradeable_duplicate_actions", unique=False)
+SWAP_TRADEABLE_BUTTON = xpath("//div[@class='ut-bulk-action-popup-view']//button[.//span[text()='Swap in all Tradeable Duplicate items']]",
+                              "duplicate_actions")
+TRANSFER_LIST_BUTTON = xpath("//div[@class='ut-bulk-action-popup-view']//button[.//span[contains(text(), 'Transfer List')]]", "duplicate_actions")
+SBC_STORAGE_BUTTON = xpath("//div[@class='ut-bulk-action-popup-view']//button[.//span[contains(text(), 'SBC Storage')]]",
+                           "untradeable_duplicate_actions")
+# There may be two entries, e.g. one quick selling tradeable items for coins and one quick selling untradeable items for 0
+QUICK_SELL_BUTTON = xpath("//div[@class='ut-bulk-action-popup-view']//button[.//span[contains(text(), 'Quick Sell')]]", "duplicate_actions",
+                          "untradeable_duplicate_actions", unique=False)
+CONFIRM_SWAP_BUTTON = xpath("//div[@class='ut-action-confirmation-popup-view']//button[text()='Yes']", "swap_confirmation")
+CONFIRM_QUICK_SELL_BUTTON = xpath("//section[@class='ea-dialog-view ea-dialog-view-type--message']//button[.//span[text()='Ok']]",
+                                  "quick_sell_confirmation")
+
+def registry():
+    """Every locator in this module, by name."""
+    return {name: value for name, value in globals().items() if isinstance(value, Locator)}
@@ -1,58 +1,36 @@
-import json
-import time
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import logging
 import threading
 
 import config
-
-COOKIES_FILE = "cookies.json"
+import locators
 
 def wait_for_user_input(event):
     input("Press Enter to continue...")
     event.set()
 
-def save_cookies(driver, cookies_file):
-    with open(cookies_file, 'w') as file:
-        json.dump(driver.get_cookies(), file)
-
-def load_cookies(driver, cookies_file, target_domain):
-    with open(cookies_file, 'r') as file:
-        cookies = json.load(file)
-        for cookie in cookies:
-            # Set the cookie's domain to the target domain (if necessary)
-            cookie['domain'] = target_domain
-            driver.add_cookie(cookie)
-
-def is_logged_in(driver):
+def is_logged_in(driver, timeout=config.DEFAULT_WAIT_DURATION):
+    """Waits up to timeout seconds for the web app's navigation bar, so a slow load isn't taken for a logged out session."""
     try:
-        driver.find_element(By.CSS_SELECTOR, "nav.ut-tab-bar")
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located(tuple(locators.NAV_BAR)))
         return True
-    except:
+    except TimeoutException:
         return False
 
-def login(driver):
-    # Open the website
-    driver.get(config.APP_URL)
-
-    # Load cookies if they exist
-    try:
-        load_cookies(driver, COOKIES_FILE, ".ea.com")
-        driver.refresh()
-        if is_logged_in(driver):
-            print("Logged in using cookies.")
-            return
-    except FileNotFoundError:
-        pass
-    except Exception as e:
-        # Handle the exception if necessary
-        print(f"An error occurred: {e}")
-        raise e  
+def login(driver, interactive=True):
+    """
+    Logs in with config.EMAIL and config.PASSWORD (waiting on the user for 2FA), from the web app's login screen.
+    Restoring a saved session is session.restore_session's job, which calls this when it can't.
 
+    Args:
+        driver: The Selenium WebDriver instance.
+        interactive (bool): If False, raise when the 2FA form shows instead of waiting on the user to press Enter.
+    """
     # Wait for the login button to be clickable
     login_button = WebDriverWait(driver, config.LONGER_WAIT_DURATION).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "button.btn-standard.call-to-action"))
+        EC.element_to_be_clickable(tuple(locators.LOGIN_BUTTON))
     )
 
     # Click the login button
@@ -60,7 +38,7 @@ def login(driver):
 
     # Wait for the email input to be visible
     email_input = WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-        EC.visibility_of_element_located((By.ID, "email"))
+        EC.visibility_of_element_located(tuple(locators.EMAIL_INPUT))
     )
 
     # Enter email
@@ -69,22 +47,22 @@ def login(driver):
     # Check for the presence of the "NEXT" button and click it if present
     try:
         next_button = WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-            EC.element_to_be_clickable((By.ID, "logInBtn"))
+            EC.element_to_be_clickable(tuple(locators.LOG_IN_BUTTON))
         )
         next_button.click()  # Clicks the NEXT button
         # Wait for the password input to be visible
         password_input = WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-            EC.visibility_of_element_located((By.ID, "password"))
+            EC.visibility_of_element_located(tuple(locators.PASSWORD_INPUT))
         )
 
         # Enter password
         password_input.send_keys(config.PASSWORD)  # Replace with your password
     except Exception as e:
-        print(f"NEXT button not found or could not be clicked: {e}")
+        logging.warning(f"NEXT button not found or could not be clicked: {e}")
 
     # Wait for the sign-in button to be clickable and click it
     sign_in_button = WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-        EC.element_to_be_clickable((By.ID, "logInBtn"))
+        EC.element_to_be_clickable(tuple(locators.LOG_IN_BUTTON))
     )
     
     # Click the sign-in button
@@ -93,9 +71,14 @@ def login(driver):
     # Wait for the 2FA form to be present if cookies are not used
     try:
         two_fa_form = WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-            EC.presence_of_element_located((By.ID, "otcForm"))
+            EC.presence_of_element_located(tuple(locators.TWO_FACTOR_FORM))
         )
+    except Exception:
+        return
+    if not interactive:
+        raise Exception("Logging in asks for a 2FA code, which can't be entered without a user at the console.")
 
+    try:
         # Create an event to signal when the user presses Enter
         user_input_event = threading.Event()
         user_input_thread = threading.Thread(target=wait_for_user_input, args=(user_input_event,))
@@ -105,17 +88,14 @@ def login(driver):
             # Wait for either the navigation bar to be present or user input
             WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
                 EC.any_of(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "nav.ut-tab-bar")),
+                    EC.presence_of_element_located(tuple(locators.NAV_BAR)),
                     lambda driver: user_input_event.is_set()
                 )
             )
         except Exception as e:
-            print(f"An error occurred: {e}")
+            logging.error(f"An error occurred: {e}")
 
         # Ensure user input thread is joined
         user_input_thread.join()
     except:
-        pass
-
-    # Save cookies after successful login
-    save_cookies(driver, COOKIES_FILE)
\ No newline at end of file
+        pass
\ No newline at end of file
@@ -1,35 +1,42 @@
 import logging
+import os
 import time
+
+# Taken before the heavier imports so the startup metric covers (nearly) the whole process
+PROCESS_START = time.monotonic()
+
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
 import config
-from login import login
+import locators
+from browser_profile import is_performance_profile, add_performance_options, apply_performance_profile
+from capture import failure_capture
+from provisioning import resolve_driver_path
+import orchestrator
+import run_log
+from session import restore_session
+import tracing
 from sbc import *
 from store import *
 
-# Generate timestamp for log filename
-timestamp = time.strftime("%Y%m%d-%H%M%S")
-log_filename = f'main_{timestamp}.log'
-
 def check_and_click_continue(driver):
     """Check if the live message is present and click the continue button if it is."""
     try:
         # Wait for the live message element to be present with a timeout
         WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "ut-livemessage"))
+            EC.presence_of_element_located(tuple(locators.LIVE_MESSAGE))
         )
 
         # If we reach here, it means the live message is present
         logging.info("Live message detected. Attempting to click the continue button.")
         
         # Find the live message container
-        message_element = driver.find_element(By.CLASS_NAME, "ut-livemessage")
-        continue_button = message_element.find_element(By.CLASS_NAME, "btn-standard.call-to-action")
+        message_element = driver.find_element(*locators.LIVE_MESSAGE)
+        continue_button = message_element.find_element(*locators.LIVE_MESSAGE_CONTINUE)
 
         # Click the continue button
         continue_button.click()
@@ -39,34 +46,105 @@ def check_and_click_continue(driver):
         # Log the exception and proceed without interruption
         logging.info("No live message detected, or an error occurred: %s", str(e))
 
+def create_driver():
+    options = webdriver.ChromeOptions()
+    if config.CHROME_USER_DATA_DIR:
+        # Keep each account's browser profile separate so sessions can run side by side
+        options.add_argument(f"--user-data-dir={os.path.abspath(config.CHROME_USER_DATA_DIR)}")
+    if is_performance_profile():
+        add_performance_options(options)
+    if config.ORCHESTRATE:
+        # Chrome throttles timers and animation frames in background tabs, which would stall the tabs not in front
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-renderer-backgrounding")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+    if is_performance_profile():
+        apply_performance_profile(driver)
+    tracing.instrument_driver(driver)
+    return driver
+
 def main():
-    # Configure logging
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename=log_filename, filemode='w')
+    """
+    Runs the configured flows in one browser session.
+
+    Returns:
+        dict: The run's outcome counters and timing metrics, e.g. {"sbcs_completed": 3, "packs_opened": 5, "startup_seconds": 9.4}.
+    """
+    # Configure logging: records are queued and written by a background listener
+    run_log.setup("main")
 
     # Set up the WebDriver
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+    driver = create_driver()
 
     try:
-        # Call the login function
-        login(driver)
+        # Restore the saved session, or log in
+        restore_session(driver)
+
+        # Startup metric: process start until the web app's navigation bar is first available
+        wait_for_element(driver, *locators.NAV_BAR, config.LONGER_WAIT_DURATION)
+        run_metrics["startup_seconds"] = time.monotonic() - PROCESS_START
+        logging.info(f"Startup took {run_metrics['startup_seconds']:.2f}s from process start to the first nav.ut-tab-bar.")
 
         # Check for the presence of the live message and click the continue button if it exists
         check_and_click_continue(driver)
 
-        # Flow Control - Step 1. SBC
-        sbcs(driver)
-
-        # Flow Control - Step 2. Open Packs
-        open_packs(driver) 
+        # Crawl the club and SBC storage into the club index, if it's enabled and out of date
+        club_index.refresh(driver)
+
+        if config.ORCHESTRATE:
+            # Flow Control - SBCs and packs side by side, on tabs of this session
+            run_metrics.update(orchestrator.run(driver))
+        else:
+            # Flow Control - Step 1. SBC
+            flow_start = time.monotonic()
+            sbcs(driver)
+            run_metrics["sbc_seconds"] = time.monotonic() - flow_start
+
+            # Flow Control - Step 2. Open Packs
+            flow_start = time.monotonic()
+            open_packs(driver)
+            run_metrics["pack_seconds"] = time.monotonic() - flow_start
     finally:
+        report_run()
+
         # Close the browser when done
         driver.quit()
+        run_log.stop()
+
+    return {**run_stats, **run_metrics}
+
+def report_run():
+    # Report the time the readiness waits saved over fixed sleeps, the time lost to retries, and where the run spent its time
+    report_wait_savings()
+    report_retries()
+    report_pack_throughput()
+    report_duplicate_routing()
+    report_squad_fill_times()
+    failure_capture.report()
+    tracing.report()
+
+def reset_run():
+    """
+    Clears everything report_run reports. The daemon reports and clears after every job, so a process that runs for
+    weeks doesn't hold every span and timing it has recorded.
+    """
+    for collector in (run_stats, run_metrics, wait_stats, retry_stats, duplicate_routing, duplicate_times, squad_fill_times, failure_capture.stats):
+        collector.clear()
+    pack_throughput.update(packs=0, seconds=0.0)
+    tracing.reset()
 
 def sbcs(driver):
+    daily_sbcs(driver)
+    upgrade_sbcs(driver)
+
+def daily_sbcs(driver):
     # Solve daily challenges
     if config.SOLVE_DAILY_CHALLENGES:
         daily_challenges(driver)
 
+def upgrade_sbcs(driver):
     # Special SBC's
     if config.GOLD_UPGRADE:
         gold_upgrade(driver, 
@@ -0,0 +1,160 @@
+"""
+Runs the SBC and pack flows concurrently on several tabs of one logged-in browser session.
+
+Every flow is an asyncio task. A task waits for a free slot of its kind (see ORCHESTRATOR_SBC_LIMIT and
+ORCHESTRATOR_PACK_LIMIT), then for a free tab, and runs in a worker thread with a driver bound to that tab.
+WebDriver commands act on the session's current window, so every command a tab sends is dispatched under one
+session lock that switches to the tab's window first. Readiness waits and sleeps happen outside the lock, so
+while one tab waits for a pack animation or an SBC submit, the other tabs keep working.
+
+The flows of a kind share state (the SBC catalog and open squad, or the store's Unassigned pile), so each kind is
+limited to one task at a time by default. Daily SBCs and pack opening then overlap on two tabs.
+"""
+import asyncio
+import copy
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from selenium.webdriver.remote.command import Command
+
+import config
+import locators
+from utilities import wait_for_element
+
+class SessionLock:
+    """Serialises the commands of every tab on one WebDriver session, and remembers which window is current."""
+    def __init__(self, current_handle):
+        self.lock = threading.Lock()
+        self.current_handle = current_handle
+        self.switches = 0
+
+def bind_tab(driver, handle, session_lock):
+    """
+    Returns a driver whose commands (including those of the elements it finds) all act on the window handle.
+
+    The returned object is a shallow copy of driver sharing its session, so it can be passed to any flow.
+    """
+    tab = copy.copy(driver)
+    execute = driver.execute
+
+    def tab_execute(driver_command, params=None):
+        with session_lock.lock:
+            if session_lock.current_handle != handle:
+                execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+                session_lock.current_handle = handle
+                session_lock.switches += 1
+            return execute(driver_command, params)
+
+    tab.execute = tab_execute
+    tab.handle = handle
+    return tab
+
+def open_tabs(driver, count):
+    """Opens count - 1 more tabs on the web app next to the current one and returns the tab drivers."""
+    session_lock = SessionLock(driver.current_window_handle)
+    tabs = [bind_tab(driver, driver.current_window_handle, session_lock)]
+    for _ in range(count - 1):
+        driver.switch_to.new_window('tab')
+        handle = driver.current_window_handle
+        session_lock.current_handle = handle
+        tab = bind_tab(driver, handle, session_lock)
+        # The new tab shares the session's cookies, so the web app loads logged in
+        tab.get(config.APP_URL)
+        wait_for_element(tab, *locators.NAV_BAR, config.LONGER_WAIT_DURATION)
+        tabs.append(tab)
+    logging.info(f"Opened {len(tabs)} tabs: {[tab.handle for tab in tabs]}")
+    return tabs, session_lock
+
+@dataclass
+class Task:
+    name: str
+    kind: str
+    run: callable
+    tab: int = None
+    start: float = 0.0
+    seconds: float = 0.0
+    error: str = None
+
+def configured_tasks():
+    """The flows enabled in config, in the order main.py runs them."""
+    import sbc
+    import store
+
+    tasks = []
+    if config.SOLVE_DAILY_CHALLENGES:
+        tasks.append(Task("daily_challenges", "sbc", sbc.daily_challenges))
+    if config.GOLD_UPGRADE:
+        tasks.append(Task("gold_upgrade", "sbc", lambda driver: sbc.gold_upgrade(
+            driver, repeats=config.GOLD_UPGRADE_COUNT, use_sbc_storage=config.GOLD_UPGRADE_USE_SBC_STORAGE)))
+    if config.SPECIAL_UPGRADE:
+        tasks.append(Task("special_upgrade", "sbc", lambda driver: sbc.special_upgrade(
+            driver, config.SPECIAL_UPGRADE_NAME, repeats=config.SPECIAL_UPGRADE_COUNT,
+            use_sbc_storage=config.SPECIAL_UPGRADE_USE_SBC_STORAGE, rare_count=config.SPECIAL_UPGRADE_RARE_COUNT)))
+    if config.SPECIAL_CRAFTING_UPGRADE:
+        tasks.append(Task("special_crafting_upgrade", "sbc", lambda driver: sbc.special_crafting_upgrade(
+            driver, "TOTS Crafting Upgrade", use_sbc_storage=config.SPECIAL_CRAFTING_UPGRADE_USE_SBC_STORAGE)))
+    if config.OPEN_GOLD_PACKS:
+        tasks.append(Task("open_gold_packs", "pack", store.open_gold_packs))
+    if config.OPEN_CHEAP_PACKS:
+        tasks.append(Task("open_cheap_packs", "pack", store.open_cheap_packs))
+    return tasks
+
+async def run_tasks(tabs, tasks, limits):
+    """Runs the tasks on the tabs, at most limits[kind] tasks of a kind at a time. Tasks of a kind start in order."""
+    free_tabs = asyncio.Queue()
+    for index, tab in enumerate(tabs):
+        free_tabs.put_nowait((index, tab))
+    semaphores = {kind: asyncio.Semaphore(limit) for kind, limit in limits.items()}
+    origin = time.monotonic()
+
+    async def run(task):
+        async with semaphores[task.kind]:
+            task.tab, tab = await free_tabs.get()
+            task.start = time.monotonic() - origin
+            logging.info(f"Starting '{task.name}' on tab {task.tab}.")
+            try:
+                await asyncio.to_thread(task.run, tab)
+            except Exception as e:
+                # The flows handle their own errors; anything escaping them must not stop the other tasks
+                logging.exception(f"Task '{task.name}' failed.")
+                task.error = str(e)
+            finally:
+                task.seconds = time.monotonic() - origin - task.start
+                free_tabs.put_nowait((task.tab, tab))
+
+    await asyncio.gather(*(run(task) for task in tasks))
+    return time.monotonic() - origin
+
+def report(tasks, wall_seconds, session_lock):
+    """Logs and prints each task's timing and the run's wall time against running the same tasks one after another."""
+    sequential_seconds = sum(task.seconds for task in tasks)
+    lines = [f"{'Task':<26} {'Kind':<5} {'Tab':>3} {'Start (s)':>9} {'Time (s)':>9}"]
+    for task in tasks:
+        lines.append(f"{task.name:<26} {task.kind:<5} {task.tab:>3} {task.start:>9.1f} {task.seconds:>9.1f}" + (f"  failed: {task.error}" if task.error else ""))
+    # The tasks' own times add up to (a slight overestimate of) what a sequential run on one tab takes
+    lines.append(f"Orchestrated run took {wall_seconds:.1f}s against a sequential baseline of {sequential_seconds:.1f}s "
+                 f"({sequential_seconds / wall_seconds if wall_seconds else 1:.2f}x), with {session_lock.switches} tab switches.")
+    for line in lines:
+        print(line)
+        logging.info(line)
+    return sequential_seconds
+
+def run(driver):
+    """
+    Runs the configured flows concurrently on ORCHESTRATOR_TABS tabs of driver's session.
+
+    Returns:
+        dict: The wall time ("orchestrated_seconds") and the summed task time ("sequential_seconds").
+    """
+    tasks = configured_tasks()
+    if not tasks:
+        return {}
+    limits = {"sbc": config.ORCHESTRATOR_SBC_LIMIT, "pack": config.ORCHESTRATOR_PACK_LIMIT}
+    # More tabs than tasks that can run at once would just sit idle
+    tab_count = max(1, min(config.ORCHESTRATOR_TABS, sum(min(limit, sum(1 for task in tasks if task.kind == kind)) for kind, limit in limits.items())))
+    tabs, session_lock = open_tabs(driver, tab_count)
+    wall_seconds = asyncio.run(run_tasks(tabs, tasks, limits))
+    sequential_seconds = report(tasks, wall_seconds, session_lock)
+    return {"orchestrated_seconds": wall_seconds, "sequential_seconds": sequential_seconds}
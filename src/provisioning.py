@@ -0,0 +1,89 @@
+"""
+Resolves the ChromeDriver binary once and starts from a local cache afterwards.
+
+ChromeDriverManager().install() checks for a new driver over the network on every run. Instead, the resolved
+driver path is cached in config.DRIVER_CACHE_FILE together with the Chrome major version it was resolved for
+and a checksum of the binary. Later runs use the cached driver without any network access, and it is only
+re-resolved when the installed Chrome major version changes or the binary no longer matches its checksum.
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import OperationSystemManager
+
+import config
+
+def detect_chrome_version():
+    """Returns the installed Chrome version (e.g. "131.0.6778.85"), or None if it can't be detected."""
+    try:
+        return OperationSystemManager().get_browser_version_from_os("google-chrome")
+    except Exception as e:
+        logging.warning(f"Could not detect the Chrome version: {e}")
+        return None
+
+def file_checksum(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def load_driver_cache(cache_file=None):
+    try:
+        with open(cache_file or config.DRIVER_CACHE_FILE, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_driver_cache(entry, cache_file=None):
+    with open(cache_file or config.DRIVER_CACHE_FILE, 'w') as file:
+        json.dump(entry, file, indent=2)
+
+def is_valid_driver(entry):
+    path = entry.get("driver_path")
+    if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+        return False
+    return file_checksum(path) == entry.get("sha256")
+
+def install_driver():
+    driver_path = ChromeDriverManager().install()
+
+    # webdriver-manager sometimes returns the THIRD_PARTY_NOTICES file that ships next to the binary
+    if "THIRD_PARTY_NOTICES" in os.path.basename(driver_path):
+        binary_name = "chromedriver.exe" if platform.system() == "Windows" else "chromedriver"
+        driver_path = os.path.join(os.path.dirname(driver_path), binary_name)
+        logging.warning(f"webdriver-manager returned the notices file, using {driver_path} instead.")
+
+    # Ensure the driver is executable
+    os.chmod(driver_path, 0o755)
+    return driver_path
+
+def resolve_driver_path(cache_file=None):
+    """
+    Returns the path of a ChromeDriver binary that matches the installed Chrome.
+
+    The cached driver is used when it was resolved for the same Chrome major version (or when the version
+    can't be detected, e.g. offline on an unusual install) and its checksum still matches. Otherwise the
+    driver is installed through webdriver-manager and the cache is rewritten.
+    """
+    chrome_version = detect_chrome_version()
+    chrome_major = chrome_version.split(".")[0] if chrome_version else None
+
+    entry = load_driver_cache(cache_file)
+    if entry and (chrome_major is None or entry.get("chrome_major") == chrome_major) and is_valid_driver(entry):
+        logging.info(f"Using cached ChromeDriver for Chrome {entry['chrome_major']}: {entry['driver_path']}")
+        return entry["driver_path"]
+
+    logging.info(f"Resolving ChromeDriver for Chrome {chrome_version or 'unknown version'}.")
+    driver_path = install_driver()
+    save_driver_cache({
+        "chrome_major": chrome_major,
+        "chrome_version": chrome_version,
+        "driver_path": driver_path,
+        "sha256": file_checksum(driver_path),
+    }, cache_file)
+    return driver_path
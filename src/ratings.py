@@ -0,0 +1,21 @@
+"""
+The overall rating range of each card quality, shared by the UI helpers, the club index and the requirements
+checklist without any of them importing the others.
+"""
+
+# Overall rating ranges of each card quality
+QUALITY_RATINGS = {"Bronze": (1, 64), "Silver": (65, 74), "Gold": (75, 99)}
+
+def rating_matches_quality(rating, quality):
+    """True if the rating text shown in a slot falls in quality's range. Unknown qualities always match."""
+    if quality not in QUALITY_RATINGS:
+        return True
+    try:
+        low, high = QUALITY_RATINGS[quality]
+        return low <= int(rating) <= high
+    except ValueError:
+        return False
+
+def quality_for_rating(rating):
+    """The quality whose range holds rating, or None."""
+    return next((quality for quality, (low, high) in QUALITY_RATINGS.items() if low <= rating <= high), None)
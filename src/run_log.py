@@ -0,0 +1,244 @@
+"""
+Structured, non-blocking logging for the runs.
+
+setup() puts a QueueHandler on the root logger, so a logging call on the automation thread (or a tab's worker
+thread) only queues the record. A QueueListener thread writes the records out:
+    LOG_DIR/LOG_FILE    One JSON object per line, rotated past LOG_MAX_MB into LOG_BACKUPS numbered files.
+    LOG_DIR/<name>_<timestamp>.log    The familiar text log, unless LOG_TEXT is off.
+
+Each record carries, where known, the run id (the journal's), the account (ACCOUNT_NAME, set by runner.py), the
+flow and SBC (from the trace spans open on the thread that logged it) and the squad slot (see log_context). Levels
+can be set per module with LOG_LEVELS, e.g. "sbc_helpers=WARNING,store=DEBUG", on top of LOG_LEVEL.
+
+Usage:
+    python run_log.py [FILE ...] [--run ID] [--account NAME] [--flow NAME] [--sbc NAME] [--module NAME]
+                      [--level WARNING] [--grep TEXT] [--failures] [--gaps N]
+    Prints the matching records of LOG_DIR/LOG_FILE and its backups (or of FILE ...), oldest first. --failures
+    counts the errors and warnings per helper instead, and --gaps the time from each helper's records to the next
+    record of the same run, with the N longest gaps.
+"""
+import argparse
+import atexit
+import contextlib
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import config
+import tracing
+from journal import journal
+
+# The fields a record gets from the context it was logged in, in output order
+CONTEXT_FIELDS = ("run", "account", "flow", "sbc", "slot")
+
+_local = threading.local()
+_listener = None
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Adds fields (e.g. slot=3) to the records logged on this thread inside the block."""
+    previous = getattr(_local, "fields", {})
+    _local.fields = {**previous, **fields}
+    try:
+        yield
+    finally:
+        _local.fields = previous
+
+def parse_levels(text):
+    """Parses "module=LEVEL,..." into {module: level number}."""
+    levels = {}
+    for entry in filter(None, (part.strip() for part in (text or "").split(","))):
+        module, _, level = entry.partition("=")
+        levels[module.strip()] = logging.getLevelName(level.strip().upper())
+        if not isinstance(levels[module.strip()], int):
+            raise ValueError(f"Unknown log level in LOG_LEVELS entry '{entry}'.")
+    return levels
+
+class ContextFilter(logging.Filter):
+    """
+    Applies the per-module levels, and stamps the record with its context. It runs on the queueing handler, i.e.
+    on the thread that logged, where the spans and log_context are.
+    """
+    def __init__(self, level, module_levels):
+        super().__init__()
+        self.level = level
+        self.module_levels = module_levels
+
+    def filter(self, record):
+        if record.levelno < self.module_levels.get(record.module, self.level):
+            return False
+        root, current = tracing.root_span(), tracing.current_span()
+        record.run = journal.run_id
+        record.account = config.ACCOUNT_NAME
+        record.flow = root.name if root else None
+        record.sbc = current.attrs.get("sbc") if current else None
+        record.slot = None
+        for key, value in getattr(_local, "fields", {}).items():
+            setattr(record, key, value)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update({field: getattr(record, field) for field in CONTEXT_FIELDS if getattr(record, field, None) is not None})
+        return json.dumps(entry)
+
+def setup(name="main"):
+    """
+    Routes the root logger through the queue, replacing logging.basicConfig. Safe to call again: only the first
+    call sets the pipeline up.
+
+    Args:
+        name (str): The text log's name prefix, e.g. "main" for main_<timestamp>.log.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    level = logging.getLevelName(config.LOG_LEVEL.upper())
+    module_levels = parse_levels(config.LOG_LEVELS)
+
+    handlers = []
+    json_handler = logging.handlers.RotatingFileHandler(os.path.join(config.LOG_DIR, config.LOG_FILE),
+                                                        maxBytes=int(config.LOG_MAX_MB * 1024 * 1024), backupCount=config.LOG_BACKUPS)
+    json_handler.setFormatter(JsonFormatter())
+    handlers.append(json_handler)
+    if config.LOG_TEXT:
+        text_handler = logging.FileHandler(os.path.join(config.LOG_DIR, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}.log"), mode='w')
+        text_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(text_handler)
+
+    # Unbounded, so logging never blocks the flows
+    records = queue.Queue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(ContextFilter(level, module_levels))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    # The filter applies the per-module levels, so the root has to let the lowest of them through
+    root.setLevel(min([level, *module_levels.values()]))
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop)
+
+def stop():
+    """Writes out the queued records and stops the listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+# Reading
+
+def log_files(directory=None):
+    """LOG_FILE and its rotated backups in directory, oldest first."""
+    base = os.path.join(directory or config.LOG_DIR, config.LOG_FILE)
+    backups = sorted(glob.glob(f"{glob.escape(base)}.*"), key=lambda path: -int(path.rsplit(".", 1)[1]) if path.rsplit(".", 1)[1].isdigit() else 0)
+    return backups + ([base] if os.path.isfile(base) else [])
+
+def read_records(paths):
+    records = []
+    for path in paths:
+        with open(path, 'r') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return sorted(records, key=lambda record: record["time"])
+
+def matches(record, args):
+    for field in ("run", "account", "flow", "sbc", "module"):
+        wanted = getattr(args, field)
+        if wanted is not None and wanted not in str(record.get(field, "")):
+            return False
+    if args.level and logging.getLevelName(record["level"]) < logging.getLevelName(args.level.upper()):
+        return False
+    return args.grep is None or args.grep.lower() in record["message"].lower()
+
+def helper_name(record):
+    return f"{record['module']}.{record['function']}"
+
+def print_records(records):
+    for record in records:
+        context = " ".join(f"{field}={record[field]}" for field in CONTEXT_FIELDS[1:] if field in record)
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['time']))} {record['level']:<7} "
+              f"{helper_name(record):<40} {context + ' ' if context else ''}{record['message']}")
+
+def print_failures(records):
+    """Errors and warnings per helper, and in how many runs they happened."""
+    counts = defaultdict(lambda: {"ERROR": 0, "WARNING": 0, "runs": set()})
+    for record in records:
+        if record["level"] in ("WARNING", "ERROR", "CRITICAL"):
+            entry = counts[helper_name(record)]
+            entry["WARNING" if record["level"] == "WARNING" else "ERROR"] += 1
+            entry["runs"].add(record.get("run"))
+    print(f"{'Helper':<48} {'Errors':>7} {'Warnings':>9} {'Runs':>5}")
+    for name, entry in sorted(counts.items(), key=lambda item: (-item[1]["ERROR"], -item[1]["WARNING"])):
+        print(f"{name:<48} {entry['ERROR']:>7} {entry['WARNING']:>9} {len(entry['runs']):>5}")
+
+def print_gaps(records, top):
+    """The time from each helper's records to the next record of the same run, and the top longest gaps."""
+    gaps = defaultdict(list)
+    longest = []
+    previous = {}
+    for record in records:
+        run = record.get("run")
+        if run in previous:
+            gap = record["time"] - previous[run]["time"]
+            gaps[helper_name(previous[run])].append(gap)
+            longest.append((gap, previous[run], record))
+        previous[run] = record
+    print(f"{'Helper':<48} {'Records':>8} {'Mean (s)':>9} {'p95 (s)':>8} {'Max (s)':>8}")
+    for name, values in sorted(gaps.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"{name:<48} {len(values):>8} {statistics.mean(values):>9.2f} {p95:>8.2f} {values[-1]:>8.2f}")
+    print()
+    for gap, before, after in sorted(longest, key=lambda entry: -entry[0])[:top]:
+        print(f"{gap:>8.2f}s  {helper_name(before)}: {before['message'][:60]}  ->  {helper_name(after)}: {after['message'][:60]}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="JSONL log files. Defaults to LOG_DIR/LOG_FILE and its backups.")
+    for field in ("run", "account", "flow", "sbc", "module"):
+        parser.add_argument(f"--{field}", help=f"Only records whose {field} contains this.")
+    parser.add_argument("--level", help="Only records at or above this level.")
+    parser.add_argument("--grep", help="Only records whose message contains this (case insensitive).")
+    parser.add_argument("--failures", action="store_true", help="Count errors and warnings per helper.")
+    parser.add_argument("--gaps", type=int, metavar="N", help="Time to the next record per helper, and the N longest gaps.")
+    args = parser.parse_args(argv)
+
+    records = [record for record in read_records(args.files or log_files()) if matches(record, args)]
+    if not records:
+        print("No matching log records.", file=sys.stderr)
+        return
+    if args.failures:
+        print_failures(records)
+    elif args.gaps is not None:
+        print_gaps(records, args.gaps)
+    else:
+        print_records(records)
+
+if __name__ == "__main__":
+    main()
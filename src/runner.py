@@ -0,0 +1,120 @@
+"""
+Runs several accounts concurrently, each in its own process with an isolated browser session.
+
+Account profiles are read from a JSON file (config.ACCOUNTS_FILE by default):
+
+    [
+        {"name": "main", "env": {"EMAIL": "main@example.com", "PASSWORD": "...", "OPEN_CHEAP_PACKS": "True"}},
+        {"name": "alt", "env": {"EMAIL": "alt@example.com", "PASSWORD": "...", "GOLD_UPGRADE": "True"}}
+    ]
+
+Each "env" entry overrides the matching variable read by config.py, so every flow toggle can be set per account.
+Unless overridden, each account gets its own cookie file, Chrome user-data-dir, log directory, screenshot
+directory, journal, club index and API session under "accounts/<name>/", and its log records carry its name
+(ACCOUNT_NAME).
+
+Usage:
+    python runner.py [accounts.json]
+"""
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+# Note: config is only imported inside functions. Worker processes must apply their account's environment
+# before config.py reads it.
+
+def load_profiles(accounts_file):
+    with open(accounts_file, 'r') as file:
+        profiles = json.load(file)
+    names = [profile["name"] for profile in profiles]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Account names must be unique: {names}")
+    return profiles
+
+def account_environment(profile):
+    account_dir = os.path.join("accounts", profile["name"])
+    environment = {
+        "ACCOUNT_NAME": profile["name"],
+        "COOKIES_FILE": os.path.join(account_dir, "cookies.json"),
+        "CHROME_USER_DATA_DIR": os.path.join(account_dir, "chrome-profile"),
+        "LOG_DIR": os.path.join(account_dir, "logs"),
+        "SCREENSHOTS_DIR": os.path.join(account_dir, "screenshots"),
+        "JOURNAL_FILE": os.path.join(account_dir, "journal.jsonl"),
+        "CLUB_INDEX_FILE": os.path.join(account_dir, "club_index.sqlite3"),
+        "API_SESSION_FILE": os.path.join(account_dir, "api_session.json"),
+    }
+    environment.update({key: str(value) for key, value in profile.get("env", {}).items()})
+    return environment
+
+def run_account(profile):
+    """Worker entry point: applies the account's environment, then runs main.main in this process."""
+    os.environ.update(account_environment(profile))
+    os.makedirs(os.path.dirname(os.environ["COOKIES_FILE"]) or ".", exist_ok=True)
+
+    import main
+
+    start = time.monotonic()
+    try:
+        stats = main.main()
+        error = None
+    except Exception as e:
+        logging.exception("Account run failed.")
+        stats = {}
+        error = str(e)
+    return {"account": profile["name"], "stats": stats, "error": error, "duration": time.monotonic() - start}
+
+def account_process(profile, results):
+    """Process entry point: runs the account and sends its result back to the parent."""
+    results.put(run_account(profile))
+
+def print_summary(results):
+    print(f"{'Account':<20} {'SBCs':>6} {'Packs':>6} {'Retries':>8} {'Time (s)':>9}  Error")
+    for result in sorted(results, key=lambda r: r["account"]):
+        stats = result["stats"]
+        print(f"{result['account']:<20} {stats.get('sbcs_completed', 0):>6} {stats.get('packs_opened', 0):>6} "
+              f"{stats.get('retries', 0):>8} {result['duration']:>9.1f}  {result['error'] or ''}")
+    print(f"{'Total':<20} {sum(r['stats'].get('sbcs_completed', 0) for r in results):>6} "
+          f"{sum(r['stats'].get('packs_opened', 0) for r in results):>6}")
+
+def main(accounts_file=None):
+    import config
+
+    profiles = load_profiles(accounts_file or config.ACCOUNTS_FILE)
+    results = []
+    # Spawn rather than fork, and one fresh process per account rather than a pool: config.py (and every module's
+    # state) is read once per process, so a reused worker would run the next account with the previous one's settings
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    pending = list(profiles)
+    running = {}
+    while pending or running:
+        while pending and len(running) < config.MAX_PARALLEL_ACCOUNTS:
+            profile = pending.pop(0)
+            process = context.Process(target=account_process, args=(profile, result_queue), name=f"account-{profile['name']}")
+            process.start()
+            running[profile["name"]] = process
+        try:
+            result = result_queue.get(timeout=1)
+        except queue.Empty:
+            # A process that exited without sending a result crashed before its run could report
+            for name, process in list(running.items()):
+                if not process.is_alive() and process.exitcode != 0:
+                    running.pop(name)
+                    results.append({"account": name, "stats": {}, "error": f"Process exited with code {process.exitcode}.", "duration": 0.0})
+                    print(f"Finished account '{name}'.")
+            continue
+        process = running.pop(result["account"], None)
+        if process is not None:
+            process.join()
+        results.append(result)
+        print(f"Finished account '{result['account']}'.")
+
+    print_summary(results)
+    return results
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,4 +1,6 @@
 import logging
+import time
+from collections import Counter
 
 from selenium import webdriver
 from selenium.webdriver.common.action_chains import ActionChains
@@ -7,12 +9,18 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import selenium.common.exceptions as selenium_exceptions
 import config
-import time
+import locators
+import solver
 
 from sbc_helpers import build_squad as helpers_build_squad
 from sbc_helpers import *
+from club_index import LOCATIONS, club_index
+from journal import journal
+from run_log import log_context
+from tracing import traced
 from utilities import *
 
+@traced(sbc_arg="challenge_name")
 def daily_simple_upgrade(driver, challenge_name, sort_type, quality, position="GK", size = 3):
     """
     Completes a daily simple upgrade challenge that requires only one position of specified quality.
@@ -37,216 +45,410 @@ def daily_simple_upgrade(driver, challenge_name, sort_type, quality, position="G
     Note:
         Each successful completion of the challenge awards rewards, which are claimed after each submission.
     """
+    if sbc_exhausted(challenge_name):
+        return
+
     navigate_to_sbc(driver)
     select_upgrades_menu(driver)
     for i in range(size):
         sbc_completable = open_daily_upgrade(driver, challenge_name)
         if sbc_completable:
-            time.sleep(1)  # Allow the SBC an opportunity to load
-            # TODO: This sleep duration seems long. What to wait for instead?
-            
+            wait_until(driver, squad_ready(), name="sbc_loaded", replaces=1)
+
             if presubmit_squad_if_available(driver):
                 logging.info(f"'Submit' button clicked without going through squad building steps.")
                 continue
 
             if (select_position(driver, position)):
-                time.sleep(1) # TODO: What to wait for instead?
+                wait_until(driver, add_player_button_ready(), name="slot_selected", replaces=1)
                 click_add_player_button(driver)
-                time.sleep(.5)  # Allow dropdown options to become visible
-                set_sorting_and_quality(driver, sort_type, quality)
-                close_active_filter_by_position(driver, position)
+                wait_until(driver, search_filters_ready(), name="search_filters_open", replaces=.5)
+                apply_search_filters(driver, SearchFilterState(sort=sort_type, quality=quality))
                 click_search_button(driver)
-                time.sleep(1)
+                wait_until(driver, search_results_populated(), name="search_results", replaces=1)
                 click_first_add_player(driver)
-                time.sleep(.5)
-                check_sbc_requirements(driver)
+                wait_until(driver, ui_idle(), name="player_added", replaces=.5)
+                if not check_sbc_requirements(driver):
+                    break
                 submit_squad(driver)
                 claim_rewards(driver)
             i += 1
+        else:
+            # Complete or out of repeats, there's nothing left to attempt
+            break
 
 # TODO: Move this to utilities after resolving TODOs.
+@traced
 def squad_builder_upgrade(driver, sort_type, quality):
-    use_squad_builder(driver)
-    # TODO: Don't sleep, wait for the necessary dropdown options 
-    time.sleep(1)  # Allow dropdown options to become visible
-    toggle_ignore_position(driver)
-
-    # TODO: Wait for the animation to complete instead of sleeping
-    time.sleep(.5) # Let the toggle complete the animation
-    set_sorting_and_quality(driver, sort_type, quality)
-
-    time.sleep(.5) # TODO: What are we sleeping for?
+    run_squad_builder(driver, sort_type, quality)
 
-    helpers_build_squad(driver)
-    time.sleep(2) # Allow requirements to update
-    # TODO: This sleep duration is excessive. Is it even necessary?
-
-    check_sbc_requirements(driver)
+    if not check_sbc_requirements(driver):
+        return
     submit_squad(driver)
     claim_rewards(driver)
 
+@traced(sbc="Daily Gold Upgrade")
 def daily_gold_upgrade(driver, sort_type):
+    if sbc_exhausted("Daily Gold Upgrade"):
+        return
+
     navigate_to_sbc(driver)
     select_upgrades_menu(driver)
     sbc_completable = open_daily_upgrade(driver, "Daily Gold Upgrade")
     if sbc_completable > 0:
         for i in range(sbc_completable):
-            time.sleep(1) # Allow the SBC an opportunity to load
-            # Index 0 is locked out, so we let the first iteration be 5+1
-            squad_success = build_squad_variable_rarity(driver, "Bronze", sort_type, False, 0, 6)
-            if squad_success:
-                # Index 1 through 5 are filled with bronze so set the limit to 6+5
-                squad_success = build_squad_variable_rarity(driver, "Silver", sort_type, False, 0, 11)
-
-            if squad_success:
-                check_sbc_requirements(driver)
-                submit_squad(driver)
-                claim_rewards(driver)
+            wait_until(driver, squad_ready(), name="sbc_loaded", replaces=1)
+            snapshot = SquadSnapshot.read(driver)
+            # Index 0 is locked out, so index 1 through 5 get bronze players and 6 through 10 silver players
+            plan = plan_squad(snapshot, "Bronze", "Common", limit=6)
+            plan += [slot for slot in plan_squad(snapshot, "Silver", "Common") if slot[0] >= 6]
+            squad_success = fill_squad(driver, snapshot, plan, sort_type, False, config.DAILY_GOLD_UPGRADE_FILL_STRATEGY)
+
+            if not (squad_success and check_sbc_requirements(driver)):
+                break
+            submit_squad(driver)
+            claim_rewards(driver)
 
             i += 1
 
+@traced
 def daily_challenges(driver: webdriver):
-    retry_attempts = 0
-    max_retry_attempts = 3
-
-    while retry_attempts < max_retry_attempts:
-        try:
-            sort_type = "Lowest Quick Sell"
-            for simple_upgrade_name in config.DAILY_SIMPLE_BRONZE_SBC_NAMES:
-                daily_simple_upgrade(driver, simple_upgrade_name, sort_type, "Bronze")
-            for simple_upgrade_name in config.DAILY_SIMPLE_SILVER_SBC_NAMES:
-                daily_simple_upgrade(driver, simple_upgrade_name, sort_type, "Silver")
-            daily_gold_upgrade(driver, sort_type)
-            # If successful, break out of the loop
-            break
-        except selenium_exceptions.TimeoutException as e:
-            take_screenshot(driver)
-            logging.error(f"Timeout Exception occurred: {str(e)}")
-        except Exception as e:
-            take_screenshot(driver)
-            logging.error(f"An error occurred: {str(e)}")
-
-        # Increment the retry attempt count and wait before retrying
-        retry_attempts += 1
-        logging.info(f"Retrying... Attempt {retry_attempts}/{max_retry_attempts}")
-
-        # Optional: Add a delay before the next retry (e.g., time.sleep(2))
-    
-    if retry_attempts == max_retry_attempts:
-        logging.error("Maximum retry attempts reached. Terminating daily challenges.")
+    # The steps retry themselves (see utilities.retry_step), so what reaches this point has failed for good
+    try:
+        sort_type = "Lowest Quick Sell"
+        for simple_upgrade_name in config.DAILY_SIMPLE_BRONZE_SBC_NAMES:
+            daily_simple_upgrade(driver, simple_upgrade_name, sort_type, "Bronze")
+        for simple_upgrade_name in config.DAILY_SIMPLE_SILVER_SBC_NAMES:
+            daily_simple_upgrade(driver, simple_upgrade_name, sort_type, "Silver")
+        daily_gold_upgrade(driver, sort_type)
+    except selenium_exceptions.TimeoutException as e:
+        take_screenshot(driver)
+        logging.error(f"Timeout Exception occurred: {str(e)}")
+    except Exception as e:
+        take_screenshot(driver)
+        logging.error(f"An error occurred: {str(e)}")
 
 # TODO: IMPORTANT. The functions below need to be refactored to use existing helpers, or define new helpers.
+@traced(sbc_arg="SBC_NAME")
 def special_crafting_upgrade(driver, SBC_NAME, use_sbc_storage = False):
     #TODO: There is some duplicate code here. Consider refactoring into a common wrapper.
-    retry_attempts = 0
-    max_retry_attempts = 3
-    while retry_attempts < max_retry_attempts:
-        try:
-            quality = "Gold"
-            sort_type = "Lowest Quick Sell"
-            navigate_to_sbc(driver)
-            select_upgrades_menu(driver)
-            sbc_completable = open_daily_upgrade(driver, SBC_NAME)
-            if sbc_completable > 0:
-                for i in range(sbc_completable):
-                    sbc_completable = open_daily_upgrade(driver, SBC_NAME)
-                    time.sleep(1)
-                    if build_squad(driver, quality, rarity = None, sort_type = sort_type, use_sbc_storage = use_sbc_storage):
-                        check_sbc_requirements(driver)
-
-                        # TODO: This can be high risk, check the ratings of the cards added before clicking submit
-                        submit_squad(driver)
-                        claim_rewards(driver)
-        except selenium_exceptions.TimeoutException as e:
-            take_screenshot(driver)
-            logging.error(f"Timeout Exception occurred: {str(e)}")
-        except Exception as e:
-            take_screenshot(driver)
-            logging.error(f"An error occurred: {str(e)}")
-
-        # Increment the retry attempt count and wait before retrying
-        retry_attempts += 1
-        logging.info(f"Retrying... Attempt {retry_attempts}/{max_retry_attempts}")
-    
-    # It actually already terminated the loop, but we should log the error
-    if retry_attempts == max_retry_attempts:
-        logging.error("Maximum retry attempts reached. Terminating special crafting upgrade.")
+    # The steps retry themselves (see utilities.retry_step), so the flow runs once
+    try:
+        quality = "Gold"
+        sort_type = "Lowest Quick Sell"
+        if sbc_exhausted(SBC_NAME):
+            return
+        navigate_to_sbc(driver)
+        select_upgrades_menu(driver)
+        sbc_completable = open_daily_upgrade(driver, SBC_NAME)
+        if sbc_completable > 0:
+            for i in range(sbc_completable):
+                sbc_completable = open_daily_upgrade(driver, SBC_NAME)
+                wait_until(driver, squad_ready(), name="sbc_loaded", replaces=1)
+                snapshot = SquadSnapshot.read(driver)
+                plan = plan_squad(snapshot, quality)
+                requirements = squad_requirements(snapshot, plan, quality)
+                plan, storage = solver_plan(plan, requirements, use_sbc_storage)
+                if plan is not None and fill_squad(driver, snapshot, plan, sort_type, storage, config.SPECIAL_CRAFTING_UPGRADE_FILL_STRATEGY):
+                    if not (check_sbc_requirements(driver) and squad_matches_plan(driver, requirements, plan)):
+                        logging.error(f"Not submitting the {SBC_NAME} squad.")
+                        break
+                    submit_squad(driver)
+                    claim_rewards(driver)
+    except selenium_exceptions.TimeoutException as e:
+        take_screenshot(driver)
+        logging.error(f"Timeout Exception occurred: {str(e)}")
+    except Exception as e:
+        take_screenshot(driver)
+        logging.error(f"An error occurred: {str(e)}")
 
-def build_squad(driver, quality, rarity, sort_type, use_sbc_storage = True):
-    for index in range(0, 11):
-        # Hide the popover if it's visible
-        if sbc_requirements_popover_visible(driver):
-            click_when_clickable(driver, By.CSS_SELECTOR, "div.ut-squad-summary-info")
+@traced
+def fill_slot(driver, snapshot, index, quality, rarity, sort_type, use_sbc_storage = True):
+    """
+    Fills (or, if it already has a player, replaces) the squad slot at index with the first search result, or with
+    the first one rated as the player the solver picked for the slot (see solver_plan).
 
-         # If the slot is occupied, skip this interation and move onto the next index
-        if is_slot_filled(driver, index) or is_slot_locked(driver, index):
-            continue
+    Args:
+        driver: The Selenium WebDriver instance.
+        snapshot (SquadSnapshot): The squad's snapshot. The slot is refreshed in it afterwards.
+        index (int): The slot to fill.
+        quality (str): The quality filter, e.g. "Bronze".
+        rarity (str, optional): The rarity filter ("Common" or "Rare"), or None to leave it unset.
+        sort_type (str): The sort to apply, e.g. "Lowest Quick Sell".
+        use_sbc_storage (bool): Search the SBC Storage instead of the club.
+
+    Returns:
+        bool: True if a player was added to the slot.
+    """
+    pick = club_index.picked.get(index)
+    # Every record logged while filling the slot carries its index
+    with log_context(slot=index):
+        # Hide the popover if it's visible
+        hide_sbc_requirements_popover(driver, snapshot)
 
+        previous_rating = snapshot.slots[index].rating if index in snapshot.slots else ""
+        button_label = "Swap Player" if previous_rating else "Add Player"
         selected_position = select_position(driver, index=index)
 
-        if selected_position:
-            logging.info(f"Player selected at position: {selected_position}")
-            time.sleep(1) # TODO: What to wait for instead?
-            click_add_player_button(driver)
-            time.sleep(.5)  # Allow dropdown options to become visible
-            if use_sbc_storage:
-                set_sbc_storage(driver)
-            set_sorting_and_quality(driver, sort_type, quality)
-            if rarity:
-                set_rarity(driver, rarity)
-            close_active_filter_by_position(driver, selected_position)
-            click_search_button(driver)
-            time.sleep(1)
-            click_first_add_player(driver)
-            time.sleep(.5)
-        else:
+        if not selected_position:
             logging.error("Failed to add player.")
             return False
-    
+
+        logging.info(f"Player selected at position: {selected_position}")
+        wait_until(driver, add_player_button_ready(button_label), name="slot_selected", replaces=1)
+        click_add_player_button(driver, button_label)
+        wait_until(driver, search_filters_ready(), name="search_filters_open", replaces=.5)
+        # The web app keeps the filters of the previous search, so usually only the position has to be removed
+        storage = "SBC Storage" if use_sbc_storage else "My Club"
+        apply_search_filters(driver, SearchFilterState(storage, sort_type, quality, rarity))
+        click_search_button(driver)
+        wait_until(driver, search_results_populated(), name="search_results", replaces=1)
+        if pick is None:
+            click_first_add_player(driver)
+        elif click_add_player_rated(driver, pick["rating"]) is None:
+            logging.error(f"The search didn't find the {pick['rating']} rated player the solver picked.")
+            return False
+        wait_until(driver, slot_rating_changed(index, previous_rating), name="player_added", replaces=.5)
+        snapshot.refresh_slot(driver, index)
+        journal.record_sbc("slot_filled", sbc_catalog.opened, slot=index, quality=quality, rarity=rarity)
+        return True
+
+def plan_squad(snapshot, quality, rarity = None, rare_count = 0, limit = 11):
+    """
+    Plans the open slots below index limit as (index, quality, rarity) tuples. When rare_count is given, the
+    first rare_count slots are planned as "Rare" and the rest as "Common" instead of rarity.
+    """
+    open_slots = snapshot.open_slots(limit)
+    if rare_count:
+        return [(slot.index, quality, "Rare" if i < rare_count else "Common") for i, slot in enumerate(open_slots)]
+    return [(slot.index, quality, rarity) for slot in open_slots]
+
+def squad_requirements(snapshot, plan, quality = None, min_rare = 0, max_rare = None, min_squad_rating = None):
+    """
+    The solver Requirements for filling plan's slots with quality players, counting the squad's other players' ratings,
+    narrowed by what the squad's requirements checklist states.
+    """
+    planned = {index for index, _, _ in plan}
+    fixed = tuple(int(slot.rating) for index, slot in snapshot.slots.items() if index not in planned and str(slot.rating).isdigit())
+    requirements = solver.Requirements(len(plan), quality, quality, min_rare, max_rare, min_squad_rating, fixed)
+    return snapshot.requirement_set.refine(requirements)
+
+def solver_plan(plan, requirements, use_sbc_storage):
+    """
+    With the club index, replaces plan by one that places only the players the solver picked: the quality and
+    rarity of each pick, for plan's slots. The picks themselves are kept in club_index.picked, so fill_slot adds
+    the player of the picked rating. The solver looks in the preferred location first, then the other one.
+
+    Returns:
+        tuple: (plan, use_sbc_storage). plan is None if the index has no players meeting requirements.
+    """
+    club_index.picked.clear()
+    if not club_index.ready:
+        return plan, use_sbc_storage
+    preferred = "sbc_storage" if use_sbc_storage else "club"
+    for location in (preferred, *(other for other in LOCATIONS if other != preferred)):
+        solution = solver.solve(requirements, club_index.find(location=location, exclude=club_index.reserved.values()))
+        if solution is not None:
+            logging.info(f"Solver picked {[(player['rating'], player['rarity']) for player in solution.players]} from {location} "
+                         f"(cost {solution.cost:.0f}, squad rating {solution.squad_rating}).")
+            if len(solution.players) != len(plan):
+                logging.error(f"The solver picked {len(solution.players)} players for {len(plan)} slots, not placing them.")
+                return None, use_sbc_storage
+            club_index.picked.update((index, player) for (index, _, _), player in zip(plan, solution.players))
+            return [(index, player["quality"], player["rarity"]) for index, player in club_index.picked.items()], location == "sbc_storage"
+    logging.warning(f"The club index has no players meeting {requirements}.")
+    return None, use_sbc_storage
+
+def squad_matches_plan(driver, requirements, plan):
+    """
+    True if every planned slot holds a player of its planned quality (and the rating of the solver's pick, if any),
+    and the squad meets the rating floor.
+    """
+    snapshot = SquadSnapshot.read(driver)
+    wrong = [index for index, quality, _ in plan if not (index in snapshot.slots and slot_holds(snapshot.slots[index], index, quality))]
+    if wrong:
+        logging.error(f"Slots {wrong} don't hold the planned players: {[snapshot.slots.get(index) for index in wrong]}")
+        return False
+    ratings = [int(slot.rating) for slot in snapshot.slots.values() if str(slot.rating).isdigit()]
+    if requirements.min_squad_rating is not None and solver.squad_rating(ratings) < requirements.min_squad_rating:
+        logging.error(f"The squad rating {solver.squad_rating(ratings)} is below {requirements.min_squad_rating}.")
+        return False
+    return True
+
+def slot_holds(slot, index, quality):
+    """True if slot is filled with a player of quality, rated as the solver's pick for index if there is one."""
+    pick = club_index.picked.get(index)
+    return slot.filled and rating_matches_quality(slot.rating, quality) and (pick is None or str(slot.rating) == str(pick["rating"]))
+
+def requirements_hold(driver, snapshot, plan, pending, sort_type, use_sbc_storage):
+    """
+    Checks the requirements checklist, as read with the slot just filled, for a requirement the squad can no longer
+    meet with the pending slots left. The planned players breaking one are swapped once; if that doesn't fix it, or
+    no swap can, the build stops here rather than filling the remaining slots for nothing.
+    """
+    planned = {index: (quality, rarity) for index, quality, rarity in plan}
+    for attempt in range(2):
+        problems = snapshot.requirement_set.unsatisfiable(snapshot, pending)
+        if not problems:
+            return True
+        if attempt or any(not slots or not set(slots) <= planned.keys() for _, slots in problems):
+            break
+        for index in sorted({index for _, slots in problems for index in slots}):
+            logging.warning(f"Slot {index} (rated {snapshot.slots[index].rating}) breaks the SBC requirements, swapping its player.")
+            if not fill_slot(driver, snapshot, index, *planned[index], sort_type, use_sbc_storage):
+                return False
+    logging.error(f"SBC requirements can't be met anymore, stopping the build: {[requirement.text for requirement, _ in problems]}")
+    return False
+
+def fill_planned_slots(driver, snapshot, plan, to_fill, sort_type, use_sbc_storage):
+    """Fills the to_fill entries of plan in order, checking the requirements after each player added."""
+    for position, (index, quality, rarity) in enumerate(to_fill):
+        if not fill_slot(driver, snapshot, index, quality, rarity, sort_type, use_sbc_storage):
+            return False
+        pending = [slot[0] for slot in to_fill[position + 1:]]
+        if not requirements_hold(driver, snapshot, plan, pending, sort_type, use_sbc_storage):
+            return False
     return True
 
-# Effectively the same as build_squad, but with the ability to specify how many rare players to add
-# TODO: This could/should be the same method as above if I'm okay with sending a rare_count instead of specifying a rarity...
-def build_squad_variable_rarity(driver, quality, sort_type, use_sbc_storage = True, rare_count = 0, limit = 0):
-    current_rare_count = 0
-    upper_range = 11 if limit == 0 else limit
-    for index in range(0, upper_range):
-        # Hide the popover if it's visible
-        if sbc_requirements_popover_visible(driver):
-            click_when_clickable(driver, By.CSS_SELECTOR, "div.ut-squad-summary-info")
+def fill_plan_per_slot(driver, snapshot, plan, sort_type, use_sbc_storage):
+    """Fills every planned slot that is still empty, one slot at a time."""
+    to_fill = [(index, quality, rarity) for index, quality, rarity in plan
+               if not (index in snapshot.slots and snapshot.slots[index].filled)]
+    return fill_planned_slots(driver, snapshot, plan, to_fill, sort_type, use_sbc_storage)
 
-         # If the slot is occupied, skip this interation and move onto the next index
-        if is_slot_filled(driver, index) or is_slot_locked(driver, index):
+def refill_plan(driver, snapshot, plan, sort_type, use_sbc_storage, built_with = None, confirmed = ()):
+    """
+    Fills the planned slots that are empty or hold the wrong player: a rating outside the planned quality's
+    range or other than the solver's pick, or (for slots filled by the Squad Builder with built_with's (quality, rarity)) a different plan.
+    Filled slots in confirmed were filled as planned by an earlier attempt and are kept.
+    """
+    to_fill = []
+    for index, quality, rarity in plan:
+        slot = snapshot.slots.get(index)
+        if slot is not None and slot.filled and index in confirmed:
+            continue
+        built_as_planned = built_with is None or (built_with[0] == quality and rarity in (None, built_with[1]))
+        if slot is not None and slot_holds(slot, index, quality) and built_as_planned:
             continue
+        to_fill.append((index, quality, rarity))
+    return fill_planned_slots(driver, snapshot, plan, to_fill, sort_type, use_sbc_storage)
 
-        selected_position = select_position(driver, index=index)
+@traced
+def run_squad_builder(driver, sort_type, quality, rarity = None, use_sbc_storage = False):
+    """Fills the whole squad with the in-game Squad Builder, ignoring positions."""
+    use_squad_builder(driver)
+    wait_until(driver, search_filters_ready(), name="squad_builder_open", replaces=1)
+    toggle_ignore_position(driver)
+    wait_until(driver, transitions_finished(), name="ignore_position_toggled", replaces=.5)
+    apply_search_filters(driver, SearchFilterState("SBC Storage" if use_sbc_storage else "My Club", sort_type, quality, rarity))
+    wait_until(driver, ui_idle(), name="squad_builder_filters_set", replaces=.5)
 
-        if selected_position:
-            logging.info(f"Player selected at position: {selected_position}")
-            time.sleep(1) # TODO: What to wait for instead?
-            click_add_player_button(driver)
-            time.sleep(.5)  # Allow dropdown options to become visible
-            if use_sbc_storage:
-                set_sbc_storage(driver)
-            set_sorting_and_quality(driver, sort_type, quality)
-            if (current_rare_count < rare_count):
-                rarity = "Rare"
-                current_rare_count += 1
-            else:
-                rarity = "Common"
-            set_rarity(driver, rarity)
-            close_active_filter_by_position(driver, selected_position)
-            click_search_button(driver)
-            time.sleep(1)
-            click_first_add_player(driver)
-            time.sleep(.5)
-        else:
-            logging.error("Failed to add player.")
+    helpers_build_squad(driver)
+    wait_until(driver, squad_ready(), name="squad_built", replaces=2)
+
+# Squad fill strategies, see fill_squad
+SQUAD_FILL_STRATEGIES = ("builder", "refill", "per_slot")
+
+# Seconds taken to fill each squad, keyed by the path that filled it (e.g. "builder+refill")
+squad_fill_times = {}
+
+@traced
+def fill_squad(driver, snapshot, plan, sort_type, use_sbc_storage = True, strategy = "per_slot"):
+    """
+    Fills the open squad according to plan, a list of (index, quality, rarity) tuples from plan_squad(snapshot, ...).
+
+    Strategies:
+        "builder": Run the in-game Squad Builder with the plan's most common quality and rarity, check the result
+            against the requirements checklist and refill only the slots it left empty or got wrong. If the
+            Squad Builder can't be used, fall back to "per_slot".
+        "refill": Fill the planned slots that are empty or whose rating doesn't match the planned quality.
+        "per_slot": Fill the planned slots that are empty, one slot at a time.
+
+    Returns:
+        bool: True if every planned slot was filled.
+    """
+    if strategy not in SQUAD_FILL_STRATEGIES:
+        raise ValueError(f"Unknown squad fill strategy '{strategy}', expected one of {SQUAD_FILL_STRATEGIES}.")
+
+    start = time.monotonic()
+    path = strategy
+    location = "sbc_storage" if use_sbc_storage else "club"
+    if club_index.ready:
+        # Search where the club index has the players for the plan, without searching for what isn't there
+        searched = club_index.can_fill(plan, location)
+        if searched is None:
+            logging.warning(f"The club index doesn't have the players for the plan {plan}.")
             return False
-    
-    return True
+        if searched != location:
+            logging.info(f"The club index only has the players for the plan in {searched}, searching there.")
+            location = searched
+            use_sbc_storage = location == "sbc_storage"
+    # Slots an interrupted attempt already filled for this squad, from the journal
+    confirmed = {index for index in journal.filled_slots(sbc_catalog.opened) if index in snapshot.slots and snapshot.slots[index].filled}
+    if confirmed:
+        # Running the Squad Builder now would replace the players that were already added
+        logging.info(f"Resuming the squad with slots {sorted(confirmed)} already filled.")
+        path = "resume"
+        success = refill_plan(driver, snapshot, plan, sort_type, use_sbc_storage, confirmed=confirmed)
+    elif strategy == "builder" and plan:
+        built_with = Counter((quality, rarity) for _, quality, rarity in plan).most_common(1)[0][0]
+        try:
+            hide_sbc_requirements_popover(driver, snapshot)
+            run_squad_builder(driver, sort_type, built_with[0], built_with[1], use_sbc_storage)
+            snapshot = SquadSnapshot.read(driver)
+        except (selenium_exceptions.TimeoutException, selenium_exceptions.NoSuchElementException) as e:
+            # Only fall back if we're still looking at the squad, otherwise let the flow's error handling take over
+            if not driver.find_elements(*locators.SQUAD_PITCH):
+                raise
+            logging.warning(f"Squad Builder failed, filling the squad slot by slot: {str(e)}")
+            path = "builder->per_slot"
+            success = fill_plan_per_slot(driver, SquadSnapshot.read(driver), plan, sort_type, use_sbc_storage)
+        else:
+            if snapshot.requirements_complete and not snapshot.open_slots():
+                success = True
+            else:
+                logging.info(f"Squad Builder left requirements incomplete: {snapshot.requirements}")
+                path = "builder+refill"
+                success = refill_plan(driver, snapshot, plan, sort_type, use_sbc_storage, built_with)
+    elif strategy == "refill":
+        success = refill_plan(driver, snapshot, plan, sort_type, use_sbc_storage)
+    else:
+        success = fill_plan_per_slot(driver, snapshot, plan, sort_type, use_sbc_storage)
+
+    if success:
+        seconds = time.monotonic() - start
+        squad_fill_times.setdefault(path, []).append(seconds)
+        logging.info(f"Filled the squad with the '{path}' strategy in {seconds:.2f}s.")
+        if club_index.ready:
+            club_index.reserve_squad(SquadSnapshot.read(driver), plan, location)
+    return success
+
+def report_squad_fill_times():
+    """Logs the average time per squad for each squad fill strategy used in the run and adds it to run_metrics."""
+    for path, times in sorted(squad_fill_times.items()):
+        per_squad = sum(times) / len(times)
+        run_metrics[f"squad_fill_{path}_seconds"] = per_squad
+        logging.info(f"Squad fill '{path}': {len(times)} squads, {per_squad:.2f}s per squad.")
+
+@traced
+def build_squad(driver, quality, rarity, sort_type, use_sbc_storage = True):
+    # Plan every open slot from a single snapshot of the pitch
+    snapshot = SquadSnapshot.read(driver)
+    return fill_plan_per_slot(driver, snapshot, plan_squad(snapshot, quality, rarity), sort_type, use_sbc_storage)
+
+# Effectively the same as build_squad, but with the ability to specify how many rare players to add
+@traced
+def build_squad_variable_rarity(driver, quality, sort_type, use_sbc_storage = True, rare_count = 0, limit = 0):
+    upper_range = 11 if limit == 0 else limit
+    # Plan every open slot from a single snapshot of the pitch: the first rare_count open slots get a rare player
+    snapshot = SquadSnapshot.read(driver)
+    plan = plan_squad(snapshot, quality, "Common", rare_count, upper_range)
+    # With the club index, the solver decides which slots get a rare player
+    plan, use_sbc_storage = solver_plan(plan, squad_requirements(snapshot, plan, quality, rare_count), use_sbc_storage)
+    return plan is not None and fill_plan_per_slot(driver, snapshot, plan, sort_type, use_sbc_storage)
 
 
+@traced(sbc="Gold Upgrade")
 def gold_upgrade(driver, repeats = 1, use_sbc_storage = True):
     challenge_name = "Gold Upgrade"
     logging.info(f"Starting {challenge_name} challenge.")
@@ -254,44 +456,71 @@ def gold_upgrade(driver, repeats = 1, use_sbc_storage = True):
     try:
         quality = "Gold"
         sort_type = "Lowest Quick Sell"
+        if sbc_exhausted(challenge_name):
+            return
+        # Skip the repeats an interrupted run already submitted
+        completed = journal.start_flow(challenge_name)
         navigate_to_sbc(driver)
         select_upgrades_menu(driver)
-        for i in range(repeats):
-            open_daily_upgrade(driver, challenge_name)
-            time.sleep(1)
-            if build_squad(driver, quality, "Common", sort_type, use_sbc_storage):
-                check_sbc_requirements(driver)
-
-                # TODO: This can be high risk, check the ratings of the cards added before clicking submit
+        for i in range(repeats - completed):
+            if not open_daily_upgrade(driver, challenge_name):
+                break
+            wait_until(driver, squad_ready(), name="sbc_loaded", replaces=1)
+            snapshot = SquadSnapshot.read(driver)
+            plan = plan_squad(snapshot, quality, "Common")
+            requirements = squad_requirements(snapshot, plan, quality, max_rare=0)
+            plan, storage = solver_plan(plan, requirements, use_sbc_storage)
+            if plan is not None and fill_squad(driver, snapshot, plan, sort_type, storage, config.GOLD_UPGRADE_FILL_STRATEGY):
+                if not (check_sbc_requirements(driver) and squad_matches_plan(driver, requirements, plan)):
+                    logging.error(f"Not submitting the {challenge_name} squad.")
+                    break
                 submit_squad(driver)
                 claim_rewards(driver)
+        journal.finish_flow(challenge_name)
     except selenium_exceptions.TimeoutException as e:
         take_screenshot(driver)
         logging.error(f"Timeout Exception occurred: {str(e)}")
     except Exception as e:
         take_screenshot(driver)
         logging.error(f"An error occurred: {str(e)}")
+    finally:
+        # A failed flow is left unfinished in the journal for the next run to resume
+        journal.close_flow(challenge_name)
 
+@traced(sbc_arg="challenge_name")
 def special_upgrade(driver, challenge_name, repeats = 1, use_sbc_storage = True, rare_count = 1):
     logging.info(f"Starting {challenge_name} challenge.")
 
     try:
         quality = "Gold"
         sort_type = "Lowest Quick Sell"
+        if sbc_exhausted(challenge_name):
+            return
+        # Skip the repeats an interrupted run already submitted
+        completed = journal.start_flow(challenge_name)
         navigate_to_sbc(driver)
         select_upgrades_menu(driver)
-        for i in range(repeats):
-            open_daily_upgrade(driver, challenge_name)
-            time.sleep(1)
-            if build_squad_variable_rarity(driver, quality, sort_type, use_sbc_storage, rare_count):
-                check_sbc_requirements(driver)
-
-                # TODO: This can be high risk, check the ratings of the cards added before clicking submit
+        for i in range(repeats - completed):
+            if not open_daily_upgrade(driver, challenge_name):
+                break
+            wait_until(driver, squad_ready(), name="sbc_loaded", replaces=1)
+            snapshot = SquadSnapshot.read(driver)
+            plan = plan_squad(snapshot, quality, "Common", rare_count)
+            requirements = squad_requirements(snapshot, plan, quality, rare_count)
+            plan, storage = solver_plan(plan, requirements, use_sbc_storage)
+            if plan is not None and fill_squad(driver, snapshot, plan, sort_type, storage, config.SPECIAL_UPGRADE_FILL_STRATEGY):
+                if not (check_sbc_requirements(driver) and squad_matches_plan(driver, requirements, plan)):
+                    logging.error(f"Not submitting the {challenge_name} squad.")
+                    break
                 submit_squad(driver)
                 claim_rewards(driver)
+        journal.finish_flow(challenge_name)
     except selenium_exceptions.TimeoutException as e:
         take_screenshot(driver)
         logging.error(f"Timeout Exception occurred: {str(e)}")
     except Exception as e:
         take_screenshot(driver)
-        logging.error(f"An error occurred: {str(e)}")
\ No newline at end of file
+        logging.error(f"An error occurred: {str(e)}")
+    finally:
+        # A failed flow is left unfinished in the journal for the next run to resume
+        journal.close_flow(challenge_name)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import logging
+from dataclasses import dataclass, field
 
 from selenium import webdriver
 from selenium.webdriver.common.action_chains import ActionChains
@@ -7,31 +8,204 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import selenium.common.exceptions as selenium_exceptions
 import config
-import time
-
+import locators
+
+from api import get_client
+from club_index import club_index
+from journal import journal
+from ratings import QUALITY_RATINGS, rating_matches_quality
+from sbc_requirements import RequirementSet
+from tracing import traced
 from utilities import *
 
 # Notes:
 # 1. Try not to sleep in the helpers, instead allow the caller to decide. These helpers should ideally wait for the elements to be present.
 # 2. Avoid catching errors unless you need to, and instead allow them to raise to the caller for handling.
 
+@traced
 def navigate_to_sbc(driver):
     # Wait for the navigation bar to be present
-    wait_for_element(driver, By.CSS_SELECTOR, "nav.ut-tab-bar")
+    wait_for_element(driver, *locators.NAV_BAR)
     # Click on the "SBC" button in the navigation bar
-    click_when_clickable(driver, By.CSS_SELECTOR, "button.ut-tab-bar-item.icon-sbc")
+    click_when_clickable(driver, *locators.SBC_TAB)
     logging.info("Navigated to the sbc page.")
 
+@traced
 def select_upgrades_menu(driver):
     # Wait for the menu to be visible
-    wait_for_element(driver, By.CSS_SELECTOR, "div.menu-container")
+    wait_for_element(driver, *locators.SBC_MENU)
     # Click on the "Upgrades" button in the menu
-    click_when_clickable(driver, By.XPATH, "//button[contains(text(), 'Upgrades')]")
+    click_when_clickable(driver, *locators.UPGRADES_MENU_BUTTON)
     logging.info("Clicked on the Upgrades menu.")
 
+# Reads every SBC set tile in the Upgrades list in one pass, scrolling the virtualised container one viewport
+# per frame. arguments[0] is an optional list of names; when given the scan stops once they have all been read.
+SBC_TILES_SCRIPT = """
+    var container = document.querySelector('div.ut-navigation-container-view--content .container');
+    var names = arguments[0];
+    var done = arguments[arguments.length - 1];
+    var tiles = {};
+    if (!container) { done([]); return; }
+
+    function wanted(title) {
+        return !names || names.some(function (name) { return title.indexOf(name) !== -1; });
+    }
+
+    function scan() {
+        container.querySelectorAll('div.ut-sbc-set-tile-view').forEach(function (tile) {
+            var header = tile.querySelector('h1.tileTitle');
+            if (!header) return;
+            var title = header.textContent.trim();
+            if (title in tiles || !wanted(title)) return;
+            var repeat = tile.querySelector('div.ut-squad-building-set-status-label-view.repeat span.text');
+            tiles[title] = {
+                name: title,
+                complete: tile.classList.contains('complete'),
+                repeat_text: repeat ? repeat.textContent.trim() : null,
+                position: Array.prototype.indexOf.call(tile.parentNode.children, tile),
+                offset_top: tile.getBoundingClientRect().top - container.getBoundingClientRect().top + container.scrollTop
+            };
+        });
+    }
+
+    function step() {
+        scan();
+        var atBottom = container.scrollTop + container.clientHeight >= container.scrollHeight - 1;
+        var allFound = names && names.every(function (name) {
+            return Object.keys(tiles).some(function (title) { return title.indexOf(name) !== -1; });
+        });
+        if (allFound || atBottom) {
+            done(Object.keys(tiles).map(function (title) { return tiles[title]; }));
+            return;
+        }
+        container.scrollTop += Math.max(container.clientHeight, 1);
+        requestAnimationFrame(function () { requestAnimationFrame(step); });
+    }
+
+    container.scrollTop = 0;
+    requestAnimationFrame(step);
+"""
+
+@dataclass
+class SbcTile:
+    """
+    An SBC set tile in the Upgrades list.
+
+    Attributes:
+        name (str): The tile title.
+        complete (bool): True if the tile has the "complete" class.
+        repeat_count (int): Remaining repeats, or -1 if the SBC is infinitely repeatable.
+        position (int): The tile's index in the grid.
+        offset_top (float): The tile's offset within the scrollable container.
+    """
+    name: str
+    complete: bool
+    repeat_count: int
+    position: int
+    offset_top: float
+
+    @property
+    def available(self):
+        return not self.complete and self.repeat_count != 0
+
+def parse_repeat_count(repeat_text):
+    # A tile without a repeat label can be completed once
+    if repeat_text is None:
+        return 1
+    try:
+        # If it's infinately repeatable, this will throw an error
+        return int(repeat_text.split(" ")[1])
+    except:
+        return -1
+
+class SbcCatalog:
+    """
+    The SBC tiles of the Upgrades menu, scanned once per run and shared by every upgrade flow.
+    With config.USE_API the tiles are read from the API's SBC sets in one request instead of the DOM.
+
+    After a squad is submitted only the tile that was opened is marked stale, and it is re-read
+    the next time it is looked up.
+    """
+    def __init__(self):
+        self.tiles = {}
+        self.scanned = False
+        self.opened = None
+        self.stale = set()
+
+    @traced
+    def scan(self, driver):
+        self.tiles = {}
+        if config.USE_API:
+            self._apply(self._read_api(driver))
+        else:
+            wait_for_element(driver, *locators.SBC_TILE)
+            self._apply(driver.execute_async_script(SBC_TILES_SCRIPT, None))
+        self.scanned = True
+        self.stale.clear()
+        logging.info(f"Scanned {len(self.tiles)} SBC tiles: {[tile.name for tile in self.tiles.values() if tile.available]} available.")
+
+    def find(self, name):
+        """Returns the tile named name (or whose title contains name), without touching the browser."""
+        if name in self.tiles:
+            return self.tiles[name]
+        return next((tile for title, tile in self.tiles.items() if name in title), None)
+
+    @traced
+    def lookup(self, driver, name):
+        """Returns the tile for name, scanning the Upgrades list first if needed and re-reading it if stale."""
+        if not self.scanned:
+            self.scan(driver)
+        tile = self.find(name)
+        if tile is not None and tile.name in self.stale:
+            self.stale.discard(tile.name)
+            if config.USE_API:
+                self._apply([entry for entry in self._read_api(driver) if entry["name"] == tile.name])
+            else:
+                self._apply(driver.execute_async_script(SBC_TILES_SCRIPT, [tile.name]))
+            tile = self.find(name)
+            logging.info(f"Refreshed SBC tile: {tile}")
+        return tile
+
+    def is_exhausted(self, name):
+        """True if the catalog already knows that name is complete or out of repeats. Never touches the browser."""
+        tile = self.find(name) if self.scanned else None
+        return tile is not None and tile.name not in self.stale and not tile.available
+
+    def invalidate(self):
+        """Marks every tile stale, so the next lookup scans the Upgrades menu again (e.g. after the daily reset)."""
+        self.scanned = False
+
+    def invalidate_opened(self):
+        if self.opened is not None:
+            self.stale.add(self.opened)
+            logging.info(f"Invalidated SBC tile: {self.opened}")
+
+    def _read_api(self, driver):
+        # The API has no layout, so tiles keep their list order and are scrolled to from the top
+        return [{"name": name, "complete": sbc_set["complete"], "repeat_count": sbc_set["repeat_count"], "position": position, "offset_top": 0}
+                for position, (name, sbc_set) in enumerate(get_client(driver).sbc_sets().items())]
+
+    def _apply(self, tiles):
+        for tile in tiles:
+            repeat_count = tile["repeat_count"] if "repeat_count" in tile else parse_repeat_count(tile["repeat_text"])
+            self.tiles[tile["name"]] = SbcTile(tile["name"], tile["complete"], repeat_count, tile["position"], tile["offset_top"])
+
+# Shared by every upgrade flow for the duration of the run
+sbc_catalog = SbcCatalog()
+
+def sbc_exhausted(sbc_name):
+    """Returns True if the run's catalog or today's journal already knows sbc_name can't be completed, so it can be skipped without opening it."""
+    # The journal records the tile's full title, which the catalog knows once scanned
+    tile = sbc_catalog.find(sbc_name) if sbc_catalog.scanned else None
+    if sbc_catalog.is_exhausted(sbc_name) or journal.sbc_exhausted(tile.name if tile else sbc_name):
+        logging.info(f"{sbc_name} is complete or out of repeats, skipping.")
+        return True
+    return False
+
+@traced
 def open_daily_upgrade(driver, upgrade_name = "Daily Bronze Upgrade"):
     """
-    Opens the SBC Upgrade page by scrolling down until the element is clickable and clicks on it.
+    Opens the SBC Upgrade page for upgrade_name using the run's SBC catalog.
 
     Args:
         driver: The Selenium WebDriver instance.
@@ -40,103 +214,92 @@ def open_daily_upgrade(driver, upgrade_name = "Daily Bronze Upgrade"):
     Returns:
         int: The repeatable count associated with the sbc.
 
-    This function waits for the page to load completely before scrolling down to find the specified upgrade by name.
-    It checks if the upgrade is already marked as complete and returns False in that case.
-    If the upgrade is not complete, it clicks on the upgrade and retrieves the repeatable count associated with it.
-    The repeatable count is returned to indicate the number of times the task can be repeated.
+    The completion state and repeatable count come from sbc_catalog, which scans the Upgrades list once per run.
+    If the upgrade is complete or has no repeats left, 0 is returned without opening it. Otherwise the tile is
+    scrolled to from its catalogued position and clicked, and the repeatable count (-1 if infinitely repeatable)
+    is returned to indicate the number of times the task can be repeated.
     """
     # Wait for the page to load completely
-    wait_for_element(driver, By.CSS_SELECTOR, "div.col-1-2-md.col-1-1.ut-sbc-set-tile-view")
+    wait_for_element(driver, *locators.SBC_TILE)
 
-    upgrade_header = find_sbc(driver, upgrade_name)
-    
-    if upgrade_header is None:
+    tile = sbc_catalog.lookup(driver, upgrade_name)
+    if tile is None:
+        logging.info(f"{upgrade_name} was not found in the Upgrades list.")
         return 0
-    
-    parent_div = upgrade_header.find_element(By.XPATH, "./ancestor::div[contains(@class, 'ut-sbc-set-tile-view')]")
 
-    # Check if the parent div has the "complete" class
-    if "complete" in parent_div.get_attribute("class"):
+    # Check if the tile has the "complete" class
+    if tile.complete:
         logging.info(f"{upgrade_name} is already complete.")
+        journal.record_sbc("sbc_exhausted", tile.name)
         return 0  # Indicate that the task is complete with 0 repeatable count
 
-    # Extract the repeatable count
-    repeatable_element = parent_div.find_element(By.CSS_SELECTOR, "div.ut-squad-building-set-status-label-view.repeat span.text")
-    repeatable_text = repeatable_element.text
-    try:
-        # If it's infinately repeatable, this will throw an error
-        repeatable_count = int(repeatable_text.split(" ")[1])
-    except:
-        repeatable_count = -1
+    repeatable_count = tile.repeat_count
     logging.info(f"Repeatable count for {upgrade_name}: {repeatable_count}")
 
     if repeatable_count == 0:  
+        journal.record_sbc("sbc_exhausted", tile.name)
+        return 0
+
+    upgrade_header = find_sbc(driver, upgrade_name, scroll_top=tile.offset_top)
+    if upgrade_header is None and tile.offset_top > 0:
+        # The list may have been re-laid out since the catalog was scanned
+        upgrade_header = find_sbc(driver, upgrade_name)
+    if upgrade_header is None:
         return 0
 
     # Click the upgrade header
     upgrade_header.click()
+    sbc_catalog.opened = tile.name
+    club_index.reserved.clear()
+    club_index.picked.clear()
+    journal.record_sbc("sbc_opened", tile.name)
     logging.info(f"Clicked the {upgrade_name} upgrade.")
 
     return repeatable_count  # Return the repeatable count
 
-def find_sbc(driver, sbc_name, max_scroll_attempts=10):
+@traced
+def find_sbc(driver, sbc_name, scroll_top=0):
     try:
-        parent_div = wait_for_element(driver, By.CSS_SELECTOR, "div.ut-navigation-container-view--content .container")
-        scroll_attempts = 0
-
-        while scroll_attempts < max_scroll_attempts:
-            try:
-                sbc_element = parent_div.find_element(By.XPATH, f"//h1[@class='tileTitle' and contains(text(), '{sbc_name}')]")
-                logging.info(f"Found sbc: {sbc_name}")
-                return sbc_element
-            except selenium_exceptions.NoSuchElementException:
-                driver.execute_script("arguments[0].scrollBy(0, 150);", parent_div)
-                time.sleep(0.1) # You want to throttle this so that you don't scroll too fast.
-                # I'm not sure if there is something to wait for instead of just sleeping.
-                scroll_attempts += 1
-
-        print(f"Reached max scroll attempts. Could not find pack: {sbc_name}")
-        return None
+        sbc_element = find_in_list(driver, locators.SBC_TILE_LIST.value, locators.SBC_TILE_TITLE.value, [sbc_name], exact=False, scroll_top=scroll_top).get(sbc_name)
+        if sbc_element is None:
+            logging.info(f"Could not find sbc: {sbc_name}")
+        else:
+            logging.info(f"Found sbc: {sbc_name}")
+        return sbc_element
     except Exception as e:
-        print(f"Could not find pack: {sbc_name}. Error: {str(e)}")
+        logging.warning(f"Could not find sbc: {sbc_name}. Error: {str(e)}")
         return None
 
+@traced
 def use_squad_builder(driver):
     # Wait for the panel to be visible
-    wait_for_element(driver, By.CSS_SELECTOR, "section.SquadPanel.SBCSquadPanel")
+    wait_for_element(driver, *locators.SQUAD_PANEL)
     # Click the "Use Squad Builder" button
-    click_when_clickable(driver, By.XPATH, "//button[contains(text(), 'Use Squad Builder') and not(contains(@class, 'disabled'))]")
+    click_when_clickable(driver, *locators.USE_SQUAD_BUILDER_BUTTON)
     logging.info("Clicked on the 'Use Squad Builder' button.")
 
+@traced
 def set_rarity(driver, rarity = "Common"):
-    click_when_clickable(
-        driver,
-        By.XPATH,
-        "//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='Rarity'] or .//span[text()='Rare'] or .//span[text()='Common'])]"
-    )
+    click_when_clickable(driver, *locators.RARITY_FILTER)
     logging.info("Clicked on 'Rarity' filter.")
-    click_when_clickable(
-        driver,
-        By.XPATH,
-        f"//li[contains(@class, 'with-icon') and text()='{rarity}']"
-    )
+    click_when_clickable(driver, *locators.ICON_FILTER_OPTION.format(option=rarity))
     logging.info(f"Clicked on '{rarity}'.")
 
-def set_sorting_and_quality(driver, sort = "Lowest Quick Sell", quality = "Bronze"):
-    # Change the sorting to "Lowest Quick Sell"
+@traced
+def set_sorting(driver, sort = "Lowest Quick Sell"):
     # Make sure the selector is in view
-    sort_by_selector = "div.inline-list-select.ut-drop-down-control"
-    sort_by = driver.find_element(By.CSS_SELECTOR, sort_by_selector)
+    sort_by = driver.find_element(*locators.SORT_DROPDOWN)
     driver.execute_script("arguments[0].scrollIntoView(true);", sort_by)
     # Click the selector
     sort_by.click()
     # Select the sort type
-    click_when_clickable(driver, By.XPATH, f"//li[contains(text(), '{sort}')]")
+    click_when_clickable(driver, *locators.SORT_OPTION.format(sort=sort))
     logging.info(f"Set sorting to '{sort}'.")
 
+@traced
+def set_quality(driver, quality = "Bronze"):
     # Locate the quality dropdown
-    quality_selector = f"//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='Quality'] or .//span[text()='Bronze'] or .//span[text()='Silver'] or .//span[text()='Gold'])]"
-    quality_dropdown = driver.find_element(By.XPATH, quality_selector)
+    quality_dropdown = driver.find_element(*locators.QUALITY_FILTER)
     
     # Scroll down to the quality dropdown to ensure it is in view, if necessary
     driver.execute_script("arguments[0].scrollIntoView(true);", quality_dropdown)
@@ -151,27 +314,35 @@ def set_sorting_and_quality(driver, sort = "Lowest Quick Sell", quality = "Bronz
    
     # Check if any `ul` siblings exist
     if siblings:
-        quality_option = click_when_clickable(driver, By.XPATH, f"//div[contains(@class, 'inline-list-select')]//ul[@class='inline-list']/li[contains(text(), '{quality}')]")
+        quality_option = click_when_clickable(driver, *locators.QUALITY_OPTION.format(quality=quality))
         logging.info(f"Clicked on the quality option '{quality}'.")
     else:
         # TODO: I'm not sure if this is ever hit
         # Click the quality dropdown        
-        click_when_clickable(driver, By.XPATH, f"//div[contains(@class, 'ut-search-filter-control--row') and (.//span[text()='Quality'] or .//span[text()='{quality}'])]")
+        click_when_clickable(driver, *locators.QUALITY_FILTER_SHOWING.format(quality=quality))
         logging.info(f"Clicked on the quality filter.")
 
         # Click the quality option
-        quality_option = click_when_clickable(driver, By.XPATH, f"//div[contains(@class, 'ut-search-filter-control') and .//span[text()='Quality']//ul/li[contains(text(), '{quality}')]")
+        quality_option = click_when_clickable(driver, *locators.QUALITY_FILTER_OPTION.format(quality=quality))
         logging.info(f"Clicked on the quality option '{quality}'.")
 
+    return quality_dropdown, quality_option
+
+@traced
+def set_sorting_and_quality(driver, sort = "Lowest Quick Sell", quality = "Bronze"):
+    set_sorting(driver, sort)
+    quality_dropdown, quality_option = set_quality(driver, quality)
     logging.info(f"Completed sorting to '{sort}' and quality to '{quality}'.")
     return quality_dropdown, quality_option
 
+@traced
 def build_squad(driver):
     # Scroll down until the "Build" button is visible and click it
-    build_button = wait_for_element(driver, By.XPATH, "//button[contains(text(), 'Build')]")
+    build_button = wait_for_element(driver, *locators.BUILD_BUTTON)
     build_button.click()
     logging.info("Clicked on the 'Build' button.")
 
+@traced
 def select_challenge(driver, challenge_name):
     """
     Selects a specific challenge by finding the corresponding element based on the provided challenge name.
@@ -184,7 +355,7 @@ def select_challenge(driver, challenge_name):
         bool: True if the challenge is not complete and successfully selected, False if the challenge is already complete.
     """
     # Wait for the challenge row to be present
-    challenge_row = wait_for_element(driver, By.XPATH, f"//h1[contains(text(), '{challenge_name}')]/ancestor::div[contains(@class, 'ut-sbc-challenge-table-row-view')]")
+    challenge_row = wait_for_element(driver, *locators.CHALLENGE_ROW.format(challenge=challenge_name))
 
     # Check if the challenge is already completed
     if "complete" in challenge_row.get_attribute("class"):
@@ -197,19 +368,19 @@ def select_challenge(driver, challenge_name):
 
     return True
 
+@traced
 def start_challenge(driver):
     # Wait for either "Start Challenge" or "Go to Challenge" button to be clickable and click it
     start_button = WebDriverWait(driver, config.DEFAULT_WAIT_DURATION).until(
-        EC.element_to_be_clickable(
-            (By.XPATH, "//button[contains(@class, 'btn-standard') and contains(@class, 'call-to-action') and (contains(text(), 'Start Challenge') or contains(text(), 'Go to Challenge'))]")
-        )
+        EC.element_to_be_clickable(tuple(locators.START_CHALLENGE_BUTTON))
     )
     start_button.click()
     logging.info("Clicked on the 'Start Challenge' or 'Go to Challenge' button.")
 
+@traced
 def sbc_requirements_popover_visible(driver):
     # Locate the element (adjust the selector as needed)
-    element = driver.find_element(By.CSS_SELECTOR, "div.ut-popover")
+    element = driver.find_element(*locators.REQUIREMENTS_POPOVER)
 
     # Get the class attribute and split it into individual class names
     classes = element.get_attribute("class").split()
@@ -222,53 +393,171 @@ def sbc_requirements_popover_visible(driver):
         logging.info("SBC Requirements popover does not have the 'show' class.")
         return False
 
+# Reads the squad pitch, requirements popover and checklist in a single round trip.
+# arguments[0] is an optional slot index; when given only that slot is returned.
+SQUAD_SNAPSHOT_SCRIPT = """
+    var pitch = document.querySelector('.ut-squad-pitch-view.sbc');
+    var selector = 'div.ut-squad-slot-view' + (arguments[0] === null ? '' : "[index='" + arguments[0] + "']");
+    var slots = pitch ? Array.from(pitch.querySelectorAll(selector)).map(function (slot) {
+        var label = slot.querySelector('span.label');
+        var rating = slot.querySelector('div.playerOverview div.rating');
+        return {
+            index: parseInt(slot.getAttribute('index'), 10),
+            position: label ? label.textContent.trim() : '',
+            locked: slot.classList.contains('locked'),
+            rating: rating ? rating.textContent.trim() : ''
+        };
+    }) : [];
+    var popover = document.querySelector('div.ut-popover');
+    // The checklist is rendered in the squad panel and again in the popover, the first one is enough
+    var checklist = document.querySelector('ul.sbc-requirements-checklist');
+    var requirements = Array.from(checklist ? checklist.querySelectorAll('li') : []).map(function (item) {
+        return {text: item.textContent.trim(), complete: item.classList.contains('complete')};
+    });
+    return {
+        pitch_present: !!pitch,
+        slots: slots,
+        popover_visible: !!popover && popover.classList.contains('show'),
+        requirements: requirements
+    };
+"""
+
+@dataclass
+class SquadSlot:
+    index: int
+    position: str
+    locked: bool
+    rating: str
+
+    @property
+    def filled(self):
+        return bool(self.rating)
+
+@dataclass
+class SquadSnapshot:
+    """
+    The state of the '.ut-squad-pitch-view.sbc' squad, read with one execute_script call.
+
+    Attributes:
+        slots (dict): SquadSlot entries keyed by slot index.
+        popover_visible (bool): True if the SBC requirements popover has the 'show' class.
+        requirements (list): (text, complete) tuples for each 'sbc-requirements-checklist' item.
+            requirement_set parses them.
+    """
+    slots: dict = field(default_factory=dict)
+    popover_visible: bool = False
+    requirements: list = field(default_factory=list)
+
+    @classmethod
+    @traced
+    def read(cls, driver):
+        wait_for_element(driver, *locators.SQUAD_PITCH)
+        snapshot = cls()
+        snapshot._apply(driver.execute_script(SQUAD_SNAPSHOT_SCRIPT, None))
+        logging.info(f"Squad snapshot: {len(snapshot.open_slots())} open of {len(snapshot.slots)} slots.")
+        return snapshot
+
+    @traced
+    def refresh_slot(self, driver, index):
+        """Re-reads a single slot (plus the popover and checklist state), e.g. after adding a player to it."""
+        self._apply(driver.execute_script(SQUAD_SNAPSHOT_SCRIPT, index))
+        slot = self.slots.get(index)
+        logging.info(f"Slot {index} refreshed: {slot}")
+        return slot
+
+    def open_slots(self, limit=11):
+        """Returns the slots below index limit that are neither locked nor filled, in index order."""
+        return [slot for index, slot in sorted(self.slots.items())
+                if index < limit and not slot.locked and not slot.filled]
+
+    @property
+    def requirements_complete(self):
+        return bool(self.requirements) and all(complete for _, complete in self.requirements)
+
+    @property
+    def requirement_set(self):
+        return RequirementSet.parse(self.requirements)
+
+    def _apply(self, state):
+        for slot in state["slots"]:
+            self.slots[slot["index"]] = SquadSlot(slot["index"], slot["position"], slot["locked"], slot["rating"])
+        self.popover_visible = state["popover_visible"]
+        self.requirements = [(item["text"], item["complete"]) for item in state["requirements"]]
+
+@traced
+def hide_sbc_requirements_popover(driver, snapshot):
+    if snapshot.popover_visible:
+        click_when_clickable(driver, *locators.SQUAD_SUMMARY)
+        snapshot.popover_visible = False
+        logging.info("Hid the SBC Requirements popover.")
+
+def read_requirements(driver):
+    """Reads the requirements checklist (with the squad, in one call) as a RequirementSet."""
+    wait_for_element(driver, *locators.REQUIREMENTS_CHECKLIST)
+    return SquadSnapshot.read(driver).requirement_set
+
 # Returns bool indicating the validity of the squad
+@traced
 def check_sbc_requirements(driver):
-    squad_valid = False
-
     try:
-        # Wait for the requirements checklist to be present
-        requirements_list = wait_for_element(driver, By.CSS_SELECTOR, "ul.sbc-requirements-checklist")
-
-        # Get all list items within the requirements checklist
-        list_items = requirements_list.find_elements(By.TAG_NAME, "li")
-
-        # Check if all list items have the class "complete"
-        for item in list_items:
-            if "complete" not in item.get_attribute("class"):
-                raise Exception(f"Requirement not complete: {item.text}")
-
-        print("All SBC requirements are complete.")
-        squad_valid = True
-    except Exception as e:
-        logging.error(f"SBC requirements check failed: {str(e)}")
-        squad_valid = False
+        requirements = read_requirements(driver)
+    except selenium_exceptions.TimeoutException:
+        logging.error("SBC requirements check failed: the requirements checklist isn't showing.")
+        return False
 
-    return squad_valid
+    if not requirements.complete:
+        logging.error(f"SBC requirements incomplete: {[item.text for item in requirements.incomplete]}")
+        return False
+    logging.info(f"All SBC requirements are complete: {requirements}")
+    return True
 
+@traced
+@retried
 def submit_squad(driver):
+    # Never submit a squad the checklist doesn't show as complete, whatever the caller checked
+    requirements = read_requirements(driver)
+    if not requirements.complete:
+        raise Exception(f"Not submitting the squad, SBC requirements incomplete: {[item.text for item in requirements.incomplete]}")
+
     # Wait for the "Submit" button to be clickable
-    click_when_clickable(driver, By.XPATH, "//button[contains(@class, 'ut-squad-tab-button-control') and contains(@class, 'call-to-action') and contains(., 'Submit')]")
+    click_when_clickable(driver, *locators.SUBMIT_READY_BUTTON)
+    sbc_catalog.invalidate_opened()
+    club_index.squad_submitted()
+    journal.record_sbc("squad_submitted", sbc_catalog.opened)
     logging.info("Clicked on the 'Submit' button.")
 
 # In some situations, submitting the squad may be possible before the code has built anything.
+@traced
 def presubmit_squad_if_available(driver):
     # Check if the "Submit" button is present
     try:
-        submit_button = driver.find_element(By.XPATH, "//button[contains(@class, 'ut-squad-tab-button-control') and contains(., 'Submit')]")
+        submit_button = driver.find_element(*locators.SUBMIT_BUTTON)
         if submit_button.is_displayed() and submit_button.is_enabled():
+            requirements = SquadSnapshot.read(driver).requirement_set
+            if not requirements.complete:
+                logging.info(f"Submit button enabled, but SBC requirements incomplete: {[item.text for item in requirements.incomplete]}")
+                return False
             submit_button.click()  # Click the Submit button
+            sbc_catalog.invalidate_opened()
+            club_index.squad_submitted()
+            journal.record_sbc("squad_submitted", sbc_catalog.opened)
             claim_rewards(driver)
             return True
     except selenium_exceptions.NoSuchElementException:
         logging.error("Submit button not found, proceeding with squad building.")
     return False
 
+# Not @retried itself: click_when_clickable retries the click
+@traced
 def claim_rewards(driver):
     # Wait for the "Claim Rewards" button to be clickable
-    claim_button = click_when_clickable(driver, By.XPATH, "//button[contains(@class, 'btn-standard') and contains(@class, 'call-to-action') and contains(text(), 'Claim Rewards')]")
+    claim_button = click_when_clickable(driver, *locators.CLAIM_REWARDS_BUTTON)
+    run_stats["sbcs_completed"] += 1
+    journal.record_sbc("rewards_claimed", sbc_catalog.opened)
     logging.info(f"Clicked on the 'Claim Rewards' button.")
 
+@traced
+@retried
 def select_position(driver, position="", index=-1):
     """
     Selects a squad slot based on either the provided index attribute or the position label.
@@ -283,19 +572,18 @@ def select_position(driver, position="", index=-1):
     """
     try:
         # Wait for the pitch view to be visible
-        wait_for_element(driver, By.CSS_SELECTOR, ".ut-squad-pitch-view.sbc")
+        wait_for_element(driver, *locators.SQUAD_PITCH)
         
         selected_slot = None
         if index >= 0:
             # Select slot using its index attribute
-            slot_selector = f"div.ut-squad-slot-view[index='{index}']"
-            selected_slot = driver.find_element(By.CSS_SELECTOR, slot_selector)
+            selected_slot = driver.find_element(*locators.SQUAD_SLOT.format(index=index))
             logging.info(f"Selecting slot with index: {index}")
         else:
             # Find all squad slots that are not locked
-            slots = driver.find_elements(By.CSS_SELECTOR, "div.ut-squad-slot-view:not(.locked)")
+            slots = driver.find_elements(*locators.OPEN_SQUAD_SLOTS)
             for s in slots:
-                label_element = s.find_element(By.CSS_SELECTOR, "span.label")
+                label_element = s.find_element(*locators.SLOT_LABEL)
                 if label_element.text.strip() == position:
                     selected_slot = s
                     logging.info(f"Selecting slot with position: {position}")
@@ -305,7 +593,7 @@ def select_position(driver, position="", index=-1):
                 return None
 
         # Extract the position label from the selected slot
-        label_element = selected_slot.find_element(By.CSS_SELECTOR, "span.label")
+        label_element = selected_slot.find_element(*locators.SLOT_LABEL)
         slot_position = label_element.text.strip()
 
         # Hover over the slot and click it
@@ -319,6 +607,7 @@ def select_position(driver, position="", index=-1):
         logging.error(f"Error selecting slot (position='{position}', index={index}): {str(e)}")
         return None
 
+@traced
 def is_slot_filled(driver, index):
     """
     Checks if the squad slot at the given index is filled by looking for a child div with class "playerOverview"
@@ -333,11 +622,10 @@ def is_slot_filled(driver, index):
     """
     try:
         # Locate the slot by its index attribute.
-        slot_selector = f"div.ut-squad-slot-view[index='{index}']"
-        slot = driver.find_element(By.CSS_SELECTOR, slot_selector)
+        slot = driver.find_element(*locators.SQUAD_SLOT.format(index=index))
         
         # Look for the rating element under the playerOverview div.
-        rating_element = slot.find_element(By.CSS_SELECTOR, "div.playerOverview div.rating")
+        rating_element = slot.find_element(*locators.SLOT_RATING)
         rating_text = rating_element.get_attribute("textContent").strip()
         
         if rating_text:
@@ -351,6 +639,7 @@ def is_slot_filled(driver, index):
         logging.error(f"Error checking if slot {index} is filled: {str(e)}")
         return False
 
+@traced
 def is_slot_locked(driver, index):
     """
     Checks if the squad slot at the given index is locked by checking its class attribute.
@@ -364,8 +653,7 @@ def is_slot_locked(driver, index):
     """
     try:
         # Locate the slot by its index attribute.
-        slot_selector = f"div.ut-squad-slot-view[index='{index}']"
-        slot = driver.find_element(By.CSS_SELECTOR, slot_selector)
+        slot = driver.find_element(*locators.SQUAD_SLOT.format(index=index))
         
         # Get the class attribute of the slot
         classes = slot.get_attribute("class").split()
@@ -382,27 +670,30 @@ def is_slot_locked(driver, index):
         logging.error(f"Error checking if slot {index} is locked: {str(e)}")
         return False
 
-def click_add_player_button(driver):
+@traced
+def click_add_player_button(driver, label="Add Player"):
     """
     Clicks the 'Add Player' button if it is visible and enabled.
     
     Args:
         driver: The Selenium WebDriver instance.
+        label (str, optional): The button text. Use "Swap Player" to replace the player in a filled slot. Defaults to "Add Player".
         
     Returns:
         bool: True if the button was successfully clicked, else False.
     """
     # Wait for the button to be visible and clickable
-    add_player_button = driver.find_element(By.XPATH, "//button[span[@class='btn-text' and text()='Add Player']]")
+    add_player_button = driver.find_element(*locators.ADD_PLAYER_BUTTON.format(label=label))
 
     if add_player_button.is_displayed() and add_player_button.is_enabled():
         add_player_button.click()  # Click the button
-        logging.info("Clicked 'Add Player' button successfully.")
+        logging.info(f"Clicked '{label}' button successfully.")
         return True  # Button clicked successfully
     else:
-        logging.warning("Add Player button is not displayed or enabled.")
+        logging.warning(f"{label} button is not displayed or enabled.")
         return False  # Button is not clickable
 
+@traced
 def close_active_filter_by_position(driver, position):
     """
     Clicks the (close) button within the active element if it is visible and enabled.
@@ -415,14 +706,14 @@ def close_active_filter_by_position(driver, position):
         bool: True if the button was successfully clicked, else False.
     """
     # Locate the active element that contains the desired position
-    active_elements = driver.find_elements(By.CSS_SELECTOR, "div.has-selection")
+    active_elements = driver.find_elements(*locators.ACTIVE_FILTERS)
     
     for active_element in active_elements:
         # Find the span with the position text
-        position_label = active_element.find_element(By.CSS_SELECTOR, "span.label")
+        position_label = active_element.find_element(*locators.ACTIVE_FILTER_LABEL)
         if position_label.text.strip() == position:
             # Locate the button within the matching active element
-            button = active_element.find_element(By.CSS_SELECTOR, "button.flat.ut-search-filter-control--row-button")
+            button = active_element.find_element(*locators.ACTIVE_FILTER_REMOVE)
             
             if button.is_displayed() and button.is_enabled():
                 button.click()  # Click the button
@@ -432,28 +723,50 @@ def close_active_filter_by_position(driver, position):
     logging.warning(f"No active element found with position '{position}' or button is not clickable.")
     return False  # No matching active element or button is not enabled/clickable
 
+@traced
 def click_search_button(driver):
     # Wait until the "Search" button is clickable and perform the click
-    search_button = click_when_clickable(driver, By.XPATH, "//button[contains(@class, 'btn-standard') and contains(@class, 'call-to-action') and text()='Search']")
+    search_button = click_when_clickable(driver, *locators.SEARCH_BUTTON)
     logging.info("Clicked on the 'Search' button successfully.")
     return search_button  # Return the clicked button if needed
 
+@traced
 def click_first_add_player(driver):
-    # Construct the XPath to find the first "add" button
-    add_button_xpath = "//li//button[contains(@class, 'add')]"
-    
-    # Use the existing click_when_clickable utility function
-    add_button = click_when_clickable(driver, By.XPATH, add_button_xpath)
+    # Click the first "add" button in the search results
+    add_button = click_when_clickable(driver, *locators.RESULT_ADD_BUTTON)
     
     logging.info("Clicked the first available 'Add' button.")
     return add_button  # Return the button or perform further actions as needed
 
+@traced
+def click_add_player_rated(driver, rating):
+    """
+    Clicks the 'Add' button of the first search result rated rating, e.g. the player the solver picked.
 
-def toggle_ignore_position(driver):
-    # Construct the XPath to find the "Ignore Position" toggle
-    ignore_position_xpath = "//span[contains(text(), 'Ignore Position')]/../div[contains(@class, 'ut-toggle-control')]/div[contains(@class, 'ut-toggle-control--track')]"
+    Returns:
+        WebElement: The button clicked, or None if no result on the page has that rating.
+    """
+    script = """
+        var items = document.querySelectorAll(arguments[0]);
+        for (var i = 0; i < items.length; i++) {
+            var rating = items[i].querySelector(arguments[1]);
+            if (rating && rating.textContent.trim() === arguments[2]) return items[i].querySelector(arguments[3]);
+        }
+        return null;
+    """
+    add_button = driver.execute_script(script, locators.RESULT_ITEM.value, locators.RESULT_RATING.value, str(rating),
+                                       locators.RESULT_ITEM_ADD_BUTTON.value)
+    if add_button is None:
+        logging.warning(f"No search result is rated {rating}.")
+        return None
+    add_button.click()
+    logging.info(f"Clicked the 'Add' button of a {rating} rated player.")
+    return add_button
 
-    toggle = driver.find_element(By.XPATH, ignore_position_xpath)
+
+@traced
+def toggle_ignore_position(driver):
+    toggle = driver.find_element(*locators.IGNORE_POSITION_TOGGLE)
 
     if toggle.is_displayed() and toggle.is_enabled():
         toggle.click()  # Click the button
@@ -463,16 +776,122 @@ def toggle_ignore_position(driver):
         logging.warning("Ignore Position toggle is not displayed or enabled.")
         return False  # is not clickable
 
-def set_sbc_storage(driver):
-    click_when_clickable(
-        driver,
-        By.XPATH,
-        "//div[contains(@class, 'ut-search-filter-control--row') and .//span[text()='My Club']]"
-    )
+@traced
+def set_storage(driver, storage = "SBC Storage"):
+    click_when_clickable(driver, *locators.STORAGE_FILTER)
     logging.info("Clicked on 'My Club' filter.")
-    click_when_clickable(
-        driver,
-        By.XPATH,
-        "//li[contains(@class, 'with-icon') and text()='SBC Storage']"
-    )
-    logging.info("Clicked on 'SBC Storage'.")
\ No newline at end of file
+    click_when_clickable(driver, *locators.ICON_FILTER_OPTION.format(option=storage))
+    logging.info(f"Clicked on '{storage}'.")
+
+@traced
+def set_sbc_storage(driver):
+    set_storage(driver, "SBC Storage")
+
+# Reads the search filter panel in one call: the sort dropdown's label, the text of every span in each filter
+# row, and the labels of the active (removable) filters such as the slot's position.
+SEARCH_FILTERS_SCRIPT = """
+    var sort = document.querySelector('div.inline-list-select.ut-drop-down-control span.label');
+    var rows = Array.from(document.querySelectorAll('div.ut-search-filter-control--row')).map(function (row) {
+        return Array.from(row.querySelectorAll('span')).map(function (span) { return span.textContent.trim(); });
+    });
+    var selections = Array.from(document.querySelectorAll('div.has-selection span.label')).map(function (label) {
+        return label.textContent.trim();
+    });
+    return {sort: sort ? sort.textContent.trim() : null, rows: rows, selections: selections};
+"""
+
+# The options of each filter row, used to tell the rows apart by the values they show
+FILTER_OPTIONS = {
+    "storage": ("My Club", "SBC Storage"),
+    "quality": ("Bronze", "Silver", "Gold", "Special"),
+    "rarity": ("Common", "Rare"),
+}
+FILTER_TITLES = {"storage": "My Club", "quality": "Quality", "rarity": "Rarity"}
+POSITIONS = ("GK", "RB", "RWB", "CB", "LB", "LWB", "CDM", "CM", "CAM", "RM", "LM", "RW", "LW", "CF", "ST")
+
+@dataclass
+class SearchFilterState:
+    """
+    The player search filters: (storage, sort, quality, rarity, position).
+
+    When read from the page, "" means the filter is unset and None that it couldn't be read. When used as the
+    desired state, None means "leave as is", except for position where None means the position filter is removed.
+
+    Attributes:
+        storage (str): "My Club" or "SBC Storage".
+        sort (str): The sort order, e.g. "Lowest Quick Sell".
+        quality (str): e.g. "Bronze".
+        rarity (str): "Common" or "Rare".
+        position (str): The active position filter, e.g. "GK".
+    """
+    storage: str = None
+    sort: str = None
+    quality: str = None
+    rarity: str = None
+    position: str = None
+
+    @classmethod
+    @traced
+    def read(cls, driver):
+        state = driver.execute_script(SEARCH_FILTERS_SCRIPT)
+        filters = cls(sort=state["sort"] or None)
+        for spans in state["rows"]:
+            for name, options in FILTER_OPTIONS.items():
+                if FILTER_TITLES[name] in spans or any(option in spans for option in options):
+                    value = next((option for option in options if option in spans and option != FILTER_TITLES[name]), "")
+                    # The storage row's title is also its default value
+                    setattr(filters, name, value or ("My Club" if name == "storage" else ""))
+                    break
+        filters.position = next((label for label in state["selections"] if label in POSITIONS), "")
+        return filters
+
+    def diff(self, desired, include_unreadable=True):
+        """
+        Returns the fields of desired that differ from this (read) state, as {field: desired value}. Fields that
+        couldn't be read count as different unless include_unreadable is False. The position filter can only be
+        removed, so it is only compared when desired.position is None.
+        """
+        changes = {}
+        for name in ("storage", "sort", "quality", "rarity"):
+            wanted = getattr(desired, name)
+            current = getattr(self, name)
+            if wanted is not None and current != wanted and (current is not None or include_unreadable):
+                changes[name] = wanted
+        if desired.position is None and self.position:
+            changes["position"] = None
+        return changes
+
+@traced
+def apply_search_filters(driver, desired):
+    """
+    Applies only the search filters that differ from the panel's current state, then re-reads the panel to
+    verify them so that a search never runs with a stale filter.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        desired (SearchFilterState): The filters to search with.
+
+    Returns:
+        SearchFilterState: The verified filter state.
+    """
+    for attempt in range(3):
+        current = SearchFilterState.read(driver)
+        # Filters the panel doesn't show are set blindly the first time and can't be verified afterwards
+        changes = current.diff(desired, include_unreadable=attempt == 0)
+        if not changes:
+            return current
+        logging.info(f"Search filters {current} need changes: {changes}")
+        if attempt == 2:
+            break
+        if "storage" in changes:
+            set_storage(driver, changes["storage"])
+        if "sort" in changes:
+            set_sorting(driver, changes["sort"])
+        if "quality" in changes:
+            set_quality(driver, changes["quality"])
+        if "rarity" in changes:
+            set_rarity(driver, changes["rarity"])
+        if "position" in changes and current.position:
+            close_active_filter_by_position(driver, current.position)
+        wait_until(driver, transitions_finished(), name="search_filters_applied")
+    raise Exception(f"Search filters could not be set to {desired}, the panel shows {current}.")
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+The requirements checklist of an SBC (ul.sbc-requirements-checklist) as typed constraints.
+
+Each checklist item is parsed from its text into a Requirement: what it constrains (the player count, the player
+quality, the number of rare players, players of a quality, the squad rating or chemistry), how ("min", "max" or
+"exactly") and the value, along with whether the web app shows it complete. Items the parser doesn't know are
+kept as "other" and only their completion is used.
+
+The checklist is read with the squad (see SquadSnapshot), so it is re-read after every player added at no extra
+cost. unsatisfiable() tells the build when a requirement can no longer be met with the open slots left, so it can
+swap the player it just added or stop, rather than filling the rest of the squad first.
+"""
+import re
+from dataclasses import dataclass, field, replace
+
+from ratings import QUALITY_RATINGS, rating_matches_quality
+from solver import squad_rating
+
+QUALITY_NAMES = ("Bronze", "Silver", "Gold")
+
+# The kind of each checklist item, by the start of its text
+KINDS = (
+    (re.compile(r"^(number of players|# of players|players in the squad)", re.I), "players"),
+    (re.compile(r"^player quality", re.I), "quality"),
+    (re.compile(r"^(bronze|silver|gold) players", re.I), "quality_count"),
+    (re.compile(r"^rare", re.I), "rare"),
+    (re.compile(r"^(team|squad) rating", re.I), "rating"),
+    (re.compile(r"^(team |total )?chemistry", re.I), "chemistry"),
+)
+COMPARISON = re.compile(r"\b(min|max|exactly)\b\.?", re.I)
+
+@dataclass
+class Requirement:
+    """
+    One checklist item.
+
+    Attributes:
+        kind (str): "players", "quality", "quality_count", "rare", "rating", "chemistry" or "other".
+        comparison (str): "min", "max" or "exactly". None for "other".
+        value: The number, or for "quality" the quality name, e.g. "Gold".
+        quality (str): For "quality_count", the quality counted.
+        text (str): The item's text.
+        complete (bool): True if the web app shows the item as met.
+    """
+    kind: str
+    comparison: str
+    value: object
+    text: str
+    complete: bool
+    quality: str = None
+
+def parse_requirement(text, complete):
+    kind = next((kind for pattern, kind in KINDS if pattern.search(text)), "other")
+    comparison = COMPARISON.search(text)
+    comparison = comparison.group(1).lower() if comparison else None
+    _, _, detail = text.partition(":")
+    quality = None
+    if kind == "quality":
+        value = next((name for name in QUALITY_NAMES if name.lower() in detail.lower()), None)
+    else:
+        number = re.search(r"\d+", detail or text)
+        value = int(number.group()) if number else None
+        if kind == "quality_count":
+            quality = text.split()[0].capitalize()
+    if kind != "other" and (comparison is None or value is None):
+        # Recognised, but not in a form we can reason about
+        kind = "other"
+    return Requirement(kind, comparison, value, text, complete, quality)
+
+@dataclass
+class RequirementSet:
+    items: list = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, checklist):
+        """Parses (text, complete) pairs, as SquadSnapshot.requirements holds them."""
+        return cls([parse_requirement(text, complete) for text, complete in checklist])
+
+    def of_kind(self, kind):
+        return [item for item in self.items if item.kind == kind]
+
+    @property
+    def complete(self):
+        return bool(self.items) and all(item.complete for item in self.items)
+
+    @property
+    def incomplete(self):
+        return [item for item in self.items if not item.complete]
+
+    def quality_range(self):
+        """The (lowest, highest) quality allowed, as names. None for no limit."""
+        low, high = None, None
+        for item in self.of_kind("quality"):
+            if item.comparison in ("min", "exactly"):
+                low = item.value
+            if item.comparison in ("max", "exactly"):
+                high = item.value
+        return low, high
+
+    def refine(self, requirements):
+        """
+        Returns a copy of solver Requirements narrowed by this checklist: its quality range, rare count and squad
+        rating floor, where the checklist states them.
+
+        The pitch doesn't show which of the squad's other players are rare, so the rare count is only reduced by
+        them when the checklist already shows it met. Otherwise the players to add are asked for the whole count
+        (capped at how many they are), which may be more rares than the squad needs.
+        """
+        low, high = self.quality_range()
+        changes = {}
+        if low:
+            changes["min_quality"] = low
+        if high:
+            changes["max_quality"] = high
+        for item in self.of_kind("rare"):
+            if item.complete and item.comparison != "max":
+                # The squad's other players already make the count, so the players to add must not change it
+                if item.comparison == "exactly":
+                    changes["max_rare"] = 0
+                continue
+            if item.comparison in ("min", "exactly"):
+                changes["min_rare"] = max(requirements.min_rare, min(item.value, requirements.players))
+            if item.comparison in ("max", "exactly"):
+                changes["max_rare"] = item.value
+        for item in self.of_kind("rating"):
+            if item.comparison in ("min", "exactly"):
+                changes["min_squad_rating"] = item.value
+        return replace(requirements, **changes)
+
+    def unsatisfiable(self, snapshot, pending=()):
+        """
+        Checks for requirements the squad can no longer meet, however its pending slots are filled.
+
+        Args:
+            snapshot (SquadSnapshot): The squad, with its slots' ratings.
+            pending (iterable): The slot indices the build will still fill (or replace the player of).
+
+        Returns:
+            list: (Requirement, slot indices) pairs. The slot indices are the players breaking the requirement,
+                which a swap could fix, or empty if no swap of a player already added can.
+        """
+        pending = set(pending)
+        filled = {index: slot for index, slot in snapshot.slots.items() if slot.filled and index not in pending}
+        low, high = self.quality_range()
+        problems = []
+        for item in self.incomplete:
+            if item.kind == "quality":
+                allowed = QUALITY_NAMES[QUALITY_NAMES.index(low) if low else 0:QUALITY_NAMES.index(high) + 1 if high else len(QUALITY_NAMES)]
+                wrong = [index for index, slot in filled.items() if not any(rating_matches_quality(slot.rating, quality) for quality in allowed)]
+                if wrong:
+                    problems.append((item, sorted(wrong)))
+            elif item.kind == "players" and item.comparison in ("max", "exactly") and len(filled) > item.value:
+                problems.append((item, []))
+            elif item.kind == "rating" and item.comparison in ("min", "exactly"):
+                # Even the best players allowed in the pending slots fall short
+                ratings = [int(slot.rating) for slot in filled.values() if str(slot.rating).isdigit()]
+                best = QUALITY_RATINGS.get(high, (0, 99))[1]
+                if squad_rating(ratings + [best] * len(pending)) < item.value:
+                    problems.append((item, []))
+        return problems
+
+    def __str__(self):
+        return "; ".join(f"{item.text} ({'complete' if item.complete else 'incomplete'})" for item in self.items)
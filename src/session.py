@@ -0,0 +1,154 @@
+"""
+Restores the web app session with a single page load, or goes straight to the login flow when it can't.
+
+Chrome runs with a persistent profile (config.CHROME_USER_DATA_DIR), so the web app's cached assets and storage
+stay warm between runs and the profile usually still holds the session's cookies. The cookies are also saved to
+config.COOKIES_FILE after every login, with when they were saved. Before the first page load, the session manager
+looks at the profile's cookie jar and then at the saved cookies:
+    profile   The profile's auth cookies haven't expired. The web app is loaded as is.
+    cookies   The saved ones haven't. They are set through the DevTools protocol before the web app loads, so the
+              page is loaded once rather than loaded, given the cookies and reloaded.
+    login     Neither has a live session (the auth cookies, SESSION_AUTH_COOKIES, expired or the session is older
+              than SESSION_MAX_AGE_HOURS), so the login flow starts from the first load.
+
+The logged-in state is then confirmed with a wait of up to SESSION_READY_TIMEOUT for the navigation bar (or the
+login button, which ends the wait early), and a restore that doesn't reach it falls back to logging in. The time
+from the start of the restore to the navigation bar is logged and added to run_metrics under the path taken.
+"""
+import json
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
+import selenium.common.exceptions as selenium_exceptions
+
+import config
+from login import is_logged_in, login
+from utilities import run_metrics, session_state, wait_until
+
+# A session expiring this soon (in seconds) would likely run out mid-run, so it is treated as expired
+EXPIRY_MARGIN = 600
+
+def session_domain():
+    """The cookie domain of the web app: the last two labels of APP_URL's host (e.g. "ea.com"), or the host itself."""
+    host = urlsplit(config.APP_URL).hostname or ""
+    labels = host.split(".")
+    if len(labels) <= 2 or all(label.isdigit() for label in labels):
+        return host
+    return ".".join(labels[-2:])
+
+def cookie_expiry(cookie):
+    """When the cookie expires (epoch seconds), from WebDriver's "expiry" or the DevTools protocol's "expires". None for a session cookie."""
+    expiry = cookie.get("expiry", cookie.get("expires"))
+    return expiry if expiry and expiry > 0 else None
+
+def session_expires_at(cookies, saved_at=None):
+    """
+    When a session made of cookies stops being usable: the earliest expiry among its auth cookies (or among all its
+    cookies, if none of them is an auth cookie), capped at SESSION_MAX_AGE_HOURS after saved_at. None if unknown.
+    """
+    auth = [cookie for cookie in cookies if cookie.get("name") in config.SESSION_AUTH_COOKIES]
+    expiries = [expiry for expiry in (cookie_expiry(cookie) for cookie in auth or cookies) if expiry]
+    if saved_at and config.SESSION_MAX_AGE_HOURS > 0:
+        expiries.append(saved_at + config.SESSION_MAX_AGE_HOURS * 3600)
+    return min(expiries) if expiries else None
+
+def is_live(cookies, saved_at=None):
+    """True if the cookies hold a session that won't expire within EXPIRY_MARGIN."""
+    if not cookies:
+        return False
+    expires_at = session_expires_at(cookies, saved_at)
+    return expires_at is None or expires_at - time.time() > EXPIRY_MARGIN
+
+def load_saved_session(session_file=None):
+    """
+    Reads the saved session as {"saved_at": ..., "cookies": [...]}. Files written before the expiry tracking hold
+    just the cookie list, and count as saved when the file was last written.
+    """
+    path = session_file or config.COOKIES_FILE
+    try:
+        with open(path, 'r') as file:
+            session = json.load(file)
+    except FileNotFoundError:
+        return {"saved_at": None, "cookies": []}
+    if isinstance(session, list):
+        session = {"saved_at": os.path.getmtime(path), "cookies": session}
+    return session
+
+def browser_cookies(driver):
+    """Every cookie in the browser's cookie jar for the web app's domain, read without loading a page."""
+    domain = session_domain()
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    return [cookie for cookie in cookies if cookie["domain"].lstrip(".").endswith(domain)]
+
+def set_cookies(driver, cookies):
+    """Puts cookies in the browser's cookie jar through the DevTools protocol, which unlike add_cookie doesn't need the page loaded first."""
+    params = []
+    for cookie in cookies:
+        param = {key: cookie[key] for key in ("name", "value", "path", "secure", "httpOnly", "sameSite") if key in cookie}
+        param["domain"] = cookie.get("domain") or f".{session_domain()}"
+        expiry = cookie_expiry(cookie)
+        if expiry:
+            param["expires"] = expiry
+        params.append(param)
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+
+def save_session(driver, session_file=None):
+    """Saves the browser's cookies for the web app's domain, and when, for the next run's restore."""
+    cookies = browser_cookies(driver)
+    with open(session_file or config.COOKIES_FILE, 'w') as file:
+        json.dump({"saved_at": time.time(), "cookies": cookies}, file)
+    expires_at = session_expires_at(cookies)
+    logging.info(f"Saved {len(cookies)} session cookies, expiring {time.ctime(expires_at) if expires_at else 'with the browser session'}.")
+
+def restore_path(driver):
+    """Picks the restore path ("profile", "cookies" or "login") from the cookies alone, and sets the saved cookies if it's "cookies"."""
+    if config.CHROME_USER_DATA_DIR:
+        # Any site sets some cookies, so the profile only counts with an auth cookie
+        cookies = browser_cookies(driver)
+        if any(cookie["name"] in config.SESSION_AUTH_COOKIES for cookie in cookies) and is_live(cookies):
+            return "profile"
+    saved = load_saved_session()
+    if is_live(saved["cookies"], saved["saved_at"]):
+        set_cookies(driver, saved["cookies"])
+        return "cookies"
+    if saved["cookies"]:
+        expires_at = session_expires_at(saved["cookies"], saved["saved_at"])
+        logging.info(f"The saved session expired {time.ctime(expires_at)}, logging in.")
+    return "login"
+
+def restore_session(driver, interactive=True):
+    """
+    Gets the driver to the logged-in web app, restoring the session where possible (see the module docstring).
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        interactive (bool): Passed on to login. If False, a login that needs 2FA raises instead of prompting.
+
+    Returns:
+        str: The path that got there: "profile", "cookies" or "login".
+    """
+    start = time.monotonic()
+    path = restore_path(driver)
+    driver.get(config.APP_URL)
+    try:
+        state = wait_until(driver, session_state(), config.SESSION_READY_TIMEOUT, name="session_state")
+    except selenium_exceptions.TimeoutException:
+        state = None
+    if state == "logged_in" and path == "login":
+        # The profile had a session its cookies didn't show as live, e.g. one without an expiry
+        path = "profile"
+    elif state != "logged_in":
+        if path != "login":
+            logging.warning(f"The {path} session didn't restore ({state or 'no navigation bar'}), logging in.")
+            path = "login"
+        login(driver, interactive)
+        if not is_logged_in(driver, config.LONGER_WAIT_DURATION):
+            raise Exception("Logging in didn't reach the web app's navigation bar.")
+    save_session(driver)
+
+    ready = time.monotonic() - start
+    run_metrics[f"session_{path}_seconds"] = ready
+    logging.info(f"Session ready in {ready:.2f}s through the {path} path.")
+    return path
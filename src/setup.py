@@ -1,21 +1,12 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import os
 
-# Let webdriver-manager download the driver
-chrome_driver_path = ChromeDriverManager().install()
+from provisioning import resolve_driver_path
 
-# Check if webdriver-manager downloaded the WRONG file
-if "THIRD_PARTY_NOTICES" in chrome_driver_path:
-    print("⚠️ webdriver-manager downloaded an invalid file. Retrying...")
-    os.remove(chrome_driver_path)  # Delete bad file
-    chrome_driver_path = ChromeDriverManager().install()  # Try downloading again
-
-# Ensure the driver is executable
-os.chmod(chrome_driver_path, 0o755)
+# Resolve the driver (downloading it if needed) and cache it for later runs
+chrome_driver_path = resolve_driver_path()
 
 # Start Chrome WebDriver with the correct driver path
 driver = webdriver.Chrome(service=Service(chrome_driver_path))
 
-print("✅ ChromeDriver started successfully!")
\ No newline at end of file
+print(f"✅ ChromeDriver started successfully from {chrome_driver_path}!")
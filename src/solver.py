@@ -0,0 +1,238 @@
+"""
+Picks the cheapest players from the club index that meet an SBC's requirements, before any player is placed.
+
+Players of the same rating and rarity are grouped into classes first, cheapest first, so the solvers work on a few
+dozen classes rather than hundreds of players:
+    greedy  Takes the cheapest players that keep the rare count in range, then upgrades the lowest rated ones until
+            the squad rating floor is met. Fast, but not always the cheapest.
+    exact   Branch and bound over the classes, starting from the greedy squad, pruning branches that can't beat the
+            best squad found or can't meet the rare count or rating floor. Falls back to the best squad found after
+            SOLVER_NODE_LIMIT nodes.
+
+What a player costs is a guess from what the index knows: its rating, plus a premium for rare cards and for tradeable
+ones (which could be sold instead), less a discount for SBC storage (which is only good for SBCs).
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+
+import config
+
+QUALITIES = ("Bronze", "Silver", "Gold")
+RARE_COST = 4
+TRADEABLE_COST = 3
+STORAGE_DISCOUNT = 2
+
+@dataclass
+class Requirements:
+    """
+    What the players added to an SBC's open slots must meet.
+
+    Attributes:
+        players (int): How many players to add.
+        min_quality (str): The lowest quality allowed, e.g. "Silver". None for any.
+        max_quality (str): The highest quality allowed. None for any.
+        min_rare (int): The fewest rare players among those added.
+        max_rare (int): The most rare players among those added. None for no limit.
+        min_squad_rating (int): The squad rating floor, counting fixed_ratings too. None for no floor.
+        fixed_ratings (tuple): The ratings of the players already in the squad.
+    """
+    players: int
+    min_quality: str = None
+    max_quality: str = None
+    min_rare: int = 0
+    max_rare: int = None
+    min_squad_rating: int = None
+    fixed_ratings: tuple = ()
+
+    def allows_quality(self, quality):
+        index = QUALITIES.index(quality) if quality in QUALITIES else -1
+        low = QUALITIES.index(self.min_quality) if self.min_quality else 0
+        high = QUALITIES.index(self.max_quality) if self.max_quality else len(QUALITIES) - 1
+        return low <= index <= high
+
+@dataclass
+class Solution:
+    players: list
+    cost: float
+    squad_rating: int
+    exact: bool
+    nodes: int = 0
+
+@dataclass
+class PlayerClass:
+    """The eligible players of one rating and rarity, cheapest first, and what each costs."""
+    rating: int
+    rare: bool
+    players: list = field(default_factory=list)
+    costs: list = field(default_factory=list)
+
+def squad_rating(ratings):
+    """
+    The squad rating of up to 11 player ratings (empty slots count as 0), as the web app computes it: players rated
+    above the average add their excess over it once more, and the total is divided by 11 and rounded down.
+    """
+    ratings = list(ratings)
+    total = sum(ratings)
+    average = total / 11
+    excess = sum(rating - average for rating in ratings if rating > average)
+    return math.floor(round((total + excess) / 11, 6))
+
+def player_cost(player):
+    return (player["rating"] + RARE_COST * (player["rarity"] != "Common") + TRADEABLE_COST * (not player["untradeable"])
+            - STORAGE_DISCOUNT * (player["location"] == "sbc_storage"))
+
+def player_classes(requirements, inventory):
+    """
+    Groups the eligible players of inventory (club index rows) into PlayerClasses, cheapest first. Players of the
+    same rating and rarity only differ in cost, so a squad never needs a dearer one while a cheaper one is left.
+    """
+    classes = {}
+    for player in inventory:
+        # Special cards are worth more than any SBC the flows complete, and the search's rarity filter can't pick them
+        if player["rarity"] == "Special" or not requirements.allows_quality(player["quality"]):
+            continue
+        key = (player["rating"], player["rarity"] != "Common")
+        classes.setdefault(key, []).append((player_cost(player), player["id"], player))
+    result = []
+    for (rating, rare), players in classes.items():
+        players.sort(key=lambda entry: entry[:2])
+        result.append(PlayerClass(rating, rare, [player for _, _, player in players], [cost for cost, _, _ in players]))
+    return sorted(result, key=lambda player_class: (player_class.costs[0], -player_class.rating))
+
+def meets(requirements, ratings, rare_count):
+    if rare_count < requirements.min_rare or (requirements.max_rare is not None and rare_count > requirements.max_rare):
+        return False
+    return requirements.min_squad_rating is None or squad_rating(list(requirements.fixed_ratings) + list(ratings)) >= requirements.min_squad_rating
+
+def solution(requirements, counts, classes, exact, nodes=0):
+    """The Solution taking counts[i] (the cheapest) players of classes[i]."""
+    players = [player for player_class, count in zip(classes, counts) for player in player_class.players[:count]]
+    cost = sum(sum(player_class.costs[:count]) for player_class, count in zip(classes, counts))
+    ratings = list(requirements.fixed_ratings) + [player["rating"] for player in players]
+    return Solution(players, cost, squad_rating(ratings), exact, nodes)
+
+def picked_ratings(classes, counts):
+    return [player_class.rating for player_class, count in zip(classes, counts) for _ in range(count)]
+
+def solve_greedy(requirements, classes):
+    """Returns the greedy Solution, or None if the greedy pass can't meet the requirements."""
+    counts = [0] * len(classes)
+    units = sorted((cost, i) for i, player_class in enumerate(classes) for cost in player_class.costs)
+    rare_count = 0
+    # As few rare players as allowed, cheapest first, then the cheapest of the rest
+    for _, i in units:
+        if classes[i].rare and rare_count < requirements.min_rare and sum(counts) < requirements.players:
+            counts[i] += 1
+            rare_count += 1
+    if rare_count < requirements.min_rare:
+        return None
+    for _, i in units:
+        if sum(counts) == requirements.players:
+            break
+        if counts[i] == len(classes[i].players) or (classes[i].rare and requirements.max_rare is not None and rare_count >= requirements.max_rare):
+            continue
+        counts[i] += 1
+        rare_count += classes[i].rare
+    if sum(counts) < requirements.players:
+        return None
+
+    # Swap the lowest rated pick for the upgrade that adds the most rating per point of cost, until the floor is met
+    while not meets(requirements, picked_ratings(classes, counts), rare_count):
+        lowest = min((i for i in range(len(classes)) if counts[i]), key=lambda i: classes[i].rating)
+        saved = classes[lowest].costs[counts[lowest] - 1]
+        upgrades = [j for j, player_class in enumerate(classes) if player_class.rating > classes[lowest].rating
+                    and counts[j] < len(player_class.players) and player_class.rare == classes[lowest].rare]
+        if not upgrades:
+            return None
+        upgrade = max(upgrades, key=lambda j: (classes[j].rating - classes[lowest].rating) / max(classes[j].costs[counts[j]] - saved, 0.5))
+        counts[lowest] -= 1
+        counts[upgrade] += 1
+    return solution(requirements, counts, classes, False)
+
+def solve_exact(requirements, classes, node_limit=None):
+    """Returns the cheapest Solution by branch and bound, or None if no squad meets the requirements."""
+    node_limit = node_limit or config.SOLVER_NODE_LIMIT
+    needed_most = requirements.players
+    # Highest rated first: the rating floor then prunes as soon as a branch falls short
+    classes = sorted(classes, key=lambda player_class: (-player_class.rating, player_class.costs[0]))
+    # What is left from each class on: the players, the rare players, the cheapest costs and the highest ratings
+    suffix_count = [0] * (len(classes) + 1)
+    suffix_rare = [0] * (len(classes) + 1)
+    suffix_costs = [[] for _ in range(len(classes) + 1)]
+    suffix_ratings = [[] for _ in range(len(classes) + 1)]
+    for i in range(len(classes) - 1, -1, -1):
+        player_class = classes[i]
+        suffix_count[i] = suffix_count[i + 1] + len(player_class.players)
+        suffix_rare[i] = suffix_rare[i + 1] + (len(player_class.players) if player_class.rare else 0)
+        suffix_costs[i] = sorted(suffix_costs[i + 1] + player_class.costs[:needed_most])[:needed_most]
+        suffix_ratings[i] = sorted(suffix_ratings[i + 1] + [player_class.rating] * min(len(player_class.players), needed_most), reverse=True)[:needed_most]
+    floor = requirements.min_squad_rating
+    fixed = list(requirements.fixed_ratings)
+
+    # The greedy squad is the one to beat
+    greedy = solve_greedy(requirements, classes)
+    best = {"cost": greedy.cost if greedy else math.inf, "counts": None}
+    counts = [0] * len(classes)
+    nodes = 0
+
+    def search(i, needed, rare_count, cost, ratings):
+        nonlocal nodes
+        nodes += 1
+        if nodes > node_limit:
+            return
+        if needed == 0:
+            if meets(requirements, ratings, rare_count) and cost < best["cost"] - 1e-9:
+                best["cost"], best["counts"] = cost, list(counts)
+            return
+        if suffix_count[i] < needed or rare_count + min(suffix_rare[i], needed) < requirements.min_rare:
+            return
+        if cost + sum(suffix_costs[i][:needed]) >= best["cost"] - 1e-9:
+            return
+        if floor is not None and squad_rating(fixed + ratings + suffix_ratings[i][:needed]) < floor:
+            return
+        player_class = classes[i]
+        most = min(len(player_class.players), needed)
+        if player_class.rare and requirements.max_rare is not None:
+            most = min(most, requirements.max_rare - rare_count)
+        for take in range(most, -1, -1):
+            counts[i] = take
+            search(i + 1, needed - take, rare_count + (take if player_class.rare else 0), cost + sum(player_class.costs[:take]),
+                   ratings + [player_class.rating] * take)
+        counts[i] = 0
+
+    search(0, requirements.players, 0, 0.0, [])
+    if best["counts"] is None:
+        # Nothing beat the greedy squad (or there is no squad at all)
+        if greedy is not None:
+            greedy.exact, greedy.nodes = nodes <= node_limit, nodes
+        return greedy
+    return solution(requirements, best["counts"], classes, nodes <= node_limit, nodes)
+
+def solve(requirements, inventory, mode=None):
+    """
+    Picks the cheapest players of inventory (club index rows) that meet requirements.
+
+    Args:
+        requirements (Requirements): What the players must meet.
+        inventory (list): The players to choose from, as club_index.find returns them.
+        mode (str): "greedy" or "exact". Defaults to config.SOLVER_MODE.
+
+    Returns:
+        Solution: The players picked, lowest rated first, or None if no squad meets the requirements.
+    """
+    mode = mode or config.SOLVER_MODE
+    if requirements.players <= 0:
+        return Solution([], 0.0, squad_rating(requirements.fixed_ratings), True)
+    classes = player_classes(requirements, inventory)
+    if mode == "greedy":
+        result = solve_greedy(requirements, classes)
+    elif mode == "exact":
+        result = solve_exact(requirements, classes)
+        if result is not None and not result.exact:
+            logging.warning(f"The exact solver stopped after {result.nodes} nodes, using the best squad found.")
+    else:
+        raise ValueError(f"Unknown solver mode '{mode}', expected 'greedy' or 'exact'.")
+    if result is not None:
+        result.players.sort(key=lambda player: (player["rating"], player["rarity"]))
+    return result
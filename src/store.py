@@ -1,94 +1,203 @@
+import heapq
 import logging
+import re
 import time
-from selenium.webdriver.common.by import By
+from collections import Counter
+from dataclasses import dataclass
+
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import selenium.common.exceptions as selenium_exceptions
 
 import config
-from utilities import take_screenshot, wait_for_element, click_when_clickable
+import locators
+from api import get_client
+from club_index import club_index
+from journal import journal
+from tracing import traced
+from utilities import run_stats, take_screenshot, wait_for_element, click_when_clickable, wait_until, ui_idle, click_shield_hidden, scrolled_to, find_in_list, retry_step, retry_stats, run_metrics
 
+@traced
 def navigate_to_store(driver):
     # Wait for the navigation bar to be present
-    wait_for_element(driver, By.CSS_SELECTOR, "nav.ut-tab-bar")
+    wait_for_element(driver, *locators.NAV_BAR)
     # Click on the "SBC" button in the navigation bar
-    click_when_clickable(driver, By.CSS_SELECTOR, "button.ut-tab-bar-item.icon-store")
+    click_when_clickable(driver, *locators.STORE_TAB)
     logging.info("Navigated to the store page.")
 
+@traced
 def click_on_packs(driver):
     # Wait for the "Packs" tile to be present
-    wait_for_element(driver, By.XPATH, "//div[contains(@class, 'tile') and contains(@class, 'packs-tile')]")
+    wait_for_element(driver, *locators.PACKS_TILE)
     # Click on the "Packs" tile
-    click_when_clickable(driver, By.XPATH, "//div[contains(@class, 'tile') and contains(@class, 'packs-tile')]")
+    click_when_clickable(driver, *locators.PACKS_TILE)
     logging.info("Clicked on the 'Packs' tile.")
 
+@traced
 def click_ellipsis_button(driver):
     # Wait for the ellipsis button to be present
-    ellipsis_button = wait_for_element(driver, By.CSS_SELECTOR, "button.ut-image-button-control.ellipsis-btn")
+    ellipsis_button = wait_for_element(driver, *locators.UNASSIGNED_ELLIPSIS_BUTTON)
     ellipsis_button.click()
     logging.info("Clicked ellipsis button on unassigned items screen.")
 
+@traced
 def click_store_all_in_club(driver):
     # Wait for the "Store All in Club" button to be present
-    store_all_button = wait_for_element(driver, By.XPATH, "//button[.//span[text()='Store All in Club']]")
+    store_all_button = wait_for_element(driver, *locators.STORE_ALL_BUTTON)
     store_all_button.click()
     logging.info("Clicked 'Store All in Club' button.")
 
-def find_pack_element(driver, pack_name, max_scroll_attempts=50):
+@traced
+def find_pack_elements(driver, pack_names, scroll_top=0):
+    """
+    Scans the store hub once for every pack in pack_names, starting scroll_top down the list.
+
+    Returns:
+        dict: The title element for each pack name that is available.
+    """
+    return find_in_list(driver, locators.PACK_LIST.value, locators.PACK_TITLE.value, pack_names, scroll_top=scroll_top)
+
+# Reads the title and list offset of every pack in the store hub in one pass, scrolling the (virtualised) list one
+# viewport per frame. Entries are keyed by title and offset, so a recycled title element isn't counted twice.
+PACK_INVENTORY_SCRIPT = """
+    var container = document.querySelector(arguments[0]);
+    var itemSelector = arguments[1];
+    var done = arguments[arguments.length - 1];
+    var entries = {};
+    if (!container) { done([]); return; }
+
+    function scan() {
+        var containerTop = container.getBoundingClientRect().top;
+        container.querySelectorAll(itemSelector).forEach(function (item) {
+            var name = item.textContent.trim();
+            var top = Math.round(item.getBoundingClientRect().top - containerTop + container.scrollTop);
+            entries[name + '@' + top] = {name: name, offset_top: top};
+        });
+    }
+
+    function step() {
+        scan();
+        if (container.scrollTop + container.clientHeight >= container.scrollHeight - 1) {
+            container.scrollTop = 0;
+            done(Object.keys(entries).map(function (key) { return entries[key]; }));
+            return;
+        }
+        container.scrollTop += Math.max(container.clientHeight, 1);
+        requestAnimationFrame(function () { requestAnimationFrame(step); });
+    }
+
+    container.scrollTop = 0;
+    requestAnimationFrame(step);
+"""
+
+class PackInventory:
+    """
+    How many of each pack the account owns, read from the store hub in one scan (or from the API with
+    config.USE_API) and counted down as packs are opened. A count is only re-read when it is in doubt.
+
+    Attributes:
+        counts (Counter): Packs owned, by name.
+        offsets (dict): Where in the hub list the first pack of each name was, to start looking for it there.
+        uncertain (set): Names whose count may be wrong, e.g. because a claim click was retried.
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self.offsets = {}
+        self.uncertain = set()
+
+    @traced
+    def scan(self, driver):
+        self.offsets = {}
+        if config.USE_API:
+            self.counts = Counter(get_client(driver).pack_inventory())
+        else:
+            wait_for_element(driver, *locators.PACK_LIST)
+            entries = driver.execute_async_script(PACK_INVENTORY_SCRIPT, locators.PACK_LIST.value, locators.PACK_TITLE.value)
+            self.counts = Counter(entry["name"] for entry in entries)
+            for entry in entries:
+                self.offsets[entry["name"]] = min(self.offsets.get(entry["name"], entry["offset_top"]), entry["offset_top"])
+        self.uncertain.clear()
+        logging.info(f"Pack inventory: {dict(self.counts)}")
+
+    def count(self, pack_name):
+        return self.counts.get(pack_name, 0)
+
+    def opened(self, pack_name, certain=True):
+        self.counts[pack_name] = max(self.count(pack_name) - 1, 0)
+        if not certain:
+            self.uncertain.add(pack_name)
+
+@traced
+def find_pack_element(driver, pack_name, scroll_top=0):
     try:
-        parent_div = wait_for_element(driver, By.CSS_SELECTOR, "div.ut-store-hub-view--content")
-        scroll_attempts = 0
-
-        while scroll_attempts < max_scroll_attempts:
-            try:
-                pack_element = parent_div.find_element(By.XPATH, f"//h1[@class='ut-store-pack-details-view--title']//span[text()='{pack_name}']")
-                logging.info(f"Found pack: {pack_name}")
-                return pack_element
-            except selenium_exceptions.NoSuchElementException:
-                driver.execute_script("arguments[0].scrollBy(0, 150);", parent_div)
-                time.sleep(0.1)
-                scroll_attempts += 1
-
-        print(f"Reached max scroll attempts. Could not find pack: {pack_name}")
-        return None
+        pack_element = find_pack_elements(driver, [pack_name], scroll_top).get(pack_name)
+        if pack_element is None and scroll_top > 0:
+            # Packs opened since the list was scanned moved this one up
+            pack_element = find_pack_elements(driver, [pack_name]).get(pack_name)
+        if pack_element is None:
+            logging.info(f"Could not find pack: {pack_name}")
+        else:
+            logging.info(f"Found pack: {pack_name}")
+        return pack_element
     except Exception as e:
-        print(f"Could not find pack: {pack_name}. Error: {str(e)}")
+        logging.warning(f"Could not find pack: {pack_name}. Error: {str(e)}")
         return None
 
-def claim_pack(driver, pack_element, valuable=True):
-    claim_button = pack_element.find_element(By.XPATH, "./ancestor::div[contains(@class, 'ut-store-pack-details-view')]//span[contains(@class, 'subtext') and text()='Claim your Pack']")
-    claim_button.click()
+@traced
+def claim_pack(driver, pack_element, valuable=True, pack_name=None):
+    def click_claim():
+        nonlocal pack_element
+        try:
+            pack_element.find_element(*locators.CLAIM_PACK_BUTTON).click()
+        except selenium_exceptions.StaleElementReferenceException:
+            # The store hub re-rendered the pack, so find it again for the retry
+            if pack_name:
+                pack_element = find_pack_element(driver, pack_name) or pack_element
+            raise
+
+    # Only the claim click is retried: once the pack is claimed, its items are in Unassigned
+    retry_step(driver, "claim_pack", click_claim)
+    journal.record("pack_claimed", pack=pack_name)
     logging.info("Clicked 'Claim your Pack' button.")
     check_for_unassigned_items_popup(driver)
 
-    time.sleep(1)  # Wait for the unassigned items screen to load
+    wait_until(driver, ui_idle(), name="unassigned_items_loaded", replaces=1)
+    # The pack's items, with their ids, for the club index (read before storing them takes them out of Unassigned)
+    items = get_client(driver).unassigned_items() if club_index.ready and config.USE_API else None
     click_ellipsis_button(driver)
     click_store_all_in_club(driver)
-    time.sleep(2)  # Wait for the action to process
-    resolve_duplicates(driver, valuable)
-    print("claim pack completed")
+    wait_until(driver, ui_idle(), name="store_all_processed", replaces=2)
+    routed = resolve_duplicates(driver, valuable)
+    if items is not None:
+        club_index.pack_stored(items, routed, get_client(driver))
+    journal.record("pack_stored", pack=pack_name)
+    run_stats["packs_opened"] += 1
+    logging.info("Claim pack completed.")
 
+@traced
 def scroll_to_top(driver):
-    parent_div = wait_for_element(driver, By.CSS_SELECTOR, "div.ut-store-hub-view--content")
+    parent_div = wait_for_element(driver, *locators.PACK_LIST)
     driver.execute_script("arguments[0].scrollTo(0, 0);", parent_div)
-    time.sleep(1)  # Allow time for the page to scroll to the top
+    wait_until(driver, scrolled_to(parent_div, 0), name="store_scrolled_to_top", replaces=1)
     logging.info("Scrolled to the top of the page.")
 
+@traced
 def open_packs_by_name(driver, pack_name, valuable=True):
     while True:
         pack_element = find_pack_element(driver, pack_name)
         if pack_element:
-            claim_pack(driver, pack_element, valuable)
+            claim_pack(driver, pack_element, valuable, pack_name)
             return True
         else:
             return False
 
+@traced
 def check_for_unassigned_items_popup(driver):
     try:
         # Wait for the popup to be present
-        popup = driver.find_element(By.CSS_SELECTOR, "section.ea-dialog-view.ea-dialog-view-type--message")
+        popup = driver.find_element(*locators.MESSAGE_DIALOG)
         if popup.is_displayed():
-            message = popup.find_element(By.CSS_SELECTOR, "header > h1").text
+            message = popup.find_element(*locators.MESSAGE_DIALOG_TITLE).text
             if message == "Unassigned Items Remain":
                 raise Exception("Unassigned Items Remain popup detected.")
         logging.info("No unassigned items found.")
@@ -96,79 +205,294 @@ def check_for_unassigned_items_popup(driver):
         # Popup not found, continue normally
         pass
 
+@traced
 def verify_duplicates_screen(driver):
     try:
         # Check if the "Duplicates" header is present within the specified structure
-        driver.find_element(By.XPATH, "//header[@class='ut-section-header-view']//h2[@class='title' and text()='Untradeable Duplicates']")
+        driver.find_element(*locators.DUPLICATES_HEADER)
         logging.info("Duplicates screen is being shown.")
         return True
     except selenium_exceptions.NoSuchElementException:
         logging.info("Duplicates screen is not being shown.")
         return False
 
+@traced
 def click_ellipsis_button_on_duplicates_screen(driver):
     # Wait for the ellipsis button in the header to be present
-    ellipsis_button = wait_for_element(driver, By.XPATH, "//header[@class='ut-section-header-view']//button[contains(@class, 'ellipsis-btn')]")
+    ellipsis_button = wait_for_element(driver, *locators.DUPLICATES_ELLIPSIS_BUTTON)
     ellipsis_button.click()
     logging.info("Clicked ellipsis button on duplicates screen.")
 
+@traced
 def select_swap_in_all_tradeable_button(driver):
     # Wait for the "Swap in all Tradeable Duplicate items" button to be present
-    swap_button = wait_for_element(driver, By.XPATH, "//div[@class='ut-bulk-action-popup-view']//button[.//span[text()='Swap in all Tradeable Duplicate items']]")
+    swap_button = wait_for_element(driver, *locators.SWAP_TRADEABLE_BUTTON)
     swap_button.click()
     logging.info("Selected 'Swap in all Tradeable Duplicate items' button.")
 
-def resolve_duplicates(driver, valuable=True):
-    if verify_duplicates_screen(driver):
-        click_ellipsis_button_on_duplicates_screen(driver)
-        select_swap_in_all_tradeable_button(driver)
-        time.sleep(1) # Wait for action to process
-        confirm_swap_items(driver)
-        time.sleep(2) # Wait for action to process
-        if verify_duplicates_screen(driver):
-            click_ellipsis_button_on_duplicates_screen(driver)
-            time.sleep(.5)
-            if not valuable:
-                quick_sell_duplicates(driver)
-                time.sleep(.5)
-                confirm_quick_sell(driver)
-            else:
-                send_duplicates_transfer_list(driver)
-
+@traced
 def quick_sell_duplicates(driver):
-    # Wait for the "Quick Sell tradeable items for..." button to be present
-    quick_sell_button = wait_for_element(driver, By.XPATH, "//div[@class='ut-bulk-action-popup-view']//button[.//span[contains(text(), 'Quick Sell')]]")
+    # Wait for the "Quick Sell ... items for ..." buttons to be present
+    wait_for_element(driver, *locators.QUICK_SELL_BUTTON)
+    # Sometimes there are two quick sell entries: one to quick sell for a coin profit, plus another to quick sell for 0 coins
+    quick_sell_button = max(driver.find_elements(*locators.QUICK_SELL_BUTTON), key=lambda button: coins_offered(button.text))
+    label = quick_sell_button.text
     quick_sell_button.click()
-    # TODO: Sometimes there are two quick sell entries. One to quick sell for a coin profit,
-    # plus another entry to quick sell for 0 coins
-    logging.info("Clicked 'Quick Sell' item.")
+    logging.info(f"Clicked '{label}'.")
+
+def coins_offered(label):
+    """The coin amount at the end of a quick sell label, e.g. 150 for "Quick Sell tradeable items for 150"."""
+    amounts = re.findall(r"\d[\d,]*", label)
+    return int(amounts[-1].replace(",", "")) if amounts else 0
 
+@traced
 def send_duplicates_transfer_list(driver):
-    raise NotImplementedError
+    # Wait for the "Send ... to Transfer List" button to be present
+    transfer_list_button = wait_for_element(driver, *locators.TRANSFER_LIST_BUTTON)
+    transfer_list_button.click()
+    logging.info("Sent duplicates to the transfer list.")
+
+@traced
+def send_duplicates_sbc_storage(driver):
+    # Wait for the "Send ... to SBC Storage" button to be present
+    sbc_storage_button = wait_for_element(driver, *locators.SBC_STORAGE_BUTTON)
+    sbc_storage_button.click()
+    logging.info("Sent duplicates to SBC storage.")
 
+@traced
 def confirm_swap_items(driver):
     # Wait for the "Yes" button on the "Swap Items" confirmation popup to be present
-    yes_button = wait_for_element(driver, By.XPATH, "//div[@class='ut-action-confirmation-popup-view']//button[text()='Yes']")
+    yes_button = wait_for_element(driver, *locators.CONFIRM_SWAP_BUTTON)
     yes_button.click()
     logging.info("Confirmed swap items.")
 
+@traced
 def confirm_quick_sell(driver):
     # Wait for the "OK" button on the Quick Sell confirmation modal to be present
-    ok_button = wait_for_element(driver, By.XPATH, "//section[@class='ea-dialog-view ea-dialog-view-type--message']//button[.//span[text()='Ok']]")
+    ok_button = wait_for_element(driver, *locators.CONFIRM_QUICK_SELL_BUTTON)
     ok_button.click()
     logging.info("Confirmed quick sell.")
 
-def open_gold_packs(driver):
+# Reads every duplicates section on the screen in one pass: its title, the names of its items and its ellipsis button
+DUPLICATES_SCRIPT = """
+    var headers = document.querySelectorAll(arguments[0]);
+    var itemSelector = arguments[1];
+    var ellipsisSelector = arguments[2];
+    var sections = [];
+    headers.forEach(function (header) {
+        var title = header.querySelector('h2.title');
+        if (!title || title.textContent.indexOf('Duplicates') === -1) { return; }
+        var section = header.closest('section') || header.parentNode;
+        sections.push({
+            title: title.textContent.trim(),
+            items: Array.from(section.querySelectorAll(itemSelector), function (item) { return item.textContent.trim(); }),
+            ellipsis: header.querySelector(ellipsisSelector)
+        });
+    });
+    return sections;
+"""
+
+BULK_ACTIONS_SCRIPT = "return Array.from(document.querySelectorAll(arguments[0]), function (button) { return button.textContent.trim(); });"
+
+@dataclass
+class DuplicateSection:
+    title: str
+    items: list
+    ellipsis: object
+
+# Where duplicates can be routed, with the text of the bulk action that sends them there and the step that clicks it
+DUPLICATE_DESTINATIONS = {
+    "club": ("Swap", select_swap_in_all_tradeable_button),
+    "sbc_storage": ("SBC Storage", send_duplicates_sbc_storage),
+    "transfer_list": ("Transfer List", send_duplicates_transfer_list),
+    "quick_sell": ("Quick Sell", quick_sell_duplicates),
+}
+
+# Duplicates routed by destination, and the seconds spent on the duplicates of each pack, for the routing report
+duplicate_routing = Counter()
+duplicate_times = []
+
+@traced
+def read_duplicates(driver):
+    """
+    Reads the duplicates screen in one pass.
+
+    Returns:
+        list: A DuplicateSection for each section of duplicates shown, or an empty list if the screen isn't shown.
+    """
+    sections = driver.execute_script(DUPLICATES_SCRIPT, locators.DUPLICATE_SECTION_HEADER.value, locators.DUPLICATE_ITEM.value,
+                                     locators.DUPLICATE_SECTION_ELLIPSIS.value)
+    return [DuplicateSection(**section) for section in sections if section["ellipsis"] is not None]
+
+@traced
+def read_bulk_actions(driver):
+    """The destinations offered by the open bulk action popup."""
+    wait_for_element(driver, *locators.BULK_ACTION_BUTTONS)
+    labels = driver.execute_script(BULK_ACTIONS_SCRIPT, locators.BULK_ACTION_BUTTONS.value)
+    return {destination for destination, (text, _) in DUPLICATE_DESTINATIONS.items() if any(text.lower() in label.lower() for label in labels)}
+
+def confirm_bulk_action(driver, destination):
+    if destination == "club":
+        wait_until(driver, ui_idle(), name="swap_confirmation_shown", replaces=1)
+        confirm_swap_items(driver)
+    elif destination == "quick_sell":
+        wait_until(driver, click_shield_hidden(), name="quick_sell_confirmation_shown", replaces=.5)
+        confirm_quick_sell(driver)
+    wait_until(driver, ui_idle(), name=f"duplicates_{destination}_processed", replaces=2)
+
+@traced
+def route_duplicates(driver, valuable=True, sections=None):
+    """
+    Sends every duplicate on the duplicates screen to its destination, with one bulk action per section.
+
+    Each section goes to the first destination in DUPLICATE_ROUTES (CHEAP_DUPLICATE_ROUTES for packs that aren't
+    valuable) that its bulk actions offer. Swapping tradeable duplicates into the club sends the untradeable club
+    copies back to Unassigned, so the screen is read again after every action until no duplicates are left.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        valuable (bool): Whether the duplicates come from valuable packs.
+        sections (list): The sections already read by read_duplicates, if any.
+
+    Returns:
+        Counter: The number of duplicates routed to each destination.
+    """
+    routes = config.DUPLICATE_ROUTES if valuable else config.CHEAP_DUPLICATE_ROUTES
+    routed = Counter()
+    if sections is None:
+        sections = read_duplicates(driver)
+    # Each action clears a section, apart from a swap, which can leave one behind
+    for _ in range(2 * len(sections) + 2):
+        if not sections:
+            break
+        section = sections[0]
+        section.ellipsis.click()
+        offered = read_bulk_actions(driver)
+        destination = next((destination for destination in routes if destination in offered), None)
+        if destination is None:
+            raise Exception(f"None of the duplicate routes {routes} is offered for '{section.title}', only {sorted(offered)}.")
+        logging.info(f"Routing {len(section.items)} '{section.title}' to {destination}.")
+        DUPLICATE_DESTINATIONS[destination][1](driver)
+        confirm_bulk_action(driver, destination)
+        routed[destination] += len(section.items)
+        sections = read_duplicates(driver)
+    if sections:
+        logging.warning(f"Duplicates left after routing: {[section.title for section in sections]}")
+    duplicate_routing.update(routed)
+    return routed
+
+@traced
+def resolve_duplicates(driver, valuable=True):
+    """
+    Routes the duplicates shown after storing a pack's items. None can be left in Unassigned: the web app won't let
+    another pack be claimed while Unassigned holds items.
+
+    Returns:
+        Counter: The number of duplicates routed to each destination.
+    """
+    start = time.monotonic()
+    routed = Counter()
+    sections = read_duplicates(driver)
+    if sections:
+        routed = route_duplicates(driver, valuable, sections)
+    duplicate_times.append(time.monotonic() - start)
+    return routed
+
+def report_duplicate_routing():
+    """Logs where duplicates were routed and the time spent on them per pack, and adds both to run_stats and run_metrics."""
+    if not duplicate_times:
+        return
+    for destination, count in duplicate_routing.items():
+        run_stats[f"duplicates_{destination}"] = count
+    per_pack = sum(duplicate_times) / len(duplicate_times)
+    run_metrics["duplicate_seconds_per_pack"] = per_pack
+    logging.info(f"Duplicates routed: {dict(duplicate_routing)}, {per_pack:.2f}s per pack over {len(duplicate_times)} packs.")
+
+def check_unstored_pack():
+    # A run that crashed between claiming a pack and storing its items leaves them in Unassigned,
+    # which blocks claiming more packs until they are stored
+    pack_name = journal.unstored_pack()
+    if pack_name:
+        logging.warning(f"The items of a '{pack_name}' pack claimed earlier today may still be in Unassigned.")
+
+# Packs opened by the store flows and the seconds spent opening them, for the throughput report
+pack_throughput = {"packs": 0, "seconds": 0.0}
+
+@traced
+def open_pack_queue(driver, pack_names, valuable=True):
+    """
+    Opens every pack in pack_names the account owns, back to back.
+
+    The store hub is scanned once into a PackInventory. Packs are then opened from a priority queue (earlier in
+    pack_names first) using the inventory's counts, and the hub is only re-scanned when the count of the pack
+    just opened is in doubt, or a pack the inventory counted can't be found.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        pack_names (list): The packs to open, in order of priority.
+        valuable (bool): Passed on to claim_pack: route duplicates by DUPLICATE_ROUTES instead of CHEAP_DUPLICATE_ROUTES.
+
+    Returns:
+        int: The number of packs opened.
+    """
+    check_unstored_pack()
+    navigate_to_store(driver)
+    click_on_packs(driver)
+    inventory = PackInventory()
+    inventory.scan(driver)
+    queue = []
+    for priority, pack_name in enumerate(pack_names):
+        if inventory.count(pack_name) > 0:
+            heapq.heappush(queue, (priority, pack_name))
+        else:
+            logging.info(f"No '{pack_name}' packs to open.")
+
+    opened = 0
+    start = time.monotonic()
     try:
-        navigate_to_store(driver)
-        click_on_packs(driver)
-        for pack_name in config.GOLD_PACK_NAMES:
-            while True:
-                scroll_to_top(driver)
-                if not open_packs_by_name(driver, pack_name, True):
-                    break
+        while queue:
+            _, pack_name = queue[0]
+            rescanned = pack_name in inventory.uncertain
+            if rescanned:
+                inventory.scan(driver)
+            pack_element = find_pack_element(driver, pack_name, inventory.offsets.get(pack_name, 0)) if inventory.count(pack_name) > 0 else None
+            if pack_element is None:
+                if rescanned or inventory.count(pack_name) == 0:
+                    logging.info(f"No more '{pack_name}' packs to open.")
+                    heapq.heappop(queue)
+                else:
+                    # The inventory counted a pack that isn't there, so read the hub again before giving up on it
+                    inventory.uncertain.add(pack_name)
+                continue
+
+            retries = retry_stats.get("claim_pack", {}).get("retries", 0)
+            claim_pack(driver, pack_element, valuable, pack_name)
+            opened += 1
+            # A retried claim click may have claimed the pack the first time round
+            inventory.opened(pack_name, certain=retry_stats.get("claim_pack", {}).get("retries", 0) == retries)
+            logging.info(f"Opened a '{pack_name}' pack, {inventory.count(pack_name)} left{' (uncertain)' if pack_name in inventory.uncertain else ''}.")
+            if inventory.count(pack_name) == 0 and pack_name not in inventory.uncertain:
+                heapq.heappop(queue)
+            if queue:
                 navigate_to_store(driver)
                 click_on_packs(driver)
+    finally:
+        pack_throughput["packs"] += opened
+        pack_throughput["seconds"] += time.monotonic() - start
+    return opened
+
+def report_pack_throughput():
+    """Logs the packs opened per minute of pack opening and adds it to run_metrics."""
+    if not pack_throughput["packs"]:
+        return
+    per_minute = pack_throughput["packs"] / pack_throughput["seconds"] * 60 if pack_throughput["seconds"] else 0.0
+    run_metrics["packs_per_minute"] = per_minute
+    logging.info(f"Opened {pack_throughput['packs']} packs in {pack_throughput['seconds']:.1f}s, {per_minute:.1f} packs per minute.")
+
+@traced
+def open_gold_packs(driver):
+    try:
+        open_pack_queue(driver, config.GOLD_PACK_NAMES, True)
     # TODO: Exception handling is the same for both open_packs methods. Consider refactoring.
     except selenium_exceptions.TimeoutException as e:
         take_screenshot(driver)
@@ -177,23 +501,13 @@ def open_gold_packs(driver):
         error_message = str(e)
         take_screenshot(driver)
         logging.error(error_message)
-    # TODO: Consider retrying on exception
 
+@traced
 def open_cheap_packs(driver):
     try:
-        navigate_to_store(driver)
-        click_on_packs(driver)
-        for pack_name in config.PACK_NAMES:
-            while True:
-                scroll_to_top(driver)
-                if not open_packs_by_name(driver, pack_name, False):
-                    break
-                navigate_to_store(driver)
-                click_on_packs(driver)
-    #Consider the following exception:
-    #ERROR - Message: element click intercepted: Element <div class="tile ut-tile-view--with-gfx col-1-2 packs-tile storehub-tile highlight" style="">...</div> is not clickable at point (426, 276). Other element would receive the click: <div class="ut-click-shield showing">...</div>
-    #    Proposal: If this element is visible, then wait before proceeding.
-    
+        open_pack_queue(driver, config.PACK_NAMES, False)
+    # Clicks intercepted by the click shield (e.g. on the packs tile) are retried by the step that made them,
+    # once the shield is gone. What reaches this point has failed for good.
     except selenium_exceptions.TimeoutException as e:
         take_screenshot(driver)
         logging.error(f"Timeout Exception occurred: {e}")
@@ -201,4 +515,3 @@ def open_cheap_packs(driver):
         error_message = str(e)
         take_screenshot(driver)
         logging.error(error_message)
-    # TODO: Consider retrying on exception
\ No newline at end of file
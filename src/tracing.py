@@ -0,0 +1,206 @@
+"""
+Lightweight span tracing for the helpers and flows.
+
+Decorate a function with @traced (or wrap a block in `with span(name):`) to record a span with monotonic
+timestamps, the number of WebDriver commands issued while it was open and the time spent in readiness waits.
+Spans nest per thread, are streamed to a JSONL file as they finish, and are summarised at the end of the run by
+report(): a p50/p95/max table per helper and a flame-style breakdown per SBC. A long-lived process (the daemon)
+calls reset() after each report, which drops the finished spans and starts a new trace file.
+"""
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+import config
+
+_local = threading.local()
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_finished = []
+_trace_file = None
+_trace_start = time.monotonic()
+
+class Span:
+    def __init__(self, name, parent, attrs):
+        self.id = next(_ids)
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.start = time.monotonic() - _trace_start
+        self.duration = 0.0
+        self.commands = 0
+        self.wait = 0.0
+
+    def to_record(self):
+        return {"id": self.id, "parent": self.parent.id if self.parent else None, "name": self.name,
+                "start": round(self.start, 6), "duration": round(self.duration, 6), "commands": self.commands,
+                "wait": round(self.wait, 6), "thread": threading.current_thread().name, **self.attrs}
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+def root_span():
+    """The outermost open span on this thread, i.e. the flow it is running."""
+    stack = _stack()
+    return stack[0] if stack else None
+
+def _write(record):
+    global _trace_file
+    if _trace_file is None:
+        os.makedirs(config.LOG_DIR, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        # Appended to, in case reset() and the next span fall in the same second
+        _trace_file = open(os.path.join(config.LOG_DIR, f"trace_{timestamp}.jsonl"), 'a', buffering=1)
+    _trace_file.write(json.dumps(record) + "\n")
+
+class span:
+    """Context manager recording a span named name. Extra keyword arguments are stored on the span, e.g. sbc="Gold Upgrade"."""
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.span = None
+
+    def __enter__(self):
+        if not config.TRACING:
+            return None
+        stack = _stack()
+        parent = stack[-1] if stack else None
+        # Inherit the SBC attribution so every span can be grouped per SBC
+        if parent is not None and "sbc" in parent.attrs and "sbc" not in self.attrs:
+            self.attrs["sbc"] = parent.attrs["sbc"]
+        self.span = Span(self.name, parent, self.attrs)
+        stack.append(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.span is None:
+            return False
+        self.span.duration = time.monotonic() - _trace_start - self.span.start
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        _stack().pop()
+        with _lock:
+            _finished.append(self.span)
+            _write(self.span.to_record())
+        return False
+
+def traced(func=None, *, sbc=None, sbc_arg=None):
+    """
+    Decorator recording a span named after the function (its qualified name, for methods).
+
+    Args:
+        sbc (str, optional): Attribute the span (and its children) to this SBC.
+        sbc_arg (str, optional): Attribute the span to the SBC named by this argument of the function.
+    """
+    def decorate(func):
+        signature = inspect.signature(func) if sbc_arg else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attrs = {}
+            if sbc:
+                attrs["sbc"] = sbc
+            elif sbc_arg:
+                bound = signature.bind_partial(*args, **kwargs)
+                if sbc_arg in bound.arguments:
+                    attrs["sbc"] = bound.arguments[sbc_arg]
+            with span(func.__qualname__, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+def add_wait(seconds):
+    """Adds readiness wait time to every open span on this thread."""
+    for open_span in _stack():
+        open_span.wait += seconds
+
+def instrument_driver(driver):
+    """Counts every WebDriver command (including WebElement commands) against the open spans."""
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        for open_span in _stack():
+            open_span.commands += 1
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    return driver
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+def helper_table(spans):
+    by_name = defaultdict(list)
+    for finished in spans:
+        by_name[finished.name].append(finished)
+    lines = [f"{'Helper':<36} {'Calls':>6} {'p50 (s)':>8} {'p95 (s)':>8} {'Max (s)':>8} {'Cmds':>6} {'Wait (s)':>9}"]
+    for name, group in sorted(by_name.items(), key=lambda item: -sum(s.duration for s in item[1])):
+        durations = [s.duration for s in group]
+        lines.append(f"{name:<36} {len(group):>6} {percentile(durations, .5):>8.3f} {percentile(durations, .95):>8.3f} "
+                     f"{max(durations):>8.3f} {sum(s.commands for s in group):>6} {sum(s.wait for s in group):>9.2f}")
+    return lines
+
+def flame_breakdown(spans, width=40):
+    """Per SBC, the time spent in each call path below the SBC's root span, with inclusive durations."""
+    lines = []
+    children = defaultdict(list)
+    for finished in spans:
+        if finished.parent is not None:
+            children[finished.parent.id].append(finished)
+
+    roots = [s for s in spans if "sbc" in s.attrs and (s.parent is None or "sbc" not in s.parent.attrs)]
+    by_sbc = defaultdict(list)
+    for root in roots:
+        by_sbc[root.attrs["sbc"]].append(root)
+
+    for sbc, sbc_roots in by_sbc.items():
+        total = sum(root.duration for root in sbc_roots) or 1e-9
+        lines.append(f"{sbc} ({total:.2f}s)")
+        # Merge identical call paths so repeated slots show up as one bar
+        paths = defaultdict(float)
+
+        def walk(node, path):
+            paths[path] += node.duration
+            for child in children[node.id]:
+                walk(child, path + (child.name,))
+
+        for root in sbc_roots:
+            walk(root, (root.name,))
+        for path, duration in sorted(paths.items()):
+            bar = "#" * max(1, int(width * duration / total))
+            lines.append(f"  {'  ' * (len(path) - 1)}{path[-1]:<{max(36 - 2 * len(path), 1)}} {duration:>8.2f}s {bar}")
+    return lines
+
+def report():
+    """Prints and logs the per-helper latency table and the per-SBC flame breakdown for the run."""
+    with _lock:
+        spans = list(_finished)
+    if not spans:
+        return
+    lines = helper_table(spans) + [""] + flame_breakdown(spans)
+    for line in lines:
+        print(line)
+        logging.info(line)
+
+def reset():
+    """Drops the finished spans and closes the trace file, so the next span starts a new one."""
+    global _trace_file
+    with _lock:
+        _finished.clear()
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
@@ -1,24 +1,360 @@
+import functools
+import logging
 import os
+import random
 import time
-from selenium.webdriver.support.ui import WebDriverWait
+from collections import Counter
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+import selenium.common.exceptions as selenium_exceptions
 
 import config
+import locators
+from browser_profile import is_performance_profile
+from capture import failure_capture
+from tracing import traced, add_wait
 
-def wait_for_element(driver, by, value, timeout=config.DEFAULT_WAIT_DURATION):
-    return WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((by, value))
+# Outcome counters for the run, e.g. "sbcs_completed", "packs_opened" and "errors"
+run_stats = Counter()
+
+# Timing metrics for the run in seconds, e.g. "startup_seconds"
+run_metrics = {}
+
+# Statistics for named readiness waits: name -> [calls, seconds waited, seconds of fixed sleep replaced]
+wait_stats = {}
+
+# Statistics for retried steps: name -> {"retries": n, "failed": n, "seconds": time lost, plus a count per exception class}
+retry_stats = {}
+
+@traced
+def wait_until(driver, condition, timeout=config.DEFAULT_WAIT_DURATION, name=None, replaces=0):
+    """
+    Waits until a readiness condition returns a truthy value.
+
+    Unlike WebDriverWait's fixed 0.5s poll, the poll interval starts at config.WAIT_POLL_INITIAL and
+    grows by config.WAIT_POLL_BACKOFF up to config.WAIT_POLL_MAX, so fast transitions are caught early
+    and slow ones don't flood the driver with commands.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        condition: A callable taking the driver (e.g. an expected_conditions entry or one of the conditions below).
+        timeout (float): Seconds to wait before raising a TimeoutException.
+        name (str, optional): Name of the readiness condition. Named waits are recorded in wait_stats.
+        replaces (float): Seconds of fixed time.sleep this wait replaced, used for the savings report.
+
+    Returns:
+        The truthy value returned by the condition.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = config.WAIT_POLL_INITIAL
+    while True:
+        try:
+            result = condition(driver)
+            if result:
+                break
+        except (selenium_exceptions.NoSuchElementException, selenium_exceptions.StaleElementReferenceException):
+            pass
+
+        now = time.monotonic()
+        if now >= deadline:
+            raise selenium_exceptions.TimeoutException(f"Timed out after {timeout}s waiting for '{name or condition}'.")
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * config.WAIT_POLL_BACKOFF, config.WAIT_POLL_MAX)
+
+    waited = time.monotonic() - start
+    add_wait(waited)
+    if name:
+        stats = wait_stats.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] += replaces
+    return result
+
+def report_wait_savings():
+    """
+    Logs how long each named readiness wait took compared to the fixed sleeps it replaced.
+
+    Returns:
+        float: The total number of seconds saved over the run.
+    """
+    total_waited = 0.0
+    total_replaced = 0.0
+    for name, (calls, waited, replaced) in sorted(wait_stats.items()):
+        logging.info(f"Wait '{name}': {calls} calls, {waited:.2f}s waited vs {replaced:.2f}s of fixed sleeps.")
+        total_waited += waited
+        total_replaced += replaced
+    saved = total_replaced - total_waited
+    logging.info(f"Readiness waits took {total_waited:.2f}s instead of {total_replaced:.2f}s, saving {saved:.2f}s.")
+    return saved
+
+# Step retries. Each exception a step raises is classified, and only the step that failed is retried.
+
+def classify_exception(e):
+    """
+    Classifies an exception raised by a step:
+        intercepted    Another element (usually the click shield) received the click, or the element can't be interacted with yet.
+        stale          The element was re-rendered between finding it and using it.
+        timeout        The element didn't appear or become clickable in time.
+        fatal          Anything else, e.g. an unexpected popup. Never retried.
+    """
+    if isinstance(e, (selenium_exceptions.ElementClickInterceptedException, selenium_exceptions.ElementNotInteractableException)):
+        return "intercepted"
+    if isinstance(e, selenium_exceptions.StaleElementReferenceException):
+        return "stale"
+    if isinstance(e, (selenium_exceptions.TimeoutException, selenium_exceptions.NoSuchElementException)):
+        return "timeout"
+    # Older drivers report an intercepted click as a plain WebDriverException
+    if isinstance(e, selenium_exceptions.WebDriverException) and "is not clickable at point" in str(e):
+        return "intercepted"
+    return "fatal"
+
+def retry_limit(kind):
+    """How many times a step that failed with an exception of class kind is retried."""
+    return {"intercepted": config.RETRY_ATTEMPTS, "stale": config.RETRY_ATTEMPTS, "timeout": config.RETRY_TIMEOUT_ATTEMPTS}.get(kind, 0)
+
+def retry_step(driver, name, action):
+    """
+    Runs action(), retrying it when it fails with an intercepted, stale or timeout exception.
+
+    Before each retry it waits for the click shield to clear, then backs off for a jittered, exponentially growing
+    delay (config.RETRY_BASE_DELAY doubling up to config.RETRY_MAX_DELAY). An exception that a nested step already
+    retried is passed straight on, so only the step that failed is retried.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        name (str): The step name, used for retry_stats.
+        action: A callable taking no arguments.
+
+    Returns:
+        The value returned by action.
+    """
+    start = time.monotonic()
+    retries = 0
+    failure_capture.record(driver, name)
+    while True:
+        attempt_start = time.monotonic()
+        try:
+            result = action()
+            break
+        except Exception as e:
+            kind = classify_exception(e)
+            if getattr(e, "retried", False) or retries >= retry_limit(kind):
+                if retries:
+                    stats = retry_stats.setdefault(name, {"retries": 0, "failed": 0, "seconds": 0.0})
+                    stats["failed"] += 1
+                    stats["seconds"] += time.monotonic() - start
+                    # The enclosing steps must not retry what this step already gave up on
+                    e.retried = True
+                raise
+            retries += 1
+            stats = retry_stats.setdefault(name, {"retries": 0, "failed": 0, "seconds": 0.0})
+            stats["retries"] += 1
+            stats[kind] = stats.get(kind, 0) + 1
+            logging.warning(f"Step '{name}' failed ({kind}), retry {retries}: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+            try:
+                wait_until(driver, click_shield_hidden(), name="retry_shield_cleared")
+            except selenium_exceptions.TimeoutException:
+                pass
+            delay = min(config.RETRY_BASE_DELAY * 2 ** (retries - 1), config.RETRY_MAX_DELAY)
+            time.sleep(random.uniform(delay / 2, delay))
+    if retries:
+        # The failed attempts and the waits between them, up to the attempt that succeeded
+        retry_stats[name]["seconds"] += attempt_start - start
+    return result
+
+def retried(func):
+    """Decorator retrying a step (whose first argument is the driver) with retry_step, under the function's name."""
+    @functools.wraps(func)
+    def wrapper(driver, *args, **kwargs):
+        return retry_step(driver, func.__name__, lambda: func(driver, *args, **kwargs))
+    return wrapper
+
+def report_retries():
+    """
+    Logs the retries and the time lost to them per step, and adds the totals to run_stats and run_metrics.
+
+    Returns:
+        float: The total number of seconds lost to retried steps.
+    """
+    lost = 0.0
+    for name, stats in sorted(retry_stats.items()):
+        kinds = ", ".join(f"{kind} {stats[kind]}" for kind in ("intercepted", "stale", "timeout") if stats.get(kind))
+        logging.info(f"Step '{name}': {stats['retries']} retries ({kinds}), {stats['failed']} failed after retrying, {stats['seconds']:.2f}s lost.")
+        run_stats["retries"] += stats["retries"]
+        lost += stats["seconds"]
+    run_metrics["retry_seconds"] = lost
+    logging.info(f"Retried steps lost {lost:.2f}s in total.")
+    return lost
+
+# Readiness conditions. Each returns a callable for wait_until, evaluated in the page with a single script call.
+
+def click_shield_hidden():
+    """The 'ut-click-shield' overlay that blocks input during transitions is not showing."""
+    return lambda driver: driver.execute_script(
+        "return !document.querySelector('.ut-click-shield.showing');"
     )
 
-def click_when_clickable(driver, by, value, timeout=config.DEFAULT_WAIT_DURATION):
-    element = WebDriverWait(driver, timeout).until(
-        EC.element_to_be_clickable((by, value))
+def transitions_finished(css_selector=None):
+    """No finite CSS transition or animation is running in the document (or under css_selector)."""
+    script = """
+        var root = arguments[0] ? document.querySelector(arguments[0]) : document;
+        if (!root) return true;
+        var animations = root === document ? document.getAnimations() : root.getAnimations({subtree: true});
+        return animations.every(function (a) {
+            var endless = a.effect && a.effect.getComputedTiming().endTime === Infinity;
+            return endless || a.playState !== 'running';
+        });
+    """
+    return lambda driver: driver.execute_script(script, css_selector)
+
+def ui_idle():
+    """The click shield is gone and no transition is running, i.e. the web app will accept the next click."""
+    shield = click_shield_hidden()
+    transitions = transitions_finished()
+    return lambda driver: shield(driver) and transitions(driver)
+
+def search_results_populated():
+    """The player search result list has at least one 'add' button and the click shield is gone."""
+    return lambda driver: driver.execute_script(
+        "return !!document.querySelector('li button.add') && !document.querySelector('.ut-click-shield.showing');"
     )
+
+def slot_rating_changed(index, previous=""):
+    """The rating shown in the squad slot at index differs from previous (e.g. after adding a player)."""
+    script = """
+        var rating = document.querySelector(arguments[0]);
+        return rating ? rating.textContent.trim() : '';
+    """
+    selector = f"{locators.SQUAD_SLOT.format(index=index).value} {locators.SLOT_RATING.value}"
+    return lambda driver: driver.execute_script(script, selector) != previous
+
+def session_state():
+    """'logged_in' once the web app's navigation bar shows, 'logged_out' once its login button does, None while it loads."""
+    script = """
+        if (document.querySelector(arguments[0])) return 'logged_in';
+        return document.querySelector(arguments[1]) ? 'logged_out' : null;
+    """
+    return lambda driver: driver.execute_script(script, locators.NAV_BAR.value, locators.LOGIN_BUTTON.value)
+
+def scrolled_to(element, top=0):
+    """The scrollable element has reached the given scrollTop."""
+    return lambda driver: driver.execute_script("return Math.abs(arguments[0].scrollTop - arguments[1]) < 1;", element, top)
+
+def squad_ready():
+    """The SBC squad pitch has rendered and the web app is idle."""
+    idle = ui_idle()
+    return lambda driver: driver.execute_script("return !!document.querySelector('.ut-squad-pitch-view.sbc');") and idle(driver)
+
+def add_player_button_ready(label="Add Player"):
+    """The 'Add Player' button (or the button labelled label, e.g. 'Swap Player' on a filled slot) for the selected slot is visible and not covered by the click shield."""
+    script = """
+        var buttons = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+        var button = buttons.singleNodeValue;
+        return !!button && button.offsetParent !== null && !document.querySelector('.ut-click-shield.showing');
+    """
+    return lambda driver: driver.execute_script(script, locators.ADD_PLAYER_BUTTON.format(label=label).value)
+
+def search_filters_ready():
+    """The search filter panel (sort dropdown and filter rows) is present and has finished sliding in."""
+    transitions = transitions_finished()
+    return lambda driver: driver.execute_script("return !!document.querySelector('div.inline-list-select.ut-drop-down-control');") and transitions(driver)
+
+# Scans a (virtualised) scrollable container from a start offset, one viewport per rendered frame, until every name
+# has matched an item or the bottom is reached. The first match is scrolled into view.
+FIND_IN_LIST_SCRIPT = """
+    var container = document.querySelector(arguments[0]);
+    var itemSelector = arguments[1];
+    var names = arguments[2];
+    var exact = arguments[3];
+    var done = arguments[arguments.length - 1];
+    var found = {};
+    if (!container) { done(found); return; }
+
+    function scan() {
+        container.querySelectorAll(itemSelector).forEach(function (item) {
+            var text = item.textContent.trim();
+            names.forEach(function (name) {
+                if (!(name in found) && (exact ? text === name : text.indexOf(name) !== -1)) {
+                    found[name] = item;
+                }
+            });
+        });
+    }
+
+    function step() {
+        scan();
+        var atBottom = container.scrollTop + container.clientHeight >= container.scrollHeight - 1;
+        if (Object.keys(found).length === names.length || atBottom) {
+            var first = names.map(function (name) { return found[name]; }).filter(Boolean)[0];
+            if (first) first.scrollIntoView({block: 'center'});
+            done(found);
+            return;
+        }
+        container.scrollTop += Math.max(container.clientHeight, 1);
+        requestAnimationFrame(function () { requestAnimationFrame(step); });
+    }
+
+    container.scrollTop = arguments[4];
+    requestAnimationFrame(step);
+"""
+
+@traced
+def find_in_list(driver, container_selector, item_selector, names, exact=True, scroll_top=0, timeout=config.DEFAULT_WAIT_DURATION):
+    """
+    Searches a scrollable list in the page for items whose text matches any of the given names.
+
+    The whole container is scanned in a single async script instead of scrolling and re-running an XPath
+    from Python, and the first match is scrolled into view so it can be clicked directly.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        container_selector (str): CSS selector of the scrollable container.
+        item_selector (str): CSS selector, relative to the container, of the elements holding the names.
+        names (list): The names to look for.
+        exact (bool): Match the full text if True, otherwise match names contained in the text.
+        scroll_top (float): Where in the container to start scanning. Defaults to the top.
+        timeout (float): Seconds to wait for the container to be present.
+
+    Returns:
+        dict: The matching WebElement for each name that was found. In a virtualised list, elements
+        for names other than the first match may have been recycled by the time they are used.
+    """
+    wait_for_element(driver, By.CSS_SELECTOR, container_selector, timeout)
+    found = driver.execute_async_script(FIND_IN_LIST_SCRIPT, container_selector, item_selector, list(names), exact, scroll_top) or {}
+    logging.info(f"Found {len(found)} of {len(names)} list items in '{container_selector}': {list(found)}")
+    return found
+
+@traced
+def wait_for_element(driver, by, value, timeout=config.DEFAULT_WAIT_DURATION):
+    return wait_until(driver, EC.presence_of_element_located((by, value)), timeout)
+
+@traced
+@retried
+def click_when_clickable(driver, by, value, timeout=config.DEFAULT_WAIT_DURATION):
+    return _click(driver, by, value, timeout)
+
+def _click(driver, by, value, timeout):
+    """The body of click_when_clickable, outside its span and retries so the fallback can wait again without nesting them."""
+    if is_performance_profile() and timeout > config.IMAGE_FALLBACK_WAIT:
+        try:
+            element = wait_until(driver, EC.element_to_be_clickable((by, value)), config.IMAGE_FALLBACK_WAIT)
+        except selenium_exceptions.TimeoutException:
+            # Without images some tiles collapse to zero size and never count as clickable, so click them with a script
+            elements = driver.find_elements(by, value)
+            if not elements:
+                return _click(driver, by, value, timeout - config.IMAGE_FALLBACK_WAIT)
+            logging.warning(f"Element '{value}' is present but not clickable, clicking it with a script.")
+            driver.execute_script("arguments[0].click();", elements[0])
+            return elements[0]
+    else:
+        element = wait_until(driver, EC.element_to_be_clickable((by, value)), timeout)
     element.click()
     return element
 
-def take_screenshot(driver):
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    screenshot_path = os.path.join("screenshots", f"error_{timestamp}.png")
-    os.makedirs(os.path.dirname(screenshot_path), exist_ok=True)
-    driver.save_screenshot(screenshot_path)
\ No newline at end of file
+@traced
+def take_screenshot(driver, name="error"):
+    # Every flow takes a screenshot when it catches an error, so this doubles as the run's error count
+    run_stats["errors"] += 1
+    # Only the screenshot is taken here; the bundle with the states leading up to the error is written in the background
+    failure_capture.failure(driver, name)